@@ -0,0 +1,101 @@
+# api/bulk.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from api.client import get_default_client
+from utils.loader.region import ADM_CODES
+
+logger = logging.getLogger(__name__)
+
+
+
+class RateLimiter:
+    """
+    Token bucket sederhana yang aman dipakai banyak thread.
+    `rate` permintaan per detik dengan ledakan maksimal `burst`.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def kumpulkan_turunan(store, code, level):
+    """
+    Mengembalikan semua Region pada tingkat `level` di bawah `code`
+    (urut sesuai kode). Jika `code` sudah berada di tingkat itu, hasilnya
+    wilayah itu sendiri.
+    """
+    region = store.get(code)
+    if region is None:
+        raise KeyError(code)
+    hasil = []
+    tumpukan = [region]
+    while tumpukan:
+        node = tumpukan.pop()
+        if node.level >= level:
+            hasil.append(node)
+        else:
+            tumpukan.extend(reversed(store.children(node.code)))
+    return hasil
+
+
+def fetch_bulk(regions, client=None, concurrency=8, rate=5.0, use_cache=True, refresh=False):
+    """
+    Mengambil prakiraan cuaca untuk banyak wilayah secara bersamaan.
+    Paling banyak `concurrency` permintaan berjalan sekaligus dan laju
+    permintaan dibatasi `rate` per detik (0/None berarti tanpa batas).
+    Menghasilkan (region, data) segera setelah masing-masing selesai, tanpa
+    menunggu seluruh batch; data bernilai None jika permintaan gagal.
+    Dengan `refresh`, setiap wilayah diperbarui dari API meskipun cache masih segar.
+    """
+    client = client or get_default_client()
+    limiter = RateLimiter(rate) if rate else None
+
+    def ambil(region):
+        if limiter is not None:
+            limiter.acquire()
+        if refresh:
+            return client.refresh_prakiraan_cuaca(ADM_CODES[region.level], region.code)
+        return client.fetch_prakiraan_cuaca(ADM_CODES[region.level], region.code, use_cache=use_cache)
+
+    antrean = iter(regions)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bulk') as executor:
+        berjalan = {}
+        # Isi pool secukupnya saja agar daftar wilayah besar tidak jadi ribuan future sekaligus
+        for region in antrean:
+            berjalan[executor.submit(ambil, region)] = region
+            if len(berjalan) >= concurrency * 2:
+                break
+
+        while berjalan:
+            selesai, _ = wait(berjalan, return_when=FIRST_COMPLETED)
+            for future in selesai:
+                region = berjalan.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.error(f"Gagal mengambil prakiraan {region.code}: {e}")
+                    data = None
+                yield region, data
+
+                region_baru = next(antrean, None)
+                if region_baru is not None:
+                    berjalan[executor.submit(ambil, region_baru)] = region_baru
@@ -0,0 +1,249 @@
+# api/cache.py
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join('data', '.cache', 'http')
+
+
+class CacheEntry:
+    """
+    Satu respons yang tersimpan di cache beserta metadata validasinya.
+    """
+    __slots__ = ('body_path', 'stored_at', 'etag', 'last_modified', 'ttl', '_data')
+
+    def __init__(self, body_path, stored_at, etag=None, last_modified=None, ttl=None):
+        self.body_path = body_path
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self.ttl = ttl  # TTL dari penulis entri (lihat ResponseCache.ttl_entri), None = ttl pembaca
+        self._data = None
+
+    def age(self, now=None):
+        return (now or time.time()) - self.stored_at
+
+    def read_bytes(self):
+        with open(self.body_path, 'rb') as f:
+            return f.read()
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self.read_bytes())
+        return self._data
+
+
+class ResponseCache:
+    """
+    Cache respons API di disk, dikunci dengan (adm_level_code, kode).
+    Satu direktori hanya berisi respons dari satu sumber; lihat untuk_sumber.
+
+    - `ttl`: umur (detik) respons yang masih dianggap segar.
+    - `stale_while_revalidate`: rentang tambahan (detik) setelah ttl ketika
+      respons lama tetap disajikan sambil diperbarui di latar belakang.
+    - `max_entries` / `max_bytes`: batas ukuran; entri yang paling lama tidak
+      dipakai (LRU) dibuang lebih dulu.
+    - `ttl_entri`: jika diisi, ditulis ke metadata setiap entri yang disimpan
+      atau diperbarui, dan menggantikan `ttl` proses mana pun yang membacanya.
+      Dipakai daemon prefetch agar entri yang dihangatkannya tetap segar
+      sampai putaran berikutnya.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=3 * 3600, stale_while_revalidate=0,
+                 max_entries=5000, max_bytes=256 * 1024 * 1024, ttl_entri=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.ttl_entri = ttl_entri
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._usage = None  # OrderedDict key -> ukuran body, urut dari yang paling lama dipakai
+        self._total_bytes = 0
+
+    def untuk_sumber(self, base_url):
+        """
+        Cache dengan pengaturan yang sama untuk respons dari `base_url` lain
+        (mis. server tiruan lewat --base-url), di subdirektori sumber/ miliknya
+        sendiri. Respons sintetis tidak pernah tercampur dengan respons API asli.
+        """
+        host = re.sub(r'[^0-9A-Za-z._-]', '_', urlsplit(base_url).netloc) or 'lokal'
+        nama = f"{host}-{hashlib.sha1(base_url.encode('utf-8')).hexdigest()[:10]}"
+        return ResponseCache(
+            os.path.join(self.directory, 'sumber', nama), ttl=self.ttl,
+            stale_while_revalidate=self.stale_while_revalidate,
+            max_entries=self.max_entries, max_bytes=self.max_bytes, ttl_entri=self.ttl_entri
+        )
+
+    @staticmethod
+    def key(adm_level_code, kode):
+        return re.sub(r'[^0-9A-Za-z._-]', '_', f"{adm_level_code}-{kode}")
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.meta.json"
+
+    def _scan_usage(self):
+        # Dipanggil sekali: susun urutan LRU dari mtime body di disk
+        usage = []
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if item.name.endswith('.json') and not item.name.endswith('.meta.json'):
+                        stat = item.stat()
+                        usage.append((stat.st_mtime, item.name[:-len('.json')], stat.st_size))
+        except FileNotFoundError:
+            pass
+        usage.sort()
+        self._usage = OrderedDict((key, size) for _, key, size in usage)
+        self._total_bytes = sum(self._usage.values())
+
+    def get(self, adm_level_code, kode):
+        """
+        Mengembalikan CacheEntry (segar atau basi), atau None jika tidak ada.
+        """
+        key = self.key(adm_level_code, kode)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            # mtime body dipakai sebagai waktu akses terakhir untuk LRU
+            os.utime(body_path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Entri cache {key} rusak, diabaikan: {e}")
+            return None
+
+        with self._lock:
+            if self._usage is not None and key in self._usage:
+                self._usage.move_to_end(key)
+        return CacheEntry(body_path, meta.get('stored_at', 0), meta.get('etag'), meta.get('last_modified'),
+                          meta.get('ttl'))
+
+    def _ttl(self, entry):
+        return entry.ttl if entry.ttl is not None else self.ttl
+
+    def is_fresh(self, entry, now=None):
+        return entry.age(now) < self._ttl(entry)
+
+    def is_servable_stale(self, entry, now=None):
+        return entry.age(now) < self._ttl(entry) + self.stale_while_revalidate
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def put(self, adm_level_code, kode, body, etag=None, last_modified=None):
+        """
+        Menyimpan body respons (bytes) ke cache lalu menjalankan eviksi bila perlu.
+        """
+        try:
+            tmp_path = self.temp_path(adm_level_code, kode)
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+        except OSError as e:
+            logger.warning(f"Gagal menyimpan cache {self.key(adm_level_code, kode)}: {e}")
+            return
+        self.put_file(adm_level_code, kode, tmp_path, etag=etag, last_modified=last_modified)
+
+    def temp_path(self, adm_level_code, kode):
+        """
+        Lokasi file sementara untuk menulis body secara bertahap sebelum put_file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        body_path, _ = self._paths(self.key(adm_level_code, kode))
+        return f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def put_file(self, adm_level_code, kode, tmp_path, etag=None, last_modified=None):
+        """
+        Memindahkan body yang sudah ditulis di `tmp_path` ke cache secara atomik.
+        """
+        key = self.key(adm_level_code, kode)
+        body_path, meta_path = self._paths(key)
+        try:
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, body_path)
+            self._write_meta(meta_path, {
+                'stored_at': time.time(),
+                'etag': etag,
+                'last_modified': last_modified,
+                'ttl': self.ttl_entri,
+            })
+        except OSError as e:
+            logger.warning(f"Gagal menyimpan cache {key}: {e}")
+            return
+
+        with self._lock:
+            if self._usage is None:
+                self._scan_usage()
+            self._total_bytes += size - self._usage.pop(key, 0)
+            self._usage[key] = size
+            self._evict()
+
+    def touch(self, entry):
+        """
+        Menandai entri sebagai segar kembali (mis. setelah server menjawab 304).
+        """
+        meta_path = entry.body_path[:-len('.json')] + '.meta.json'
+        entry.stored_at = time.time()
+        if self.ttl_entri is not None:
+            entry.ttl = self.ttl_entri
+        try:
+            self._write_meta(meta_path, {
+                'stored_at': entry.stored_at,
+                'etag': entry.etag,
+                'last_modified': entry.last_modified,
+                'ttl': entry.ttl,
+            })
+        except OSError as e:
+            logger.warning(f"Gagal memperbarui cache {meta_path}: {e}")
+
+    def hapus(self, adm_level_code, kode):
+        """
+        Membuang satu entri, mis. karena body-nya rusak atau terpotong.
+        """
+        key = self.key(adm_level_code, kode)
+        with self._lock:
+            if self._usage is not None:
+                self._total_bytes -= self._usage.pop(key, 0)
+            self._remove(key)
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Gagal menghapus cache {path}: {e}")
+
+    def _evict(self):
+        while self._usage and (len(self._usage) > self.max_entries or self._total_bytes > self.max_bytes):
+            key, size = self._usage.popitem(last=False)
+            self._total_bytes -= size
+            self._remove(key)
+
+    def clear(self):
+        """
+        Menghapus seluruh entri cache.
+        """
+        with self._lock:
+            if self._usage is None:
+                self._scan_usage()
+            while self._usage:
+                key, _ = self._usage.popitem(last=False)
+                self._remove(key)
+            self._total_bytes = 0
@@ -0,0 +1,523 @@
+# api/client.py
+
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from api.cache import ResponseCache
+from api.history import buka_riwayat_bawaan
+from api.stream import StreamError, iter_file, iter_json_array
+from utils.metrics.metrics import incr, span, span_iter, timed
+from utils.utils import impor_malas
+
+# requests baru dimuat saat permintaan pertama; jawaban dari cache tidak membutuhkannya
+requests = impor_malas('requests')
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = 'https://api.bmkg.go.id/publik/prakiraan-cuaca'
+
+# Status HTTP yang dianggap sementara dan layak dicoba ulang
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Batas jumlah entri desa dari respons tingkat induk yang disimpan di memori
+# (satu entri 3 hari prakiraan sekitar 40 KB setelah di-parse, jadi ~10 MB);
+# cukup untuk desa-desa satu kecamatan yang baru dibuka
+MAKS_INDEKS_ADM4 = 256
+
+
+class BmkgClient:
+    """
+    Klien API prakiraan cuaca BMKG.
+
+    Memakai satu requests.Session dengan pool koneksi keep-alive sehingga
+    handshake TCP/TLS tidak diulang di setiap permintaan. Kesalahan sementara
+    (timeout, koneksi putus, 5xx dan 429) dicoba ulang dengan exponential
+    backoff + jitter. Timeout koneksi dan timeout baca diatur terpisah.
+
+    `base_url` bisa diarahkan ke server tiruan (api.mock_server); jika
+    `record_dir` diisi, setiap respons 200 disalin ke sana sebagai fixture
+    yang nantinya bisa disajikan ulang oleh server tiruan.
+
+    Jika `history` (api.history.HistoryStore) diberikan, setiap respons baru
+    dari jaringan juga disimpan ke riwayat prakiraan; untuk `base_url` selain
+    API BMKG riwayat diabaikan.
+
+    Permintaan identik yang sedang berjalan digabung: pemanggil berikutnya
+    menunggu hasil permintaan pertama alih-alih mengirim HTTP sendiri.
+    Respons adm1-adm3 sudah memuat entri per desa; entri itu diindeks per kode
+    adm4 (paling lama `ttl_indeks` detik, bawaan sama dengan TTL cache) sehingga
+    fetch adm4 untuk desa yang sudah ada di respons induk tidak ke jaringan.
+    Respons yang di-stream tidak diindeks agar memorinya tetap sebatas satu lokasi.
+    """
+
+    def __init__(self, base_url=None, cache=None, connect_timeout=3.05, read_timeout=10,
+                 max_retries=3, backoff_factor=0.5, backoff_max=30, pool_maxsize=10, record_dir=None, history=None,
+                 ttl_indeks=None, maks_indeks=MAKS_INDEKS_ADM4):
+        # BMKG_API_BASE_URL / BMKG_RECORD_DIR berlaku juga untuk proses anak
+        self.base_url = base_url_aktif(base_url)
+        self.record_dir = record_dir or os.environ.get('BMKG_RECORD_DIR') or None
+        self.cache = cache_untuk(cache, self.base_url)
+        # Riwayat hanya mencatat rilis dari API BMKG, bukan dari server tiruan
+        self.history = history if self.base_url == BASE_URL else None
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.pool_maxsize = pool_maxsize
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._revalidasi_berjalan = set()
+        self._revalidasi_lock = threading.Lock()
+        self.ttl_indeks = ttl_indeks
+        self.maks_indeks = maks_indeks
+        self._indeks_adm4 = OrderedDict()  # kode adm4 -> (waktu diambil, entri data[*])
+        self._indeks_lock = threading.Lock()
+        self._berjalan = {}  # (adm_level_code, kode) -> Future permintaan yang sedang berjalan
+        self._berjalan_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def session(self):
+        """
+        requests.Session dengan pool koneksi, dibuat saat permintaan pertama.
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def _backoff(self, attempt, response=None):
+        """
+        Lama jeda sebelum percobaan ke-(attempt+1): full jitter di atas
+        backoff_factor * 2^attempt, atau nilai Retry-After jika server memberikannya.
+        """
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt)))
+
+    def get(self, params, headers=None, stream=False):
+        """
+        Mengirim GET ke API dengan retry. Mengembalikan objek Response terakhir;
+        pengecualian requests diteruskan jika semua percobaan gagal.
+        """
+        attempt = 0
+        while True:
+            try:
+                with span('http.request'):
+                    response = self.session.get(self.base_url, params=params, headers=headers, timeout=self.timeout, stream=stream)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as err:
+                if attempt >= self.max_retries:
+                    incr('http.error')
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{err.__class__.__name__} pada {params}, mencoba lagi dalam {delay:.1f} detik.")
+            else:
+                if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                    if response.status_code >= 400:
+                        incr('http.error')
+                    return response
+                delay = self._backoff(attempt, response)
+                logger.warning(f"HTTP {response.status_code} pada {params}, mencoba lagi dalam {delay:.1f} detik.")
+                response.close()
+            incr('http.retry')
+            time.sleep(delay)
+            attempt += 1
+
+    def _rekam(self, adm_level_code, kode, body=None, source_path=None):
+        """
+        Menyimpan body respons sebagai fixture di record_dir.
+        """
+        try:
+            os.makedirs(self.record_dir, exist_ok=True)
+            path = os.path.join(self.record_dir, f"{ResponseCache.key(adm_level_code, kode)}.json")
+            if source_path is not None:
+                shutil.copyfile(source_path, path)
+            else:
+                with open(path, 'wb') as f:
+                    f.write(body)
+        except OSError as e:
+            logger.warning(f"Gagal merekam fixture {adm_level_code}={kode}: {e}")
+
+    def _simpan_riwayat(self, entries):
+        """
+        Menyimpan entri ke riwayat; kegagalan hanya dicatat agar fetch tetap berhasil.
+        """
+        try:
+            self.history.simpan(entries)
+        except sqlite3.Error as e:
+            logger.warning(f"Gagal menyimpan riwayat prakiraan: {e}")
+
+    def _indeks_entri(self, adm_level_code, entries, waktu):
+        """
+        Mencatat entri desa dari respons tingkat induk ke indeks adm4.
+        `waktu` adalah waktu epoch data itu diambil dari API.
+        """
+        if adm_level_code == 'adm4':
+            return
+        with self._indeks_lock:
+            for entry in entries:
+                kode = entry.get('lokasi', {}).get('adm4') if isinstance(entry, dict) else None
+                if kode:
+                    self._indeks_adm4[kode] = (waktu, entry)
+                    self._indeks_adm4.move_to_end(kode)
+            while len(self._indeks_adm4) > self.maks_indeks:
+                self._indeks_adm4.popitem(last=False)
+
+    def dari_indeks(self, kode):
+        """
+        Respons berbentuk jawaban adm4 ({'lokasi', 'data': [entri]}) untuk satu desa
+        dari indeks respons induk, atau None jika tidak ada atau sudah basi.
+        """
+        with self._indeks_lock:
+            item = self._indeks_adm4.get(kode)
+        if item is None:
+            return None
+        ttl = self.ttl_indeks if self.ttl_indeks is not None else (self.cache.ttl if self.cache is not None else 3 * 3600)
+        waktu, entry = item
+        if time.time() - waktu >= ttl:
+            return None
+        return {'lokasi': entry.get('lokasi', {}), 'data': [entry]}
+
+    def _sekali_jalan(self, kunci, fn):
+        """
+        Menjalankan fn() untuk `kunci`, kecuali permintaan dengan kunci sama
+        sedang berjalan: pemanggil itu menunggu dan menerima hasil yang sama
+        (objek yang sama, jadi tidak boleh diubah oleh pemanggil).
+        """
+        with self._berjalan_lock:
+            future = self._berjalan.get(kunci)
+            pemimpin = future is None
+            if pemimpin:
+                future = self._berjalan[kunci] = Future()
+        if not pemimpin:
+            incr('fetch.coalesced')
+            return future.result()
+        try:
+            hasil = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(hasil)
+            return hasil
+        finally:
+            with self._berjalan_lock:
+                del self._berjalan[kunci]
+
+    @staticmethod
+    def _header_kondisional(entry):
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def _request_prakiraan(self, adm_level_code, kode, entry):
+        """
+        Mengambil data dari API. Jika ada entri cache, permintaan dikirim secara
+        kondisional (ETag/Last-Modified) dan jawaban 304 memakai body lama;
+        jika body lama ternyata rusak, entri dibuang dan permintaan diulang
+        tanpa header kondisional.
+        """
+        response = self.get({adm_level_code: kode}, headers=self._header_kondisional(entry))
+        if response.status_code == 304 and entry is not None:
+            incr('cache.not_modified')
+            self.cache.touch(entry)
+            try:
+                data = entry.data
+            except (OSError, ValueError) as err:
+                self._buang_cache_rusak(adm_level_code, kode, err)
+                return self._request_prakiraan(adm_level_code, kode, None)
+            if isinstance(data, dict):
+                self._indeks_entri(adm_level_code, data.get('data') or [], time.time())
+            return data
+        response.raise_for_status()
+        with span('json.decode'):
+            data = response.json()
+        if self.record_dir:
+            self._rekam(adm_level_code, kode, response.content)
+        if isinstance(data, dict):
+            self._indeks_entri(adm_level_code, data.get('data') or [], time.time())
+        if self.history is not None and isinstance(data, dict):
+            self._simpan_riwayat(data.get('data') or [])
+        if self.cache is not None:
+            self.cache.put(
+                adm_level_code, kode, response.content,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return data
+
+    def _revalidasi_latar(self, adm_level_code, kode, entry):
+        """
+        Memperbarui entri cache di thread latar belakang (stale-while-revalidate).
+        Hanya satu revalidasi per kunci yang berjalan pada satu waktu.
+        """
+        key = self.cache.key(adm_level_code, kode)
+        with self._revalidasi_lock:
+            if key in self._revalidasi_berjalan:
+                return
+            self._revalidasi_berjalan.add(key)
+
+        def worker():
+            try:
+                self._request_prakiraan(adm_level_code, kode, entry)
+            except (requests.exceptions.RequestException, OSError, ValueError) as err:
+                logger.warning(f"Revalidasi cache {key} gagal: {err}")
+            finally:
+                with self._revalidasi_lock:
+                    self._revalidasi_berjalan.discard(key)
+
+        threading.Thread(target=worker, name=f"revalidasi-{key}", daemon=True).start()
+
+    @timed('fetch')
+    def fetch_prakiraan_cuaca(self, adm_level_code, kode, use_cache=True):
+        """
+        Mengambil data prakiraan cuaca untuk satu wilayah.
+        Respons yang masih segar di cache dikembalikan tanpa akses jaringan,
+        begitu pula desa yang sudah ada di respons induk yang masih segar (lihat
+        dari_indeks); respons basi dalam rentang stale-while-revalidate langsung
+        dikembalikan sementara pembaruan berjalan di latar belakang.
+        Mengembalikan None jika permintaan gagal.
+        """
+        if use_cache and adm_level_code == 'adm4':
+            data = self.dari_indeks(kode)
+            if data is not None:
+                incr('fetch.indeks_induk')
+                return data
+        cache = self.cache if use_cache else None
+        entry = cache.get(adm_level_code, kode) if cache is not None else None
+        if entry is not None:
+            try:
+                if cache.is_fresh(entry):
+                    incr('cache.hit')
+                    data = entry.data
+                    if isinstance(data, dict):
+                        self._indeks_entri(adm_level_code, data.get('data') or [], entry.stored_at)
+                    return data
+                if cache.is_servable_stale(entry):
+                    incr('cache.stale')
+                    data = entry.data
+                    self._revalidasi_latar(adm_level_code, kode, entry)
+                    return data
+            except (OSError, ValueError) as e:
+                logger.warning(f"Entri cache {adm_level_code}={kode} tidak dapat dibaca: {e}")
+                entry = None
+        if cache is not None:
+            incr('cache.miss')
+        return self._sekali_jalan((adm_level_code, kode), lambda: self._ambil_jaringan(adm_level_code, kode, entry))
+
+    def _ambil_jaringan(self, adm_level_code, kode, entry):
+        try:
+            return self._request_prakiraan(adm_level_code, kode, entry)
+        except requests.exceptions.HTTPError as errh:
+            logger.error(f"HTTP Error: {errh}")
+            return None
+        except requests.exceptions.ConnectionError as errc:
+            logger.error(f"Error Connecting: {errc}")
+            return None
+        except requests.exceptions.Timeout as errt:
+            logger.error(f"Timeout Error: {errt}")
+            return None
+        except requests.exceptions.RequestException as err:
+            logger.error(f"OOPS: Something Else: {err}")
+            return None
+
+    def refresh_prakiraan_cuaca(self, adm_level_code, kode):
+        """
+        Memperbarui prakiraan dari API meskipun entri cache masih segar.
+        Jika ada entri cache, permintaan dikirim kondisional sehingga data yang
+        belum berubah cukup dijawab 304. Mengembalikan None jika permintaan gagal.
+        """
+        entry = self.cache.get(adm_level_code, kode) if self.cache is not None else None
+
+        def perbarui():
+            try:
+                return self._request_prakiraan(adm_level_code, kode, entry)
+            except (requests.exceptions.RequestException, OSError, ValueError) as err:
+                logger.error(f"Gagal memperbarui prakiraan {adm_level_code}={kode}: {err}")
+                return None
+        return self._sekali_jalan((adm_level_code, kode), perbarui)
+
+    def _buang_cache_rusak(self, adm_level_code, kode, err):
+        incr('cache.corrupt')
+        logger.warning(f"Entri cache {adm_level_code}={kode} rusak, diambil ulang dari jaringan: {err}")
+        self.cache.hapus(adm_level_code, kode)
+
+    def stream_prakiraan_cuaca(self, adm_level_code, kode, use_cache=True, meta=None):
+        """
+        Menghasilkan entri `data[*]` (satu per lokasi) secara bertahap; lihat
+        _stream_prakiraan_cuaca. Waktu mengunduh dan mem-parse body dicatat
+        sebagai span 'fetch', tanpa waktu pemanggil memproses setiap entri.
+        """
+        return span_iter('fetch', self._stream_prakiraan_cuaca(adm_level_code, kode, use_cache, meta))
+
+    def _stream_prakiraan_cuaca(self, adm_level_code, kode, use_cache=True, meta=None):
+        """
+        Menghasilkan entri `data[*]` (satu per lokasi) secara bertahap selagi
+        respons diterima, sehingga memori puncak sebatas satu lokasi, bukan
+        seluruh payload. Nilai tingkat atas lain (mis. 'lokasi') diisikan ke `meta`.
+        Entri cache yang masih bisa dipakai dibaca bertahap dari disk; respons
+        baru ditulis ke cache sambil di-parse dan baru disimpan jika lengkap.
+        Entri cache yang rusak atau terpotong dibuang lalu diambil ulang dari
+        jaringan, tanpa mengulang lokasi yang sudah dihasilkan.
+        Kesalahan jaringan dicatat dan menghentikan stream.
+        """
+        cache = self.cache if use_cache else None
+        entry = cache.get(adm_level_code, kode) if cache is not None else None
+        terkirim = 0
+        if entry is not None and cache.is_servable_stale(entry):
+            incr('cache.hit' if cache.is_fresh(entry) else 'cache.stale')
+            try:
+                for item in iter_json_array(iter_file(entry.body_path), meta=meta):
+                    terkirim += 1
+                    yield item
+            except (OSError, StreamError) as err:
+                self._buang_cache_rusak(adm_level_code, kode, err)
+                entry = None
+            else:
+                if not cache.is_fresh(entry):
+                    self._revalidasi_latar(adm_level_code, kode, entry)
+                return
+
+        if cache is not None:
+            incr('cache.miss')
+        while True:
+            try:
+                response = self.get({adm_level_code: kode}, headers=self._header_kondisional(entry), stream=True)
+                if response.status_code != 304 or entry is None:
+                    response.raise_for_status()
+                    break
+            except requests.exceptions.RequestException as err:
+                logger.error(f"Gagal mengambil prakiraan {adm_level_code}={kode}: {err}")
+                return
+            incr('cache.not_modified')
+            response.close()
+            cache.touch(entry)
+            try:
+                for item in iter_json_array(iter_file(entry.body_path), meta=meta):
+                    terkirim += 1
+                    yield item
+                return
+            except (OSError, StreamError) as err:
+                # Diminta ulang tanpa header kondisional agar server mengirim body lengkap
+                self._buang_cache_rusak(adm_level_code, kode, err)
+                entry = None
+
+        with response:
+            chunks = response.iter_content(chunk_size=64 * 1024)
+            tmp_path = None
+            if cache is not None:
+                tmp_path = cache.temp_path(adm_level_code, kode)
+            elif self.record_dir:
+                os.makedirs(self.record_dir, exist_ok=True)
+                tmp_path = os.path.join(self.record_dir, f"{ResponseCache.key(adm_level_code, kode)}.json.{os.getpid()}.tmp")
+            tmp_file = open(tmp_path, 'wb') if tmp_path else None
+            lengkap = False
+            antrean_riwayat = []
+
+            def tee(chunks):
+                for chunk in chunks:
+                    if tmp_file is not None:
+                        tmp_file.write(chunk)
+                    yield chunk
+
+            try:
+                body = tee(chunks)
+                for nomor, item in enumerate(iter_json_array(body, meta=meta)):
+                    if self.history is not None:
+                        # Disimpan per kelompok agar memori tetap kecil
+                        antrean_riwayat.append(item)
+                        if len(antrean_riwayat) >= 64:
+                            self._simpan_riwayat(antrean_riwayat)
+                            antrean_riwayat = []
+                    # Lokasi yang sudah dihasilkan dari cache sebelum rusak tidak diulang
+                    if nomor >= terkirim:
+                        yield item
+                for _ in body:
+                    pass  # Sisa body (spasi di akhir) tetap ikut tersimpan
+                lengkap = True
+            except (requests.exceptions.RequestException, StreamError) as err:
+                incr('http.stream_error')
+                logger.error(f"Stream prakiraan {adm_level_code}={kode} terputus: {err}")
+            finally:
+                if antrean_riwayat:
+                    self._simpan_riwayat(antrean_riwayat)
+                if tmp_file is not None:
+                    tmp_file.close()
+                    if lengkap and self.record_dir:
+                        self._rekam(adm_level_code, kode, source_path=tmp_path)
+                    if lengkap and cache is not None:
+                        cache.put_file(
+                            adm_level_code, kode, tmp_path,
+                            etag=response.headers.get('ETag'),
+                            last_modified=response.headers.get('Last-Modified')
+                        )
+                    else:
+                        os.remove(tmp_path)
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def base_url_aktif(base_url=None):
+    """
+    URL endpoint yang dipakai: `base_url`, BMKG_API_BASE_URL, atau API BMKG.
+    """
+    return base_url or os.environ.get('BMKG_API_BASE_URL') or BASE_URL
+
+
+def cache_untuk(cache, base_url):
+    """
+    `cache` untuk respons dari `base_url`: cache itu sendiri untuk API BMKG,
+    atau subdirektori terpisah untuk sumber lain (lihat ResponseCache.untuk_sumber).
+    """
+    if cache is None or base_url == BASE_URL:
+        return cache
+    return cache.untuk_sumber(base_url)
+
+
+def get_default_client():
+    """
+    Klien bersama untuk seluruh proses, dibuat saat pertama kali dibutuhkan.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = BmkgClient(cache=ResponseCache(), history=buka_riwayat_bawaan())
+    return _default_client
+
+
+def set_default_client(client):
+    """
+    Mengganti klien bersama (mis. untuk mengubah timeout, retry atau cache).
+    """
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
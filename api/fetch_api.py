@@ -1,28 +1,20 @@
 
-import requests
 import logging
+from api.client import get_default_client
 
 logger = logging.getLogger(__name__)
 
-def fetch_prakiraan_cuaca(adm_level_code, kode):
+def fetch_prakiraan_cuaca(adm_level_code, kode, use_cache=True):
     """
     Mengambil data prakiraan cuaca dari API BMKG.
+    Memakai klien bersama (lihat api.client) sehingga koneksi, retry dan cache
+    dipakai ulang di setiap panggilan.
     """
-    url = f'https://api.bmkg.go.id/publik/prakiraan-cuaca?{adm_level_code}={kode}'
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        return data
-    except requests.exceptions.HTTPError as errh:
-        logger.error(f"HTTP Error: {errh}")
-        return None
-    except requests.exceptions.ConnectionError as errc:
-        logger.error(f"Error Connecting: {errc}")
-        return None
-    except requests.exceptions.Timeout as errt:
-        logger.error(f"Timeout Error: {errt}")
-        return None
-    except requests.exceptions.RequestException as err:
-        logger.error(f"OOPS: Something Else: {err}")
-        return None
+    return get_default_client().fetch_prakiraan_cuaca(adm_level_code, kode, use_cache=use_cache)
+
+def stream_prakiraan_cuaca(adm_level_code, kode, use_cache=True, meta=None):
+    """
+    Versi streaming dari fetch_prakiraan_cuaca: menghasilkan entri lokasi satu
+    per satu selagi respons diterima. Cocok untuk respons adm1/adm2 yang besar.
+    """
+    return get_default_client().stream_prakiraan_cuaca(adm_level_code, kode, use_cache=use_cache, meta=meta)
@@ -0,0 +1,359 @@
+# api/history.py
+
+import calendar
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from utils.metrics.metrics import incr, timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join('data', 'history', 'prakiraan.sqlite3')
+
+# Naikkan versi ini setiap kali skema berubah.
+SCHEMA_VERSION = 1
+
+SKEMA = """
+CREATE TABLE IF NOT EXISTS kamus (
+    id INTEGER PRIMARY KEY,
+    nilai TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS wilayah (
+    id INTEGER PRIMARY KEY,
+    kode TEXT NOT NULL UNIQUE,
+    lokasi TEXT
+);
+CREATE TABLE IF NOT EXISTS rilis (
+    id INTEGER PRIMARY KEY,
+    wilayah_id INTEGER NOT NULL REFERENCES wilayah(id),
+    analysis_ts INTEGER NOT NULL,
+    fetched_ts INTEGER NOT NULL,
+    offset_menit INTEGER NOT NULL,
+    UNIQUE (wilayah_id, analysis_ts)
+);
+CREATE TABLE IF NOT EXISTS prakiraan (
+    rilis_id INTEGER NOT NULL REFERENCES rilis(id),
+    valid_ts INTEGER NOT NULL,
+    t INTEGER,
+    hu INTEGER,
+    ws REAL,
+    wd INTEGER,
+    tcc INTEGER,
+    tp REAL,
+    weather INTEGER,
+    kondisi INTEGER,
+    PRIMARY KEY (rilis_id, valid_ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rilis_analysis ON rilis (analysis_ts);
+"""
+
+
+@lru_cache(maxsize=4096)
+def epoch_utc(teks):
+    """
+    Detik epoch dari waktu UTC 'YYYY-MM-DDTHH:MM:SS[Z]' atau 'YYYY-MM-DD HH:MM:SS'.
+    """
+    teks = teks.rstrip('Z').replace('T', ' ')
+    return calendar.timegm(datetime.strptime(teks, '%Y-%m-%d %H:%M:%S').timetuple())
+
+
+@lru_cache(maxsize=4096)
+def format_utc(ts, fmt='%Y-%m-%d %H:%M:%S'):
+    """
+    Kebalikan epoch_utc. Di-cache karena waktu berlaku yang sama berulang di setiap wilayah.
+    """
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(fmt)
+
+
+def kode_entri(entry):
+    """
+    Kode wilayah paling rinci dari blok 'lokasi' sebuah entri respons.
+    """
+    lokasi = entry.get('lokasi', {})
+    for adm in ('adm4', 'adm3', 'adm2', 'adm1'):
+        if lokasi.get(adm):
+            return lokasi[adm]
+    return None
+
+
+def batas_prefix(prefix):
+    """
+    Rentang [bawah, atas) kode yang sama dengan `prefix` atau turunannya,
+    sehingga pencarian awalan memakai indeks UNIQUE pada wilayah.kode.
+    """
+    return prefix, prefix + '/'  # '/' tepat setelah '.' dalam urutan ASCII
+
+
+class HistoryStore:
+    """
+    Riwayat prakiraan di SQLite, dikunci dengan (kode wilayah, waktu analisis BMKG).
+
+    Setiap rilis hanya ditambahkan (append-only); rilis yang sama yang diambil
+    ulang diabaikan. Nilai teks berulang (arah angin, deskripsi cuaca) disimpan
+    sebagai id di tabel `kamus`, waktu sebagai detik epoch, dan tabel prakiraan
+    memakai WITHOUT ROWID dengan kunci (rilis, waktu berlaku) sehingga baris
+    satu rilis tersimpan berdekatan dan kueri rentang waktu cukup membaca indeks.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        versi = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if versi not in (0, SCHEMA_VERSION):
+            raise RuntimeError(f"Skema riwayat {path} versi {versi} tidak dikenali")
+        self._conn.executescript(SKEMA)
+        self._conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+        self._muat_kamus()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _muat_kamus(self):
+        self._kamus = dict(self._conn.execute('SELECT nilai, id FROM kamus'))
+        self._kamus_balik = {id_: nilai for nilai, id_ in self._kamus.items()}
+
+    def _id_kamus(self, nilai):
+        if nilai is None:
+            return None
+        id_ = self._kamus.get(nilai)
+        if id_ is None:
+            self._conn.execute('INSERT OR IGNORE INTO kamus (nilai) VALUES (?)', (nilai,))
+            id_ = self._conn.execute('SELECT id FROM kamus WHERE nilai = ?', (nilai,)).fetchone()[0]
+            self._kamus[nilai] = id_
+            self._kamus_balik[id_] = nilai
+        return id_
+
+    def _id_wilayah(self, kode, lokasi):
+        lokasi_json = json.dumps(lokasi, ensure_ascii=False) if lokasi else None
+        self._conn.execute(
+            'INSERT INTO wilayah (kode, lokasi) VALUES (?, ?) '
+            'ON CONFLICT (kode) DO UPDATE SET lokasi = COALESCE(excluded.lokasi, lokasi)',
+            (kode, lokasi_json)
+        )
+        return self._conn.execute('SELECT id FROM wilayah WHERE kode = ?', (kode,)).fetchone()[0]
+
+    def _simpan_entri(self, entry, fetched_ts):
+        kode = kode_entri(entry)
+        forecasts = [forecast for group in entry.get('cuaca', []) for forecast in group]
+        if kode is None or not forecasts or not forecasts[0].get('analysis_date'):
+            return False
+
+        analysis_ts = epoch_utc(forecasts[0]['analysis_date'])
+        offset = 0
+        if forecasts[0].get('local_datetime') and forecasts[0].get('utc_datetime'):
+            offset = (epoch_utc(forecasts[0]['local_datetime']) - epoch_utc(forecasts[0]['utc_datetime'])) // 60
+
+        # Semua nilai diurai dulu agar entri rusak tidak meninggalkan rilis setengah jadi
+        baris = []
+        for forecast in forecasts:
+            waktu = forecast.get('utc_datetime') or forecast.get('datetime')
+            if not waktu:
+                continue
+            baris.append((
+                epoch_utc(waktu), forecast.get('t'), forecast.get('hu'), forecast.get('ws'),
+                self._id_kamus(forecast.get('wd')), forecast.get('tcc'), forecast.get('tp'),
+                forecast.get('weather'), self._id_kamus(forecast.get('weather_desc')),
+            ))
+
+        wilayah_id = self._id_wilayah(kode, entry.get('lokasi'))
+        cursor = self._conn.execute(
+            'INSERT OR IGNORE INTO rilis (wilayah_id, analysis_ts, fetched_ts, offset_menit) VALUES (?, ?, ?, ?)',
+            (wilayah_id, analysis_ts, fetched_ts, offset)
+        )
+        if cursor.rowcount == 0:
+            return False
+        rilis_id = cursor.lastrowid
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO prakiraan VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            ((rilis_id,) + row for row in baris)
+        )
+        return True
+
+    @timed('history.simpan')
+    def simpan(self, entries, fetched_ts=None):
+        """
+        Menyimpan entri respons API (list dari data[*]) dalam satu transaksi.
+        Mengembalikan jumlah rilis baru; rilis yang sudah ada dilewati.
+        """
+        fetched_ts = int(fetched_ts or time.time())
+        baru = 0
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for entry in entries:
+                    try:
+                        baru += self._simpan_entri(entry, fetched_ts)
+                    except (ValueError, TypeError, AttributeError) as e:
+                        logger.warning(f"Entri riwayat {kode_entri(entry)} dilewati: {e}")
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                self._muat_kamus()  # id kamus baru ikut dibatalkan
+                raise
+        incr('history.rilis_baru', baru)
+        return baru
+
+    def _baris_ke_forecast(self, row, offset_menit, analysis_ts):
+        valid_ts, t, hu, ws, wd, tcc, tp, weather, kondisi = row
+        return {
+            'datetime': format_utc(valid_ts, '%Y-%m-%dT%H:%M:%SZ'),
+            'utc_datetime': format_utc(valid_ts),
+            'local_datetime': format_utc(valid_ts + offset_menit * 60),
+            'analysis_date': format_utc(analysis_ts, '%Y-%m-%dT%H:%M:%S'),
+            't': t, 'hu': hu, 'ws': ws, 'wd': self._kamus_balik.get(wd), 'tcc': tcc, 'tp': tp,
+            'weather': weather, 'weather_desc': self._kamus_balik.get(kondisi),
+        }
+
+    @timed('history.rentang')
+    def rentang(self, prefix, mulai=None, selesai=None, level=None):
+        """
+        Rilis terbaru setiap wilayah berkode `prefix` atau turunannya (mis. '11.01'
+        untuk semua kecamatan/desa di kabupaten tersebut), dibatasi waktu berlaku
+        [mulai, selesai) dalam detik epoch. `level` membatasi tingkat adm (1-4).
+        Mengembalikan list entri berbentuk data[*] respons API
+        ({'lokasi': {...}, 'cuaca': [[...]]}), siap untuk agregasi_harian.
+        """
+        bawah, atas = batas_prefix(prefix)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT w.kode, w.lokasi, r.analysis_ts, r.offset_menit, '
+                'p.valid_ts, p.t, p.hu, p.ws, p.wd, p.tcc, p.tp, p.weather, p.kondisi FROM wilayah w '
+                'JOIN rilis r ON r.wilayah_id = w.id AND r.analysis_ts = '
+                '(SELECT MAX(analysis_ts) FROM rilis WHERE wilayah_id = w.id) '
+                'JOIN prakiraan p ON p.rilis_id = r.id AND p.valid_ts >= ? AND p.valid_ts < ? '
+                'WHERE w.kode >= ? AND w.kode < ? '
+                'ORDER BY w.kode, p.valid_ts',
+                (mulai if mulai is not None else -2 ** 62, selesai if selesai is not None else 2 ** 62, bawah, atas)
+            ).fetchall()
+
+        entries = []
+        kode_terakhir = None
+        for kode, lokasi, analysis_ts, offset_menit, *nilai in rows:
+            if level is not None and kode.count('.') + 1 != level:
+                continue
+            if kode != kode_terakhir:
+                kode_terakhir = kode
+                cuaca = []
+                entries.append({'lokasi': json.loads(lokasi) if lokasi else {'adm4': kode}, 'cuaca': [cuaca]})
+            cuaca.append(self._baris_ke_forecast(nilai, offset_menit, analysis_ts))
+        return entries
+
+    def versi(self, kode):
+        """
+        Daftar rilis yang tersimpan untuk satu kode, dari yang terbaru:
+        list dict analysis_ts, fetched_ts dan jumlah baris prakiraan.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT r.analysis_ts, r.fetched_ts, COUNT(p.valid_ts) FROM rilis r '
+                'JOIN wilayah w ON w.id = r.wilayah_id LEFT JOIN prakiraan p ON p.rilis_id = r.id '
+                'WHERE w.kode = ? GROUP BY r.id ORDER BY r.analysis_ts DESC',
+                (kode,)
+            ).fetchall()
+        return [{'analysis_ts': a, 'fetched_ts': f, 'baris': n} for a, f, n in rows]
+
+    def riwayat(self, kode, valid_ts):
+        """
+        Nilai prakiraan untuk satu waktu berlaku menurut setiap rilis yang
+        tersimpan, dari rilis terlama; berguna untuk melihat perubahan prakiraan.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT r.analysis_ts, r.offset_menit, p.valid_ts, p.t, p.hu, p.ws, p.wd, p.tcc, p.tp, p.weather, p.kondisi '
+                'FROM wilayah w JOIN rilis r ON r.wilayah_id = w.id '
+                'JOIN prakiraan p ON p.rilis_id = r.id AND p.valid_ts = ? '
+                'WHERE w.kode = ? ORDER BY r.analysis_ts',
+                (valid_ts, kode)
+            ).fetchall()
+        return [self._baris_ke_forecast(row[2:], row[1], row[0]) for row in rows]
+
+    @timed('history.kompaksi')
+    def kompaksi(self, retensi_hari=None, maks_rilis=None, vacuum=True):
+        """
+        Membuang rilis yang dianalisis lebih dari `retensi_hari` hari lalu dan/atau
+        rilis selain `maks_rilis` terbaru per wilayah, lalu merapikan file
+        (VACUUM). Mengembalikan jumlah rilis yang dihapus.
+        """
+        kondisi = []
+        params = []
+        if retensi_hari is not None:
+            kondisi.append('analysis_ts < ?')
+            params.append(int(time.time() - retensi_hari * 86400))
+        if maks_rilis is not None:
+            kondisi.append(
+                '(SELECT COUNT(*) FROM rilis baru WHERE baru.wilayah_id = rilis.wilayah_id '
+                'AND baru.analysis_ts > rilis.analysis_ts) >= ?'
+            )
+            params.append(maks_rilis)
+        if not kondisi:
+            return 0
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                hapus = [row[0] for row in self._conn.execute(
+                    f"SELECT id FROM rilis WHERE {' OR '.join(kondisi)}", params
+                )]
+                self._conn.executemany('DELETE FROM prakiraan WHERE rilis_id = ?', ((id_,) for id_ in hapus))
+                self._conn.executemany('DELETE FROM rilis WHERE id = ?', ((id_,) for id_ in hapus))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            if vacuum:
+                self._conn.execute('VACUUM')
+            self._conn.execute('PRAGMA optimize')
+        return len(hapus)
+
+    def statistik(self):
+        with self._lock:
+            wilayah, rilis, baris = self._conn.execute(
+                'SELECT (SELECT COUNT(*) FROM wilayah), (SELECT COUNT(*) FROM rilis), (SELECT COUNT(*) FROM prakiraan)'
+            ).fetchone()
+            rentang_analysis = self._conn.execute('SELECT MIN(analysis_ts), MAX(analysis_ts) FROM rilis').fetchone()
+        ukuran = os.path.getsize(self.path) if self.path != ':memory:' and os.path.exists(self.path) else 0
+        return {
+            'wilayah': wilayah, 'rilis': rilis, 'baris': baris, 'bytes': ukuran,
+            'analysis_pertama': rentang_analysis[0], 'analysis_terakhir': rentang_analysis[1],
+        }
+
+
+def buka_riwayat_bawaan():
+    """
+    HistoryStore di lokasi bawaan (atau BMKG_HISTORY_PATH), kecuali riwayat
+    dimatikan dengan BMKG_HISTORY=0. Mengembalikan None jika dimatikan, jika
+    program diarahkan ke sumber selain API BMKG (mis. server tiruan lewat
+    --base-url, agar prakiraan sintetis tidak tercatat sebagai rilis asli),
+    atau jika file riwayat tidak dapat dibuka.
+    """
+    # Diimpor di sini: api.client mengimpor modul ini
+    from api.client import BASE_URL, base_url_aktif
+
+    if os.environ.get('BMKG_HISTORY', '1') == '0':
+        return None
+    if base_url_aktif() != BASE_URL:
+        logger.debug(f"Riwayat prakiraan dimatikan untuk sumber {base_url_aktif()}")
+        return None
+    path = os.environ.get('BMKG_HISTORY_PATH') or DEFAULT_HISTORY_PATH
+    try:
+        return HistoryStore(path)
+    except (sqlite3.Error, OSError, RuntimeError) as e:
+        logger.warning(f"Riwayat prakiraan {path} tidak dapat dibuka: {e}")
+        return None
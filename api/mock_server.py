@@ -0,0 +1,233 @@
+# api/mock_server.py
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from api.cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+API_PATH = '/publik/prakiraan-cuaca'
+
+KONDISI = [
+    (0, 'Cerah', 'Sunny'),
+    (1, 'Cerah Berawan', 'Partly Cloudy'),
+    (3, 'Berawan', 'Mostly Cloudy'),
+    (4, 'Berawan Tebal', 'Overcast'),
+    (61, 'Hujan Ringan', 'Light Rain'),
+    (63, 'Hujan Sedang', 'Rain'),
+    (95, 'Hujan Petir', 'Thunderstorm'),
+]
+ARAH_ANGIN = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+ARAH_BALIK = {'N': 'S', 'NE': 'SW', 'E': 'W', 'SE': 'NW', 'S': 'N', 'SW': 'NE', 'W': 'E', 'NW': 'SE'}
+
+# Zona waktu per kode provinsi; selain yang tercantum memakai WIB
+_WITA = {'51', '52', '53', '63', '64', '65', '71', '72', '73', '74', '75', '76'}
+_WIT = {'81', '82', '91', '92', '93', '94', '95', '96', '97'}
+
+
+def zona_waktu(kode):
+    provinsi = kode.split('.')[0]
+    if provinsi in _WIT:
+        return 'Asia/Jayapura', 9
+    if provinsi in _WITA:
+        return 'Asia/Makassar', 8
+    return 'Asia/Jakarta', 7
+
+
+def info_lokasi(store, kode):
+    """
+    Blok 'lokasi' seperti di respons BMKG untuk satu kode wilayah.
+    """
+    jalur = store.ancestors(kode)
+    nama = [region.name for region in jalur] + ['', '', '', '']
+    kode_jalur = [region.code for region in jalur] + ['', '', '', '']
+    tz_name, _ = zona_waktu(kode)
+    # Koordinat semu tapi stabil per kode
+    h = zlib.crc32(kode.encode())
+    return {
+        'adm1': kode_jalur[0], 'adm2': kode_jalur[1], 'adm3': kode_jalur[2], 'adm4': kode_jalur[3],
+        'provinsi': nama[0], 'kotkab': nama[1], 'kecamatan': nama[2], 'desa': nama[3],
+        'lon': round(95 + (h % 4600) / 100, 4), 'lat': round(-11 + ((h >> 12) % 1700) / 100, 4),
+        'timezone': tz_name,
+        'type': f"adm{len(jalur)}",
+    }
+
+
+def buat_cuaca(kode, hari=3, langkah_per_hari=8, analysis=None):
+    """
+    Prakiraan sintetis per 3 jam untuk satu lokasi, dikelompokkan per hari
+    (list of list) seperti field 'cuaca' pada respons BMKG. Nilainya acak
+    tetapi deterministik untuk kombinasi kode dan tanggal analisis yang sama.
+    """
+    analysis = analysis or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    _, offset = zona_waktu(kode)
+    rng = random.Random(f"{kode}|{analysis.date().isoformat()}")
+    jam_langkah = 24 // langkah_per_hari
+    suhu_dasar = rng.uniform(22, 28)
+    cuaca = []
+    for d in range(hari):
+        grup = []
+        for step in range(langkah_per_hari):
+            utc = analysis + timedelta(hours=d * 24 + step * jam_langkah)
+            local = utc + timedelta(hours=offset)
+            siang = 1 if 9 <= local.hour <= 16 else 0
+            code, desc, desc_en = rng.choice(KONDISI)
+            wd = rng.choice(ARAH_ANGIN)
+            grup.append({
+                'datetime': utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                't': int(round(suhu_dasar + siang * rng.uniform(3, 7) - (1 - siang) * rng.uniform(0, 3))),
+                'tcc': rng.randint(0, 100),
+                'tp': round(rng.uniform(0, 10), 1) if code >= 60 else 0,
+                'weather': code,
+                'weather_desc': desc,
+                'weather_desc_en': desc_en,
+                'wd_deg': ARAH_ANGIN.index(wd) * 45,
+                'wd': wd,
+                'wd_to': ARAH_BALIK[wd],
+                'ws': round(rng.uniform(0.5, 25), 1),
+                'hu': rng.randint(55, 99),
+                'vs': rng.randint(4000, 10000),
+                'vs_text': '> 10 km',
+                'time_index': f"{d * 24 + step * jam_langkah}-{d * 24 + (step + 1) * jam_langkah}",
+                'analysis_date': analysis.strftime('%Y-%m-%dT%H:%M:%S'),
+                'image': f"https://api-apps.bmkg.go.id/storage/icon/cuaca/{desc_en.lower().replace(' ', '%20')}.svg",
+                'utc_datetime': utc.strftime('%Y-%m-%d %H:%M:%S'),
+                'local_datetime': local.strftime('%Y-%m-%d %H:%M:%S'),
+            })
+        cuaca.append(grup)
+    return cuaca
+
+
+def buat_payload(store, kode, hari=3, maks_lokasi=50):
+    """
+    Respons sintetis berbentuk {'lokasi': {...}, 'data': [{'lokasi', 'cuaca'}, ...]}.
+    Untuk adm4 berisi satu lokasi; untuk adm1-adm3 berisi desa turunannya
+    (paling banyak `maks_lokasi`). Mengembalikan None jika kode tidak dikenal.
+    """
+    region = store.get(kode)
+    if region is None:
+        return None
+    lokasi_desa = []
+    tumpukan = [region]
+    while tumpukan and len(lokasi_desa) < maks_lokasi:
+        node = tumpukan.pop()
+        if node.level >= 4:
+            lokasi_desa.append(node.code)
+        else:
+            tumpukan.extend(reversed(store.children(node.code)))
+
+    return {
+        'lokasi': info_lokasi(store, kode),
+        'data': [
+            {'lokasi': info_lokasi(store, desa), 'cuaca': buat_cuaca(desa, hari=hari)}
+            for desa in lokasi_desa
+        ],
+    }
+
+
+class MockBmkgHandler(BaseHTTPRequestHandler):
+    """
+    Handler HTTP yang meniru endpoint prakiraan cuaca BMKG.
+    Konfigurasi diambil dari atribut server (lihat buat_server).
+    """
+    protocol_version = 'HTTP/1.1'
+    # Header dan body ditulis terpisah; tanpa ini Nagle + delayed ACK menahan ~40 ms per respons
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _kirim(self, status, body=b'', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        adm_level_code = next((adm for adm in ('adm4', 'adm3', 'adm2', 'adm1') if adm in query), None)
+        if parsed.path.rstrip('/') != API_PATH or adm_level_code is None:
+            self._kirim(404, b'{"message": "Not Found"}')
+            return
+
+        if server.error_rate and random.random() < server.error_rate:
+            status = random.choice([429, 500, 502, 503])
+            self._kirim(status, b'{"message": "Simulated error"}', {'Retry-After': '1'} if status == 429 else None)
+            return
+
+        kode = query[adm_level_code][0]
+        body = None
+        if server.fixtures_dir:
+            fixture = os.path.join(server.fixtures_dir, f"{ResponseCache.key(adm_level_code, kode)}.json")
+            if os.path.exists(fixture):
+                with open(fixture, 'rb') as f:
+                    body = f.read()
+        if body is None:
+            payload = buat_payload(server.store, kode, hari=server.hari, maks_lokasi=server.maks_lokasi)
+            if payload is None:
+                self._kirim(404, b'{"message": "Kode wilayah tidak ditemukan"}')
+                return
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self._kirim(304, headers={'ETag': etag})
+            return
+        self._kirim(200, body, {'ETag': etag})
+
+    do_HEAD = do_GET
+
+
+def buat_server(store, host='127.0.0.1', port=8080, latency=0.0, jitter=0.0, error_rate=0.0,
+                maks_lokasi=50, hari=3, fixtures_dir=None):
+    """
+    Membuat server tiruan API BMKG.
+    - `latency`/`jitter`: jeda (detik) sebelum setiap jawaban.
+    - `error_rate`: peluang (0-1) menjawab 429/5xx.
+    - `maks_lokasi`/`hari`: ukuran payload sintetis untuk adm1-adm3.
+    - `fixtures_dir`: jika ada file rekaman untuk sebuah kode, file itu yang disajikan.
+    """
+    server = ThreadingHTTPServer((host, port), MockBmkgHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.maks_lokasi = maks_lokasi
+    server.hari = hari
+    server.fixtures_dir = fixtures_dir
+    return server
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{API_PATH}"
+
+
+def mulai_server_latar(store, **kwargs):
+    """
+    Menjalankan server tiruan di thread latar (port 0 = pilih port bebas).
+    Mengembalikan (server, base_url); hentikan dengan server.shutdown().
+    """
+    kwargs.setdefault('port', 0)
+    server = buat_server(store, **kwargs)
+    threading.Thread(target=server.serve_forever, name='mock-bmkg', daemon=True).start()
+    return server, base_url(server)
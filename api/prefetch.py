@@ -0,0 +1,177 @@
+# api/prefetch.py
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from api.bulk import RateLimiter, fetch_bulk
+from api.client import get_default_client
+from utils.loader.region import ADM_CODES
+
+logger = logging.getLogger(__name__)
+
+# Jam (UTC) pembaruan terjadwal, mengikuti langkah 3 jam prakiraan BMKG. TTL
+# cache bawaan juga 3 jam, lebih pendek dari jarak antarputaran ditambah tunda
+# dan jitter; karena itu entri dari daemon disimpan dengan ttl_hangat.
+JAM_PEMBARUAN_UTC = (0, 3, 6, 9, 12, 15, 18, 21)
+
+
+def jadwal_berikutnya(now, jam_utc=JAM_PEMBARUAN_UTC, tunda=15 * 60, jitter=5 * 60):
+    """
+    Waktu epoch pembaruan berikutnya setelah `now`: jam rilis terdekat
+    ditambah `tunda` detik (memberi waktu data baru tersedia) dan jitter acak
+    0..`jitter` detik agar banyak instance tidak menyerang API bersamaan.
+    """
+    hari = int(now) // 86400 * 86400
+    kandidat = sorted(
+        hari + offset_hari * 86400 + jam * 3600 + tunda
+        for offset_hari in (0, 1)
+        for jam in jam_utc
+    )
+    target = next(t for t in kandidat if t > now)
+    return target + random.uniform(0, jitter)
+
+
+def ttl_hangat(jam_utc=JAM_PEMBARUAN_UTC, tunda=15 * 60, jitter=5 * 60, cadangan=15 * 60):
+    """
+    TTL (detik) untuk entri cache yang dihangatkan daemon: celah terpanjang
+    antara dua jam jadwal, ditambah `tunda`, `jitter`, dan `cadangan` untuk
+    lama satu putaran. Dengan TTL ini entri baru basi setelah putaran
+    berikutnya sempat memperbaruinya.
+    """
+    jam = sorted(set(jam_utc))
+    celah = max((b - a) % 24 or 24 for a, b in zip(jam, jam[1:] + jam[:1]))
+    return celah * 3600 + tunda + jitter + cadangan
+
+
+def kumpulkan_target(store, codes, kedalaman=1):
+    """
+    Wilayah yang perlu dihangatkan: setiap kode beserta turunannya sampai
+    `kedalaman` tingkat di bawahnya (0 = kode itu saja). Kode yang tidak
+    dikenal memunculkan KeyError.
+    """
+    hasil = []
+    terlihat = set()
+    for code in codes:
+        region = store.get(code)
+        if region is None:
+            raise KeyError(code)
+        tingkat = [region]
+        for _ in range(kedalaman + 1):
+            for node in tingkat:
+                if node.code not in terlihat:
+                    terlihat.add(node.code)
+                    hasil.append(node)
+            tingkat = [anak for node in tingkat for anak in store.children(node.code)]
+            if not tingkat:
+                break
+    return hasil
+
+
+class PrefetchDaemon:
+    """
+    Memperbarui prakiraan sekumpulan wilayah secara berkala, mengikuti jam
+    rilis (lihat jadwal_berikutnya), dengan batas konkurensi dan laju.
+    Hasil masuk ke cache respons (dan riwayat) klien, sehingga pencarian
+    interaktif maupun CLI dilayani dari penyimpanan lokal.
+    """
+
+    def __init__(self, regions, client=None, concurrency=4, rate=2.0,
+                 jam_utc=JAM_PEMBARUAN_UTC, tunda=15 * 60, jitter=5 * 60):
+        self.regions = regions
+        self.client = client or get_default_client()
+        self.concurrency = concurrency
+        self.rate = rate
+        self.jam_utc = jam_utc
+        self.tunda = tunda
+        self.jitter = jitter
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def jalankan_sekali(self):
+        """
+        Satu putaran pembaruan. Mengembalikan (berhasil, gagal).
+        """
+        start = time.monotonic()
+        berhasil = gagal = 0
+        hasil = fetch_bulk(self.regions, client=self.client, concurrency=self.concurrency,
+                           rate=self.rate, refresh=True)
+        for _, data in hasil:
+            if data is None:
+                gagal += 1
+            else:
+                berhasil += 1
+            if self._stop.is_set():
+                hasil.close()
+                break
+        logger.info(f"Prefetch selesai: {berhasil} berhasil, {gagal} gagal dalam {time.monotonic() - start:.1f} detik.")
+        return berhasil, gagal
+
+    def jalankan(self, segera=True):
+        """
+        Berjalan sampai stop() dipanggil (atau KeyboardInterrupt).
+        Dengan `segera`, putaran pertama dijalankan tanpa menunggu jadwal.
+        """
+        if segera:
+            self.jalankan_sekali()
+        while not self._stop.is_set():
+            berikutnya = jadwal_berikutnya(time.time(), self.jam_utc, self.tunda, self.jitter)
+            logger.info(f"Pembaruan berikutnya: {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(berikutnya))}")
+            if self._stop.wait(max(0.0, berikutnya - time.time())):
+                break
+            self.jalankan_sekali()
+
+
+class PrefetchSpekulatif:
+    """
+    Mengambil prakiraan anak-anak wilayah yang baru dipilih di latar belakang,
+    selagi pengguna masih membaca tabel, agar pilihan berikutnya langsung
+    dilayani dari cache. Permintaan yang belum berjalan dibatalkan begitu
+    pengguna berpindah wilayah.
+
+    Hanya wilayah setingkat `tingkat_min` ke bawah (bawaan: kecamatan dan
+    desa) yang diambil; respons kabupaten memuat ratusan desa sehingga
+    menebak semua kabupaten sebuah provinsi terlalu mahal untuk spekulasi.
+    """
+
+    def __init__(self, client=None, workers=2, rate=4.0, maks_anak=40, tingkat_min=3):
+        self.client = client
+        self.maks_anak = maks_anak
+        self.tingkat_min = tingkat_min
+        self._limiter = RateLimiter(rate) if rate else None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self._futures = []
+
+    def _ambil(self, region):
+        if self._limiter is not None:
+            self._limiter.acquire()
+        client = self.client or get_default_client()
+        adm_level_code = ADM_CODES[region.level]
+        try:
+            entry = client.cache.get(adm_level_code, region.code) if client.cache is not None else None
+            if entry is not None and client.cache.is_fresh(entry):
+                return
+            client.fetch_prakiraan_cuaca(adm_level_code, region.code)
+        except Exception as e:
+            logger.debug(f"Prefetch {region.code} gagal: {e}")
+
+    def mulai(self, regions):
+        """
+        Mengganti antrean prefetch dengan `regions` (paling banyak maks_anak);
+        wilayah di atas `tingkat_min` dilewati.
+        """
+        self.batalkan()
+        regions = [region for region in regions if region.level >= self.tingkat_min]
+        self._futures = [self._executor.submit(self._ambil, region) for region in regions[:self.maks_anak]]
+
+    def batalkan(self):
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+
+    def tutup(self):
+        self.batalkan()
+        self._executor.shutdown(wait=False)
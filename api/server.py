@@ -0,0 +1,255 @@
+# api/server.py
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+from api.cache import ResponseCache
+from api.client import BmkgClient
+from api.history import buka_riwayat_bawaan
+from utils.metrics.metrics import incr, metrics, span
+from utils.loader.region import ADM_CODES, LEVELS
+from utils.search.search import cari_wilayah
+from utils.session.session import ringkasan_prakiraan
+
+logger = logging.getLogger(__name__)
+
+ALASAN = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+          431: 'Request Header Fields Too Large', 500: 'Internal Server Error', 502: 'Bad Gateway'}
+MAKS_HASIL_PENCARIAN = 100
+
+
+def info_wilayah(region):
+    return {'kode': region.code, 'nama': region.name, 'tingkat': ADM_CODES[region.level]}
+
+
+class ApiServer:
+    """
+    Layanan HTTP asyncio di atas RegionStore yang dimuat sekali:
+
+    - GET /regions                      daftar provinsi
+    - GET /regions/{kode}               info wilayah beserta jalurnya
+    - GET /regions/{kode}/children      anak langsung, urut nama
+    - GET /search?q=...&limit=&level=   pencarian nama (level boleh diulang)
+    - GET /forecast/{kode}?daily=1      ringkasan harian; daily=0 = respons API mentah
+    - GET /health, GET /metrics         status dan metrik (format Prometheus)
+
+    Permintaan ke API BMKG berjalan di thread pool lewat satu BmkgClient
+    (pool koneksi, cache respons, penggabungan permintaan). Ringkasan harian
+    disimpan di LRU dalam memori selama `ttl` detik; permintaan untuk kode yang
+    sedang dihitung menunggu hasil yang sama alih-alih menghitung ulang.
+    """
+
+    def __init__(self, store, index, client=None, workers=8, cache_size=1024, ttl=15 * 60, idle_timeout=15):
+        self.store = store
+        self.index = index
+        self.client = client or BmkgClient(cache=ResponseCache(), pool_maxsize=workers, history=buka_riwayat_bawaan())
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upstream')
+        self._harian = OrderedDict()  # kode -> (waktu monotonic, hasil)
+        self._berjalan = {}           # kode -> asyncio.Future ringkasan yang sedang dihitung
+
+    def tutup(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
+
+    # --- Endpoint -----------------------------------------------------------------
+
+    def _regions(self, bagian):
+        if not bagian:
+            return 200, {'anak': [{'kode': code, 'nama': name, 'tingkat': 'adm1'} for code, name in self.store.opsi()]}
+        region = self.store.get(bagian[0])
+        if region is None or len(bagian) > 2 or (len(bagian) == 2 and bagian[1] != 'children'):
+            return 404, {'error': 'Wilayah tidak ditemukan'}
+        if len(bagian) == 1:
+            hasil = info_wilayah(region)
+            hasil['jalur'] = [info_wilayah(item) for item in self.store.ancestors(region.code)[:-1]]
+            return 200, hasil
+        tingkat = ADM_CODES.get(region.level + 1)
+        hasil = info_wilayah(region)
+        hasil['anak'] = [{'kode': code, 'nama': name, 'tingkat': tingkat} for code, name in self.store.opsi(region.code)]
+        return 200, hasil
+
+    def _search(self, query):
+        q = (query.get('q') or [''])[0].strip()
+        if not q:
+            return 400, {'error': "Parameter q wajib diisi"}
+        try:
+            limit = min(MAKS_HASIL_PENCARIAN, max(1, int((query.get('limit') or ['10'])[0])))
+            levels = {LEVELS[level] for item in query.get('level', []) for level in item.split(',') if level} or None
+        except (ValueError, KeyError):
+            return 400, {'error': "limit harus bilangan bulat dan level salah satu dari adm1-adm4"}
+        return 200, {'q': q, 'hasil': cari_wilayah(self.store, self.index, q, limit=limit, levels=levels)}
+
+    async def _prakiraan_harian(self, region):
+        """
+        Ringkasan harian dari LRU, dari perhitungan yang sedang berjalan, atau
+        dihitung di thread pool. Mengembalikan (hasil atau None, status cache).
+        """
+        item = self._harian.get(region.code)
+        if item is not None and time.monotonic() - item[0] < self.ttl:
+            self._harian.move_to_end(region.code)
+            incr('server.forecast.hit')
+            return item[1], 'hit'
+
+        future = self._berjalan.get(region.code)
+        if future is not None:
+            incr('server.forecast.coalesced')
+            return await asyncio.shield(future), 'coalesced'
+
+        incr('server.forecast.miss')
+        loop = asyncio.get_running_loop()
+        future = self._berjalan[region.code] = loop.create_future()
+        hasil = None
+        try:
+            lokasi_info, harian = await loop.run_in_executor(self._executor, ringkasan_prakiraan, region, True, self.client)
+            if lokasi_info is not None:
+                hasil = info_wilayah(region)
+                hasil.update({'lokasi': lokasi_info, 'harian': harian})
+                self._harian[region.code] = (time.monotonic(), hasil)
+                self._harian.move_to_end(region.code)
+                while len(self._harian) > self.cache_size:
+                    self._harian.popitem(last=False)
+        except Exception:
+            logger.exception(f"Gagal menghitung prakiraan {region.code}")
+        finally:
+            del self._berjalan[region.code]
+            future.set_result(hasil)
+        return hasil, 'miss'
+
+    async def _forecast(self, bagian, query):
+        region = self.store.get(bagian[0]) if len(bagian) == 1 else None
+        if region is None:
+            return 404, {'error': 'Wilayah tidak ditemukan'}, None
+        if (query.get('daily') or ['1'])[0] in ('0', 'false'):
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(
+                self._executor, self.client.fetch_prakiraan_cuaca, ADM_CODES[region.level], region.code
+            )
+            if data is None:
+                return 502, {'error': 'Prakiraan tidak tersedia dari API BMKG'}, None
+            return 200, data, None
+        hasil, status_cache = await self._prakiraan_harian(region)
+        if hasil is None:
+            return 502, {'error': 'Prakiraan tidak tersedia dari API BMKG'}, None
+        return 200, hasil, {'X-Cache': status_cache}
+
+    async def proses(self, method, target):
+        """
+        Menjawab satu permintaan. Mengembalikan (status, payload, header tambahan).
+        """
+        if method not in ('GET', 'HEAD'):
+            return 405, {'error': 'Hanya GET yang didukung'}, None
+        url = urlsplit(target)
+        bagian = [unquote(item) for item in url.path.split('/') if item]
+        query = parse_qs(url.query)
+        if not bagian:
+            return 404, {'error': 'Tidak ditemukan'}, None
+        if bagian[0] == 'regions':
+            return (*self._regions(bagian[1:]), None)
+        if bagian[0] == 'search' and len(bagian) == 1:
+            return (*self._search(query), None)
+        if bagian[0] == 'forecast' and len(bagian) > 1:
+            return await self._forecast(bagian[1:], query)
+        if bagian[0] == 'health' and len(bagian) == 1:
+            return 200, {'status': 'ok', 'wilayah': len(self.store), 'cache_harian': len(self._harian)}, None
+        if bagian[0] == 'metrics' and len(bagian) == 1:
+            return 200, metrics.ke_prometheus(), {'Content-Type': 'text/plain; version=0.0.4'}
+        return 404, {'error': 'Tidak ditemukan'}, None
+
+    # --- HTTP/1.1 -----------------------------------------------------------------
+
+    @staticmethod
+    def _respons(status, payload, headers=None, head=False):
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        baris = [f"HTTP/1.1 {status} {ALASAN.get(status, '')}",
+                 'Content-Type: application/json; charset=utf-8',
+                 f"Content-Length: {len(body)}"]
+        for name, value in (headers or {}).items():
+            if name == 'Content-Type':
+                baris[1] = f"Content-Type: {value}"
+            else:
+                baris.append(f"{name}: {value}")
+        kepala = ('\r\n'.join(baris) + '\r\n\r\n').encode('latin-1')
+        # Header dan body dalam satu write agar tidak tertahan Nagle/delayed ACK
+        return kepala if head else kepala + body
+
+    async def layani(self, reader, writer):
+        """
+        Menangani satu koneksi: beberapa permintaan berurutan (keep-alive)
+        sampai klien menutup koneksi, meminta Connection: close, atau diam
+        lebih lama dari idle_timeout.
+        """
+        try:
+            while True:
+                try:
+                    kepala = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.idle_timeout)
+                except asyncio.LimitOverrunError:
+                    writer.write(self._respons(431, {'error': 'Header terlalu besar'}, {'Connection': 'close'}))
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+
+                baris = kepala.decode('latin-1').split('\r\n')
+                try:
+                    method, target, versi = baris[0].split(' ')
+                except ValueError:
+                    writer.write(self._respons(400, {'error': 'Baris permintaan tidak valid'}, {'Connection': 'close'}))
+                    break
+                headers = {}
+                for item in baris[1:]:
+                    if ':' in item:
+                        name, value = item.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                if headers.get('content-length', '0').isdigit() and int(headers.get('content-length', '0')):
+                    await reader.readexactly(int(headers['content-length']))
+                koneksi = headers.get('connection', '').lower()
+                keep_alive = koneksi != 'close' if versi == 'HTTP/1.1' else koneksi == 'keep-alive'
+
+                start = time.perf_counter()
+                try:
+                    with span('server.request'):
+                        status, payload, extra = await self.proses(method, target)
+                except Exception:
+                    logger.exception(f"Kesalahan saat menangani {method} {target}")
+                    status, payload, extra = 500, {'error': 'Kesalahan internal'}, None
+                incr(f"server.status.{status}")
+                extra = dict(extra or {})
+                if not keep_alive:
+                    extra['Connection'] = 'close'
+                writer.write(self._respons(status, payload, extra, head=method == 'HEAD'))
+                await writer.drain()
+                logger.debug(f"{method} {target} {status} {(time.perf_counter() - start) * 1000:.1f} ms")
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host='127.0.0.1', port=8000, siap=None):
+        """
+        Menjalankan server sampai dibatalkan. `siap(host, port)` dipanggil
+        setelah socket terbuka (berguna untuk port 0).
+        """
+        server = await asyncio.start_server(self.layani, host, port, limit=16 * 1024)
+        host, port = server.sockets[0].getsockname()[:2]
+        if siap is not None:
+            siap(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.tutup()
@@ -0,0 +1,132 @@
+# api/stream.py
+
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+_KARAKTER_ANGKA = '0123456789.eE+-'
+
+
+class StreamError(ValueError):
+    """
+    JSON dari stream tidak sesuai bentuk yang diharapkan atau terpotong.
+    """
+
+
+class _JsonStream:
+    """
+    Buffer teks di atas iterator potongan bytes. Nilai JSON dibaca satu per satu
+    dengan json.JSONDecoder.raw_decode; jika nilai belum lengkap, potongan
+    berikutnya ditambahkan lalu pembacaan diulang.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self._decoder.decode(b'', final=True)
+        else:
+            text = self._decoder.decode(chunk)
+        # Buang bagian yang sudah dibaca agar buffer tetap sebesar satu nilai
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise StreamError(f"Diharapkan {char!r} tetapi ditemukan {found or 'akhir stream'!r}")
+        self.pos += 1
+
+    def value(self):
+        if not self.peek():
+            raise StreamError("Stream berakhir sebelum nilai JSON lengkap")
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise StreamError(f"JSON tidak valid atau terpotong: {e}") from e
+            # Angka di ujung buffer (mis. '6.' dari '6.5e3') mungkin masih
+            # berlanjut di potongan berikutnya
+            lanjut = end
+            while lanjut < len(self.buf) and self.buf[lanjut] in _KARAKTER_ANGKA:
+                lanjut += 1
+            if lanjut == len(self.buf) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks, key='data', meta=None):
+    """
+    Membaca objek JSON tingkat atas dari potongan bytes dan menghasilkan elemen
+    array `key` satu per satu begitu elemen tersebut lengkap, tanpa menunggu
+    seluruh body diterima. Nilai kunci tingkat atas lainnya (mis. 'lokasi')
+    disimpan ke dict `meta` jika diberikan.
+    """
+    stream = _JsonStream(chunks)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        name = stream.value()
+        stream.expect(':')
+        if name == key and stream.peek() == '[':
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.pos += 1
+            else:
+                while True:
+                    yield stream.value()
+                    separator = stream.peek()
+                    stream.pos += 1
+                    if not separator:
+                        raise StreamError("Stream berakhir sebelum array selesai")
+                    if separator == ']':
+                        break
+                    if separator != ',':
+                        raise StreamError(f"Pemisah array tidak valid: {separator!r}")
+        else:
+            value = stream.value()
+            if meta is not None:
+                meta[name] = value
+
+        separator = stream.peek()
+        stream.pos += 1
+        if not separator:
+            raise StreamError("Stream berakhir sebelum objek selesai")
+        if separator == '}':
+            return
+        if separator != ',':
+            raise StreamError(f"Pemisah objek tidak valid: {separator!r}")
+
+
+def iter_file(path, chunk_size=64 * 1024):
+    """
+    Potongan bytes dari sebuah file, untuk dipakai bersama iter_json_array.
+    """
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            yield chunk
@@ -0,0 +1,269 @@
+# benchmarks/bench.py
+"""
+Benchmark jalur utama: pemuatan wilayah, pencarian hierarki, parsing respons,
+agregasi harian dan fetch ke server tiruan lokal.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench --output hasil.json
+Bandingkan beberapa file hasil untuk melihat regresi dari waktu ke waktu.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from api.bulk import fetch_bulk, kumpulkan_turunan
+from api.client import BmkgClient
+from api.mock_server import buat_payload, mulai_server_latar
+from api.stream import iter_json_array
+from utils.aggregation import aggregation
+from utils.aggregation.aggregation import agregasi_harian
+from utils.loader.lazy_loader import load_wilayah_lazy
+from utils.loader.loader import load_wilayah_from_csv
+
+DATA_WILAYAH = 'data/base.csv'
+
+
+def ukur(fn, repeat=5, setup=None):
+    """
+    Menjalankan fn sebanyak `repeat` kali dan mengembalikan statistik waktunya (detik).
+    `setup` dipanggil sebelum setiap putaran dan tidak ikut diukur.
+    Satu putaran pemanasan dijalankan lebih dulu tanpa dicatat.
+    """
+    if setup is not None:
+        setup()
+    fn()
+    waktu = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        waktu.append(time.perf_counter() - start)
+    return {
+        'min_s': min(waktu),
+        'median_s': statistics.median(waktu),
+        'max_s': max(waktu),
+        'repeat': repeat,
+    }
+
+
+def puncak_memori(fn, setup=None):
+    """
+    Memori puncak (bytes) yang dialokasikan selama fn berjalan, via tracemalloc.
+    """
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_pemuatan(csv_path, repeat):
+    """
+    Pemuatan wilayah dingin (parse CSV), hangat (snapshot) dan lazy.
+    Snapshot ditulis ke salinan CSV di folder sementara agar cache asli tidak tersentuh.
+    """
+    folder = tempfile.mkdtemp(prefix='bench-wilayah-')
+    salinan = os.path.join(folder, 'base.csv')
+    shutil.copyfile(csv_path, salinan)
+    cache_dir = os.path.join(folder, '.cache')
+
+    def hapus_snapshot():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    try:
+        hasil = {}
+        dingin = lambda: load_wilayah_from_csv(salinan, use_snapshot=False)
+        hasil['eager_cold'] = ukur(dingin, repeat)
+        hasil['eager_cold']['peak_bytes'] = puncak_memori(dingin)
+
+        hangat = lambda: load_wilayah_from_csv(salinan)
+        hangat()  # tulis snapshot
+        hasil['eager_warm'] = ukur(hangat, repeat)
+        hasil['eager_warm']['peak_bytes'] = puncak_memori(hangat)
+
+        lazy = lambda: load_wilayah_lazy(salinan)
+        hasil['lazy_cold'] = ukur(lazy, repeat, setup=hapus_snapshot)
+        hasil['lazy_cold']['peak_bytes'] = puncak_memori(lazy, setup=hapus_snapshot)
+        lazy()
+        hasil['lazy_warm'] = ukur(lazy, repeat)
+        hasil['lazy_warm']['peak_bytes'] = puncak_memori(lazy)
+
+        def lazy_satu_desa():
+            load_wilayah_lazy(salinan).get('11.01.02.2005')
+        hasil['lazy_warm_resolve_adm4'] = ukur(lazy_satu_desa, repeat)
+        return hasil
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_hierarki(store, n_lookup=20000):
+    """
+    Throughput pencarian kode, daftar anak dan pembuatan opsi menu.
+    """
+    rng = random.Random(0)
+    desa = [code for code, level in zip(store.codes, store.levels) if level == 4]
+    sampel = [rng.choice(desa) for _ in range(n_lookup)]
+    induk = [code for code, level in zip(store.codes, store.levels) if level < 4]
+    sampel_induk = [rng.choice(induk) for _ in range(n_lookup // 10)]
+
+    hasil = {}
+    start = time.perf_counter()
+    for code in sampel:
+        store.get(code)
+    durasi = time.perf_counter() - start
+    hasil['get_by_code'] = {'ops': n_lookup, 'seconds': durasi, 'ops_per_s': n_lookup / durasi}
+
+    start = time.perf_counter()
+    for code in sampel:
+        store.ancestors(code)
+    durasi = time.perf_counter() - start
+    hasil['ancestors'] = {'ops': n_lookup, 'seconds': durasi, 'ops_per_s': n_lookup / durasi}
+
+    # Opsi menu yang diminta pilih_wilayah_dinamis di setiap tingkat
+    start = time.perf_counter()
+    for code in sampel_induk:
+        store.opsi(code)
+    durasi = time.perf_counter() - start
+    hasil['menu_options'] = {'ops': len(sampel_induk), 'seconds': durasi, 'ops_per_s': len(sampel_induk) / durasi}
+    return hasil
+
+
+def _payload_sintetis(store, n_lokasi):
+    payload = buat_payload(store, '32', maks_lokasi=n_lokasi)
+    return payload['data']
+
+
+def bench_agregasi(store, ukuran, repeat):
+    """
+    Throughput agregasi harian untuk payload sintetis berukuran makin besar.
+    """
+    hasil = {}
+    for n_lokasi in ukuran:
+        entries = _payload_sintetis(store, n_lokasi)
+        n_record = sum(len(grup) for entry in entries for grup in entry['cuaca'])
+        waktu = ukur(lambda: agregasi_harian(entries), repeat)
+        waktu['records_per_s'] = n_record / waktu['median_s']
+        hasil[str(n_lokasi)] = {'lokasi': len(entries), 'records': n_record, **waktu}
+    return hasil
+
+
+def bench_parsing(store, n_lokasi, repeat):
+    """
+    json.loads seluruh body dibanding parsing bertahap per lokasi:
+    waktu dan memori puncak.
+    """
+    body = json.dumps(buat_payload(store, '32', maks_lokasi=n_lokasi)).encode('utf-8')
+    chunks = [body[i:i + 65536] for i in range(0, len(body), 65536)]
+
+    def penuh():
+        aggregation.agregasi_harian(json.loads(body)['data'])
+
+    def stream():
+        aggregation.agregasi_stream(iter_json_array(chunks))
+
+    hasil = {'body_bytes': len(body), 'lokasi': n_lokasi}
+    for nama, fn in (('json_loads', penuh), ('streaming', stream)):
+        hasil[nama] = ukur(fn, repeat)
+        hasil[nama]['peak_bytes'] = puncak_memori(fn)
+    return hasil
+
+
+def bench_fetch(store, n_request, concurrency, latency):
+    """
+    Throughput fetch ke server tiruan lokal: berurutan dan paralel, tanpa cache.
+    """
+    server, url = mulai_server_latar(store, latency=latency)
+    try:
+        regions = kumpulkan_turunan(store, '32.73', 4)[:n_request]
+        hasil = {'requests': len(regions), 'server_latency_s': latency}
+
+        with BmkgClient(base_url=url, cache=None) as client:
+            start = time.perf_counter()
+            for region in regions:
+                client.fetch_prakiraan_cuaca('adm4', region.code, use_cache=False)
+            durasi = time.perf_counter() - start
+        hasil['sequential'] = {'seconds': durasi, 'requests_per_s': len(regions) / durasi}
+
+        with BmkgClient(base_url=url, cache=None, pool_maxsize=concurrency) as client:
+            start = time.perf_counter()
+            for _ in fetch_bulk(regions, client=client, concurrency=concurrency, rate=None, use_cache=False):
+                pass
+            durasi = time.perf_counter() - start
+        hasil['concurrent'] = {'seconds': durasi, 'requests_per_s': len(regions) / durasi, 'concurrency': concurrency}
+        return hasil
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark prakiraan_cuaca_bmkg_cli.")
+    parser.add_argument('--output', help="Tulis hasil JSON ke file ini")
+    parser.add_argument('--repeat', type=int, default=5, help="Jumlah pengulangan per pengukuran")
+    parser.add_argument('--quick', action='store_true', help="Ukuran kecil untuk pemeriksaan cepat")
+    parser.add_argument('--skip', action='append', default=[],
+                        choices=['load', 'lookup', 'aggregation', 'parsing', 'fetch'])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+
+    repeat = 2 if args.quick else args.repeat
+    store = load_wilayah_from_csv(DATA_WILAYAH)
+    hasil = {}
+
+    langkah = [
+        ('load', lambda: bench_pemuatan(DATA_WILAYAH, repeat)),
+        ('lookup', lambda: bench_hierarki(store, 2000 if args.quick else 20000)),
+        ('aggregation', lambda: bench_agregasi(store, [1, 10, 100] if args.quick else [1, 10, 100, 1000], repeat)),
+        ('parsing', lambda: bench_parsing(store, 100 if args.quick else 1000, repeat)),
+        ('fetch', lambda: bench_fetch(store, 50 if args.quick else 300, 16, 0.005)),
+    ]
+    for nama, fn in langkah:
+        if nama in args.skip:
+            continue
+        print(f"[bench] {nama}...", file=sys.stderr)
+        hasil[nama] = fn()
+
+    laporan = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'git_commit': _git_commit(),
+            'repeat': repeat,
+        },
+        'results': hasil,
+    }
+    teks = json.dumps(laporan, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(teks + '\n')
+    print(teks)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# benchmarks/importtime.py
+"""
+Anggaran waktu impor untuk mode non-interaktif (perintah dengan --json).
+
+Setiap skenario dijalankan sebagai proses baru dengan `python -X importtime`.
+Yang dihitung hanya impor milik program: modul yang sudah diimpor oleh
+interpreter kosong (site, encodings, .pth lingkungan) dikurangkan. Selain
+batas waktu, skenario juga gagal jika memuat modul yang seharusnya ditunda
+(rich, tabulate, dan requests bila jawaban datang dari cache).
+
+Jalankan dari root repo:
+    python -m benchmarks.importtime
+Kode keluar 1 jika ada skenario yang melewati anggaran. Di mesin lambat
+anggaran bisa dilonggarkan dengan --faktor.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from api.mock_server import mulai_server_latar
+from utils.loader.lazy_loader import load_wilayah_lazy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_WILAYAH = os.path.join(ROOT, 'data', 'base.csv')
+KODE_DESA = '11.01.01.2001'
+
+# (nama, argumen main.py, anggaran median dalam ms, modul yang tidak boleh dimuat).
+# Hanya skenario jaringan yang boleh memuat requests (sekitar 100 ms sendiri).
+SKENARIO = [
+    ('search', ['search', 'pulo kambing', '--json'], 60.0, ('rich', 'tabulate', 'requests')),
+    ('forecast-cache', ['forecast', KODE_DESA, '--json'], 60.0, ('rich', 'tabulate', 'requests')),
+    ('forecast-network', ['forecast', KODE_DESA, '--json', '--no-cache'], 200.0, ('rich', 'tabulate')),
+]
+
+
+def parse_importtime(stderr):
+    """
+    List (modul, kumulatif_us, kedalaman) dari keluaran -X importtime.
+    Kedalaman 0 berarti diimpor langsung, bukan sebagai bagian modul lain.
+    """
+    hasil = []
+    for baris in stderr.splitlines():
+        if not baris.startswith('import time:') or 'cumulative' in baris:
+            continue
+        _, kumulatif, nama = baris.split('|', 2)
+        nama_bersih = nama.lstrip()
+        kedalaman = (len(nama) - len(nama_bersih) - 1) // 2
+        hasil.append((nama_bersih.strip(), int(kumulatif), kedalaman))
+    return hasil
+
+
+def jalankan(args, cwd, env):
+    proses = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.join(ROOT, 'main.py')] + args,
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if proses.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(args)} gagal ({proses.returncode}): {proses.stderr[-500:]}")
+    return parse_importtime(proses.stderr)
+
+
+def modul_interpreter(env):
+    """
+    Modul tingkat atas yang sudah diimpor oleh interpreter tanpa program.
+    """
+    proses = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'pass'],
+                            env=env, capture_output=True, text=True)
+    return {nama for nama, _, kedalaman in parse_importtime(proses.stderr) if kedalaman == 0}
+
+
+def ukur_skenario(args, terlarang, cwd, env, dasar, runs):
+    waktu = []
+    for _ in range(runs):
+        impor = jalankan(args, cwd, env)
+        waktu.append(sum(us for nama, us, kedalaman in impor if kedalaman == 0 and nama not in dasar) / 1000)
+    dimuat = {nama.split('.')[0] for nama, _, _ in impor}
+    teratas = sorted(((us / 1000, nama) for nama, us, kedalaman in impor if kedalaman == 0 and nama not in dasar), reverse=True)
+    return {
+        'median_ms': statistics.median(waktu),
+        'min_ms': min(waktu),
+        'max_ms': max(waktu),
+        'terlarang': sorted(dimuat & set(terlarang)),
+        'teratas': [{'modul': nama, 'ms': round(ms, 2)} for ms, nama in teratas[:5]],
+    }
+
+
+def siapkan_direktori(tmp):
+    """
+    Direktori kerja sementara dengan data/base.csv asli dan cache kosong,
+    agar pengukuran tidak mengubah cache respons maupun riwayat pengguna.
+    """
+    os.makedirs(os.path.join(tmp, 'data'))
+    shutil.copy2(DATA_WILAYAH, os.path.join(tmp, 'data', 'base.csv'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Periksa anggaran waktu impor mode non-interaktif.")
+    parser.add_argument('--faktor', type=float, default=1.0, help="Pengali anggaran setiap skenario (bawaan: 1)")
+    parser.add_argument('--runs', type=int, default=5, help="Jumlah proses per skenario (bawaan: 5)")
+    parser.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    # Bytecode harus boleh ditulis, kalau tidak setiap proses mengompilasi ulang semua modul
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['BMKG_HISTORY'] = '0'
+    dasar = modul_interpreter(env)
+
+    server, url = mulai_server_latar(load_wilayah_lazy(DATA_WILAYAH), maks_lokasi=1)
+    env['BMKG_API_BASE_URL'] = url
+    hasil = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix='bmkg-importtime-') as tmp:
+            siapkan_direktori(tmp)
+            # Pemanasan: bytecode, snapshot wilayah/indeks dan cache respons terisi
+            for _, skenario_args, _, _ in SKENARIO:
+                jalankan(skenario_args, tmp, env)
+            for nama, skenario_args, anggaran, terlarang in SKENARIO:
+                hasil[nama] = ukur_skenario(skenario_args, terlarang, tmp, env, dasar, args.runs)
+                hasil[nama]['anggaran_ms'] = anggaran * args.faktor
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    gagal = [nama for nama, h in hasil.items() if h['median_ms'] > h['anggaran_ms'] or h['terlarang']]
+    if args.json:
+        print(json.dumps({'hasil': hasil, 'gagal': gagal}, indent=2))
+    else:
+        for nama, h in hasil.items():
+            status = 'GAGAL' if nama in gagal else 'ok'
+            print(f"{nama:<18} {h['median_ms']:7.1f} ms (min {h['min_ms']:.1f}, maks {h['max_ms']:.1f}, "
+                  f"anggaran {h['anggaran_ms']:g})  [{status}]")
+            if h['terlarang']:
+                print(f"    modul yang seharusnya ditunda ikut dimuat: {', '.join(h['terlarang'])}")
+            print("    terbesar: " + ", ".join(f"{t['modul']} {t['ms']:.1f}" for t in h['teratas']))
+    return 1 if gagal else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
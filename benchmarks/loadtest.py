@@ -0,0 +1,236 @@
+# benchmarks/loadtest.py
+"""
+Uji beban `main.py serve` terhadap server tiruan BMKG.
+
+Tanpa --url, skrip ini menjalankan dua proses anak di direktori sementara:
+server tiruan (dengan jeda --latency untuk meniru API asli) dan server API
+yang diarahkan ke sana, tanpa riwayat dan dengan cache respons kosong. Beban
+dibangkitkan dari proses ini dengan --concurrency koneksi keep-alive yang
+masing-masing mengirim permintaan berikutnya begitu jawaban sebelumnya tiba.
+
+Campuran permintaan diatur dengan --mix (bobot relatif):
+    children  GET /regions/{kab|kec}/children
+    search    GET /search?q=<nama desa acak>
+    forecast  GET /forecast/{desa}?daily=1, dari --kode-unik desa saja
+              sehingga LRU server ikut teruji (hit/miss/coalesced dilaporkan)
+
+Jalankan dari root repo:
+    python -m benchmarks.loadtest --duration 10 --concurrency 32
+Laporan: jumlah permintaan, RPS, galat, dan latensi p50/p90/p99/maks per jenis.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from urllib.parse import quote, urlsplit
+
+from utils.loader.loader import load_wilayah_from_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_WILAYAH = os.path.join(ROOT, 'data', 'base.csv')
+POLA_URL = re.compile(r'http://[\w.:\-]+')
+
+
+def persentil(nilai_urut, p):
+    """
+    Persentil nearest-rank dari list yang sudah diurutkan.
+    """
+    if not nilai_urut:
+        return None
+    return nilai_urut[min(len(nilai_urut) - 1, max(0, int(round(p / 100 * len(nilai_urut) + 0.5)) - 1))]
+
+
+def parse_mix(teks):
+    bobot = {}
+    for item in teks.split(','):
+        nama, _, nilai = item.partition('=')
+        if nama not in ('children', 'search', 'forecast'):
+            raise argparse.ArgumentTypeError(f"Jenis permintaan tidak dikenal: {nama}")
+        bobot[nama] = float(nilai or 1)
+    return bobot
+
+
+def buat_pemilih(store, bobot, kode_unik, seed):
+    """
+    Fungsi tanpa argumen yang mengembalikan (jenis, path) acak sesuai bobot.
+    """
+    rng = random.Random(seed)
+    induk = [code for code, level in zip(store.codes, store.levels) if level in (2, 3)]
+    desa = [idx for idx, level in enumerate(store.levels) if level == 4]
+    kode_forecast = [store.codes[idx] for idx in rng.sample(desa, min(kode_unik, len(desa)))]
+    nama_desa = [store.names[idx] for idx in rng.sample(desa, min(5000, len(desa)))]
+    jenis = list(bobot)
+    berat = [bobot[nama] for nama in jenis]
+
+    def pilih():
+        nama = rng.choices(jenis, berat)[0]
+        if nama == 'children':
+            return nama, f"/regions/{rng.choice(induk)}/children"
+        if nama == 'search':
+            return nama, f"/search?q={quote(rng.choice(nama_desa).lower())}&limit=10"
+        return nama, f"/forecast/{rng.choice(kode_forecast)}?daily=1"
+    return pilih
+
+
+async def pekerja(host, port, berhenti, pilih, hasil):
+    """
+    Satu koneksi keep-alive: kirim, tunggu jawaban, ulangi sampai `berhenti`.
+    Koneksi yang putus dicatat sebagai galat lalu dibuka ulang.
+    """
+    reader = writer = None
+    while time.perf_counter() < berhenti:
+        jenis, path = pilih()
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('ascii'))
+            await writer.drain()
+            kepala = await reader.readuntil(b'\r\n\r\n')
+            baris = kepala.decode('latin-1').split('\r\n')
+            headers = dict((k.strip().lower(), v.strip()) for k, _, v in (item.partition(':') for item in baris[1:] if item))
+            await reader.readexactly(int(headers.get('content-length', 0)))
+            status = int(baris[0].split(' ', 2)[1])
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            hasil.append((jenis, time.perf_counter() - start, 0, None))
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        hasil.append((jenis, time.perf_counter() - start, status, headers.get('x-cache')))
+        if headers.get('connection', '').lower() == 'close':
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def bangkitkan_beban(url, concurrency, durasi, pilih):
+    bagian = urlsplit(url)
+    hasil = []
+    start = time.perf_counter()
+    berhenti = start + durasi
+    await asyncio.gather(*(pekerja(bagian.hostname, bagian.port, berhenti, pilih, hasil) for _ in range(concurrency)))
+    return hasil, time.perf_counter() - start
+
+
+def ringkas(hasil, durasi):
+    """
+    Statistik per jenis permintaan dan keseluruhan. Latensi dalam milidetik.
+    """
+    laporan = {}
+    for jenis in sorted({item[0] for item in hasil}) + ['semua']:
+        bagian = [item for item in hasil if jenis == 'semua' or item[0] == jenis]
+        latensi = sorted(item[1] * 1000 for item in bagian)
+        galat = sum(1 for item in bagian if not 200 <= item[2] < 300)
+        cache = {}
+        for item in bagian:
+            if item[3]:
+                cache[item[3]] = cache.get(item[3], 0) + 1
+        laporan[jenis] = {
+            'permintaan': len(bagian),
+            'rps': round(len(bagian) / durasi, 1),
+            'galat': galat,
+            'p50_ms': round(persentil(latensi, 50), 2) if latensi else None,
+            'p90_ms': round(persentil(latensi, 90), 2) if latensi else None,
+            'p99_ms': round(persentil(latensi, 99), 2) if latensi else None,
+            'maks_ms': round(latensi[-1], 2) if latensi else None,
+        }
+        if cache:
+            laporan[jenis]['cache'] = cache
+    return laporan
+
+
+def mulai_proses(args, cwd, env, log):
+    """
+    Menjalankan main.py dengan `args` dan menunggu baris berisi URL-nya.
+    """
+    proses = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py')] + args, cwd=cwd, env=env,
+                              stdout=subprocess.PIPE, stderr=log, text=True)
+    for baris in proses.stdout:
+        cocok = POLA_URL.search(baris)
+        if cocok:
+            return proses, cocok.group(0)
+    proses.wait()
+    raise RuntimeError(f"main.py {' '.join(args)} berhenti sebelum siap ({proses.returncode})")
+
+
+def tunggu_sehat(url, batas=30.0):
+    akhir = time.monotonic() + batas
+    while True:
+        try:
+            with urllib.request.urlopen(url + '/health', timeout=2) as respons:
+                return json.load(respons)
+        except OSError:
+            if time.monotonic() > akhir:
+                raise
+            time.sleep(0.2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban server API terhadap server tiruan BMKG.")
+    parser.add_argument('--url', help="Uji server yang sudah berjalan alih-alih menjalankan server sendiri")
+    parser.add_argument('--duration', type=float, default=10.0, help="Lama pengukuran dalam detik (bawaan: 10)")
+    parser.add_argument('--pemanasan', type=float, default=2.0, help="Beban pemanasan yang tidak dihitung, dalam detik (bawaan: 2)")
+    parser.add_argument('--concurrency', type=int, default=32, help="Jumlah koneksi paralel (bawaan: 32)")
+    parser.add_argument('--mix', type=parse_mix, default='children=3,search=2,forecast=5',
+                        help="Bobot jenis permintaan (bawaan: children=3,search=2,forecast=5)")
+    parser.add_argument('--kode-unik', type=int, default=500, help="Jumlah desa berbeda untuk /forecast (bawaan: 500)")
+    parser.add_argument('--latency', type=float, default=0.05, help="Jeda server tiruan dalam detik (bawaan: 0.05)")
+    parser.add_argument('--workers', type=int, default=16, help="--workers untuk server API (bawaan: 16)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON")
+    args = parser.parse_args(argv)
+
+    store = load_wilayah_from_csv(DATA_WILAYAH)
+    pilih = buat_pemilih(store, args.mix, args.kode_unik, args.seed)
+
+    proses = []
+    with tempfile.TemporaryDirectory(prefix='bmkg-loadtest-') as tmp:
+        try:
+            url = args.url
+            if url is None:
+                os.makedirs(os.path.join(tmp, 'data'))
+                shutil.copy2(DATA_WILAYAH, os.path.join(tmp, 'data', 'base.csv'))
+                env = dict(os.environ, BMKG_HISTORY='0', COLUMNS='200')
+                log = open(os.path.join(tmp, 'server.log'), 'w')
+                mock, mock_url = mulai_proses(['mock-server', '--port', '0', '--latency', str(args.latency)], tmp, env, log)
+                proses.append(mock)
+                api, url = mulai_proses(['--base-url', mock_url + '/publik/prakiraan-cuaca', 'serve', '--port', '0',
+                                         '--workers', str(args.workers)], tmp, env, log)
+                proses.append(api)
+            url = url.rstrip('/')
+            tunggu_sehat(url)
+
+            if args.pemanasan > 0:
+                asyncio.run(bangkitkan_beban(url, args.concurrency, args.pemanasan, pilih))
+            hasil, durasi = asyncio.run(bangkitkan_beban(url, args.concurrency, args.duration, pilih))
+        finally:
+            for item in proses:
+                item.terminate()
+                item.wait()
+
+    laporan = ringkas(hasil, durasi)
+    if args.json:
+        print(json.dumps({'url': url, 'durasi_s': round(durasi, 2), 'concurrency': args.concurrency, 'hasil': laporan}, indent=2))
+    else:
+        print(f"{url}: {args.concurrency} koneksi selama {durasi:.1f} s")
+        print(f"{'jenis':<10} {'permintaan':>10} {'rps':>8} {'galat':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'maks':>8}  (ms)")
+        for jenis, h in laporan.items():
+            print(f"{jenis:<10} {h['permintaan']:>10} {h['rps']:>8.1f} {h['galat']:>6} {h['p50_ms'] or 0:>8.2f} "
+                  f"{h['p90_ms'] or 0:>8.2f} {h['p99_ms'] or 0:>8.2f} {h['maks_ms'] or 0:>8.2f}"
+                  + (f"  cache {h['cache']}" if 'cache' in h else ''))
+    return 1 if laporan.get('semua', {}).get('galat') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
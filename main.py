@@ -1,105 +1,295 @@
 # main.py
 
+import argparse
 import logging
-from rich.console import Console
-from utils.loader.loader import load_wilayah_from_csv
-from utils.display.display import tampilkan_prakiraan, display_menu
+import os
+import sys
+from utils.loader.lazy_loader import load_wilayah_lazy
+from utils.loader.region import ADM_LEVELS, LEVELS
+from utils.display.display import tampilkan_ringkasan, display_menu
 from utils.display.header import opening_header
-from api.fetch_api import fetch_prakiraan_cuaca
-from utils.utils import bersihkan_layar, pause
-from rich.prompt import Confirm
+from utils.session.session import Sesi
+from api.prefetch import JAM_PEMBARUAN_UTC, PrefetchSpekulatif
+from utils.utils import bersihkan_layar, console, pause
+from utils.cli.commands import cmd_bulk, cmd_daemon, cmd_export, cmd_forecast, cmd_history, cmd_rollup, cmd_search, cmd_mock_server, cmd_serve
+from utils.metrics.metrics import metrics
+from utils.export.export import FORMAT_EKSPOR
 
-console = Console()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-adm_levels = {
-    1: {'code': 'adm1', 'name': 'Provinsi'},
-    2: {'code': 'adm2', 'name': 'Kabupaten/Kota'},
-    3: {'code': 'adm3', 'name': 'Kecamatan'},
-    4: {'code': 'adm4', 'name': 'Kelurahan/Desa'}
-}
+def tanya_navigasi(sesi):
+    """
+    Menanyakan langkah berikutnya setelah prakiraan ditampilkan.
+    Mengembalikan tingkat menu tujuan, atau None jika pengguna ingin keluar.
+    """
+    from rich.prompt import Prompt
+    tingkat = len(sesi.jalur)
+    pilihan = {}
+    if tingkat < len(ADM_LEVELS):
+        pilihan['l'] = (tingkat + 1, f"Lanjut cek {ADM_LEVELS[tingkat + 1]['name']} di {sesi.terpilih.name}")
+    for level in range(tingkat, 0, -1):
+        induk = f" di {sesi.jalur[level - 2].name}" if level > 1 else ""
+        pilihan[str(level)] = (level, f"Pilih {ADM_LEVELS[level]['name']} lain{induk}")
+    pilihan['q'] = (None, "Keluar")
+
+    console.print()
+    for key, (_, label) in pilihan.items():
+        console.print(f"[yellow]{key}[/yellow]  {label}")
+    jawaban = Prompt.ask(
+        "[bold magenta]✨ Mau ke mana selanjutnya? ✨[/bold magenta]",
+        choices=list(pilihan),
+        default='l' if 'l' in pilihan else str(tingkat),
+        show_choices=False
+    )
+    return pilihan[jawaban][0]
 
-def pilih_wilayah_dinamis(wilayah_hierarchy):
+def pilih_wilayah_dinamis(wilayah):
     """
-    Memulai pemilihan wilayah secara dinamis dari adm1 hingga adm4.
+    Sesi pemilihan wilayah dari adm1 hingga adm4.
+    `wilayah` adalah RegionStore yang dimuat sekali untuk seluruh sesi. Setelah
+    prakiraan ditampilkan, pengguna bisa lanjut ke tingkat berikutnya atau
+    kembali ke tingkat mana pun tanpa memuat ulang data; prakiraan yang sudah
+    diambil disimpan oleh Sesi. Selagi tabel dibaca, prakiraan anak-anak
+    wilayah terpilih sudah diambil di latar belakang.
     """
-    current_level = wilayah_hierarchy
-    tingkat = 1
-    max_tingkat = 4
-    selected_codes = {}
-    selected_names = {}
+    prefetch = PrefetchSpekulatif()
+    sesi = Sesi(wilayah, prefetch=prefetch)
 
-    while tingkat <= max_tingkat:
+    while True:
         bersihkan_layar()
-        if tingkat < 4:
-            options = [(code, info['name']) for code, info in current_level.items()]
-        else:
-            options = [(code, name) for code, name in current_level.items()]
+        tingkat = sesi.tingkat
+        adm_level_name = ADM_LEVELS[tingkat]['name']
+        options = sesi.opsi()
 
         if not options:
-            console.print(f"[bold red]Tidak ada opsi yang tersedia untuk {adm_levels[tingkat]['name']}.[/bold red]")
-            break
+            console.print(f"[bold red]Tidak ada opsi yang tersedia untuk {adm_level_name}.[/bold red]")
+            if not sesi.jalur:
+                break
+            # Pilih ulang di tingkat sebelumnya
+            pause()
+            sesi.kembali_ke(tingkat - 1)
+            continue
 
         # Tampilkan menu dan dapatkan pilihan
-        adm_level_name = adm_levels[tingkat]['name']
         selected_code, selected_name = display_menu(options, adm_level_name)
-
-        # Simpan kode dan nama yang dipilih
-        selected_codes[adm_levels[tingkat]['code']] = selected_code
-        selected_names[adm_levels[tingkat]['code']] = selected_name
+        region = sesi.pilih(selected_code)
 
         # Tampilkan data yang dipilih
         console.print(f"\nData Untuk {adm_level_name} dipilih: [bold magenta]{selected_name}[/bold magenta]")
 
         # Ambil dan tampilkan prakiraan cuaca
-        data_cuaca = fetch_prakiraan_cuaca(adm_levels[tingkat]['code'], selected_code)
-        tampilkan_prakiraan(data_cuaca, tingkat, adm_levels)
-
-        # Tanyakan apakah ingin melanjutkan ke tingkat berikutnya
-        if tingkat < max_tingkat:
-            lanjut = Confirm.ask(
-    f"[bold magenta]✨ Apakah kamu siap untuk melanjutkan cek {adm_levels[tingkat + 1]['name']}? ✨[/bold magenta]",
-    default=True
-)
-            if lanjut:
-                # Set current_level ke children dari yang dipilih
-                temp_level = wilayah_hierarchy
-                for t in range(1, tingkat +1):
-                    adm = adm_levels[t]['code']
-                    code = selected_codes[adm]
-                    if adm != 'adm4':
-                        temp_level = temp_level[code]['children']
-                current_level = temp_level
-                tingkat +=1
-            else:
-                console.print("[bold green]Terima kasih telah menggunakan program cek cuaca.[/bold green]")
-                break
+        lokasi_info, harian = sesi.prakiraan(region)
+        if lokasi_info is None:
+            console.print("[bold red]Tidak ada data prakiraan cuaca yang tersedia.[/bold red]")
         else:
+            tampilkan_ringkasan(lokasi_info, harian, tingkat)
+        sesi.prefetch_anak()
+
+        if tingkat == len(ADM_LEVELS):
             console.print("[bold green]Yeayy kamu telah mencapai tingkat wilayah terakhir.😁[/bold green]")
-            pause()
-            start()
+
+        tujuan = tanya_navigasi(sesi)
+        if tujuan is None:
+            console.print("[bold green]Terima kasih telah menggunakan program cek cuaca.[/bold green]")
             break
+        if tujuan <= tingkat:
+            # Kembali ke atas: anak wilayah ini tidak lagi dibutuhkan
+            prefetch.batalkan()
+        sesi.kembali_ke(tujuan)
+    prefetch.tutup()
 
 def start():
     try:
-        wilayah_hierarchy = load_wilayah_from_csv('data/base.csv')
+        # Hanya cabang yang dibuka pengguna yang di-parse dari CSV
+        wilayah = load_wilayah_lazy('data/base.csv')
     except Exception:
         console.print("[bold red]Gagal memuat data wilayah. Program dihentikan.[/bold red]")
         return
 
     # Memulai pemilihan wilayah secara dinamis
-    pilih_wilayah_dinamis(wilayah_hierarchy)
+    pilih_wilayah_dinamis(wilayah)
+
+def bilangan_positif(teks):
+    """
+    Tipe argparse untuk jumlah (worker, permintaan paralel, ukuran batch): bilangan bulat >= 1.
+    """
+    try:
+        nilai = int(teks)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Harus bilangan bulat: {teks!r}")
+    if nilai < 1:
+        raise argparse.ArgumentTypeError(f"Harus minimal 1: {teks!r}")
+    return nilai
 
-def main():
-    # Tampilkan pesan selamat datang dengan warna
-    # console.print("[bold cyan]Selamat datang di program cek cuaca.[/bold cyan]\n")
-    bersihkan_layar()
-    opening_header()
-    pause()
+def laju(teks):
+    """
+    Tipe argparse untuk --rate: permintaan per detik >= 0 (0 = tanpa batas).
+    """
+    try:
+        nilai = float(teks)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Harus bilangan: {teks!r}")
+    if not nilai >= 0:
+        raise argparse.ArgumentTypeError(f"Tidak boleh negatif: {teks!r}")
+    return nilai
+
+def daftar_jam(teks):
+    """
+    Tipe argparse untuk --jam: jam UTC 0-23 dipisah koma, mis. "0,6,12,18".
+    """
+    try:
+        jam_utc = sorted({int(jam) for jam in teks.split(',') if jam.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Jam harus bilangan bulat dipisah koma: {teks!r}")
+    if not jam_utc:
+        raise argparse.ArgumentTypeError("Minimal satu jam pembaruan")
+    if not all(0 <= jam <= 23 for jam in jam_utc):
+        raise argparse.ArgumentTypeError(f"Jam harus di antara 0 dan 23: {teks!r}")
+    return jam_utc
+
+def buat_parser():
+    """
+    Parser argumen baris perintah. Tanpa subperintah program berjalan interaktif.
+    """
+    parser = argparse.ArgumentParser(description="Prakiraan cuaca BMKG dari terminal.")
+    parser.add_argument('--base-url', help="URL endpoint prakiraan cuaca, mis. server tiruan lokal")
+    parser.add_argument('--record', metavar='DIR', help="Simpan setiap respons API sebagai fixture di DIR")
+    parser.add_argument('--no-history', action='store_true', help="Jangan simpan prakiraan yang diambil ke riwayat lokal")
+    parser.add_argument('--profile', action='store_true', help="Cetak rincian waktu per tahap ke stderr saat program selesai")
+    parser.add_argument('--metrics-file', metavar='PATH', help="Tulis metrik saat program selesai (.json = JSON, selain itu teks Prometheus)")
+    subparsers = parser.add_subparsers(dest='command')
+
+    forecast = subparsers.add_parser('forecast', help="Tampilkan prakiraan harian satu wilayah tanpa menu.")
+    forecast.add_argument('wilayah', help="Kode wilayah (mis. 11.01.02.2005) atau jalur nama (mis. \"Aceh/Aceh Selatan\")")
+    forecast.add_argument('--cari', action='store_true', help="Anggap argumen sebagai kueri pencarian nama dan pakai hasil teratas")
+    forecast.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON")
+    forecast.add_argument('--stream', action='store_true', help="Parse respons secara bertahap per lokasi (hemat memori untuk adm1/adm2)")
+    forecast.add_argument('--no-cache', action='store_true', help="Jangan pakai cache respons")
+    forecast.set_defaults(func=cmd_forecast)
+
+    search = subparsers.add_parser('search', help="Cari wilayah berdasarkan nama; tanpa kueri membuka prompt pencarian.")
+    search.add_argument('query', nargs='*', help="Nama atau potongan nama wilayah, mis. \"Pulo Kambing\"")
+    search.add_argument('--limit', type=bilangan_positif, default=10, help="Jumlah hasil maksimal (bawaan: 10)")
+    search.add_argument('--level', action='append', choices=list(LEVELS), help="Batasi tingkat wilayah (boleh diulang)")
+    search.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON")
+    search.set_defaults(func=cmd_search)
+
+    bulk = subparsers.add_parser('bulk', help="Ambil prakiraan semua kecamatan/desa di bawah sebuah wilayah.")
+    bulk.add_argument('kode', help="Kode wilayah induk, mis. 11 atau 11.01")
+    bulk.add_argument('--level', choices=['adm3', 'adm4'], default='adm4', help="Tingkat wilayah yang diambil (bawaan: adm4)")
+    bulk.add_argument('--concurrency', type=bilangan_positif, default=8, help="Jumlah permintaan paralel (bawaan: 8)")
+    bulk.add_argument('--rate', type=laju, default=5.0, help="Batas permintaan per detik, 0 = tanpa batas (bawaan: 5)")
+    bulk.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON Lines")
+    bulk.add_argument('--no-cache', action='store_true', help="Jangan pakai cache respons")
+    bulk.set_defaults(func=cmd_bulk)
+
+    export = subparsers.add_parser('export', help="Ekspor ringkasan harian banyak wilayah ke CSV/JSON Lines/Parquet, dapat dilanjutkan.")
+    export.add_argument('kode', nargs='*', help="Kode wilayah; turunannya pada --level ikut diekspor, mis. 11 32.73")
+    export.add_argument('--kode-file', metavar='PATH', help="File berisi satu kode wilayah per baris")
+    export.add_argument('--level', choices=list(LEVELS), default='adm4', help="Tingkat wilayah yang diekspor (bawaan: adm4)")
+    export.add_argument('--output', '-o', required=True, metavar='DIR', help="Direktori keluaran (shard dan checkpoint)")
+    export.add_argument('--format', choices=sorted(FORMAT_EKSPOR), default='csv', help="Format file (bawaan: csv; parquet butuh pyarrow)")
+    export.add_argument('--workers', type=bilangan_positif, help="Jumlah proses (bawaan: jumlah CPU)")
+    export.add_argument('--concurrency', type=bilangan_positif, default=4, help="Permintaan paralel per proses (bawaan: 4)")
+    export.add_argument('--rate', type=laju, default=5.0, help="Batas permintaan per detik untuk semua proses, 0 = tanpa batas (bawaan: 5)")
+    export.add_argument('--batch', type=bilangan_positif, default=32, help="Jumlah wilayah per tugas proses (bawaan: 32)")
+    export.add_argument('--shard-size', type=bilangan_positif, default=1000, help="Jumlah wilayah per file shard (bawaan: 1000)")
+    export.add_argument('--laporan-setiap', type=bilangan_positif, default=500, help="Cetak kemajuan setiap N wilayah (bawaan: 500)")
+    export.add_argument('--no-cache', action='store_true', help="Jangan pakai cache respons")
+    export.set_defaults(func=cmd_export)
+
+    mock = subparsers.add_parser('mock-server', help="Jalankan server tiruan API BMKG (tanpa jaringan).")
+    mock.add_argument('--host', default='127.0.0.1')
+    mock.add_argument('--port', type=int, default=8080)
+    mock.add_argument('--latency', type=float, default=0.0, help="Jeda setiap jawaban dalam detik")
+    mock.add_argument('--jitter', type=float, default=0.0, help="Variasi acak jeda dalam detik")
+    mock.add_argument('--error-rate', type=float, default=0.0, help="Peluang (0-1) menjawab 429/5xx")
+    mock.add_argument('--maks-lokasi', type=int, default=50, help="Jumlah lokasi maksimal untuk respons adm1-adm3")
+    mock.add_argument('--hari', type=int, default=3, help="Jumlah hari prakiraan sintetis")
+    mock.add_argument('--fixtures', metavar='DIR', help="Sajikan rekaman dari DIR jika tersedia")
+    mock.set_defaults(func=cmd_mock_server)
+
+    serve = subparsers.add_parser('serve', help="Jalankan layanan HTTP untuk pencarian, daftar wilayah dan prakiraan.")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000, help="Port yang didengarkan, 0 = pilih bebas (bawaan: 8000)")
+    serve.add_argument('--workers', type=bilangan_positif, default=8, help="Jumlah permintaan paralel ke API BMKG (bawaan: 8)")
+    serve.add_argument('--cache-size', type=bilangan_positif, default=1024, help="Jumlah ringkasan harian yang disimpan di memori (bawaan: 1024)")
+    serve.add_argument('--ttl', type=float, default=15 * 60, help="Umur ringkasan harian di memori dalam detik (bawaan: 900)")
+    serve.add_argument('--no-cache', action='store_true', help="Jangan pakai cache respons di disk")
+    serve.set_defaults(func=cmd_serve)
+
+    rollup = subparsers.add_parser('rollup', help="Ringkasan spasial sebuah wilayah dari prakiraan desa yang tersimpan.")
+    rollup.add_argument('wilayah', help="Kode wilayah (mis. 11.01) atau jalur nama (mis. \"Aceh/Aceh Selatan\")")
+    rollup.add_argument('--fetch', action='store_true', help="Ambil dari API untuk desa yang belum punya data tersimpan")
+    rollup.add_argument('--concurrency', type=bilangan_positif, default=8, help="Jumlah permintaan paralel untuk --fetch (bawaan: 8)")
+    rollup.add_argument('--rate', type=laju, default=5.0, help="Batas permintaan per detik untuk --fetch (bawaan: 5)")
+    rollup.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON")
+    rollup.set_defaults(func=cmd_rollup)
+
+    daemon = subparsers.add_parser('daemon', help="Perbarui prakiraan wilayah tertentu secara terjadwal agar selalu tersedia di cache.")
+    daemon.add_argument('kode', nargs='+', help="Kode wilayah yang dihangatkan, mis. 11 32.73")
+    daemon.add_argument('--kedalaman', type=int, default=1, help="Ikut sertakan turunan sampai N tingkat di bawah kode (bawaan: 1)")
+    daemon.add_argument('--jam', type=daftar_jam, default=list(JAM_PEMBARUAN_UTC), help="Jam pembaruan UTC dipisah koma (bawaan: tiap 3 jam)")
+    daemon.add_argument('--tunda-menit', type=float, default=15, help="Jeda setelah jam pembaruan (bawaan: 15)")
+    daemon.add_argument('--jitter-menit', type=float, default=5, help="Jitter acak tambahan (bawaan: 5)")
+    daemon.add_argument('--concurrency', type=bilangan_positif, default=4, help="Jumlah permintaan paralel (bawaan: 4)")
+    daemon.add_argument('--rate', type=laju, default=2.0, help="Batas permintaan per detik, 0 = tanpa batas (bawaan: 2)")
+    daemon.add_argument('--sekali', action='store_true', help="Jalankan satu putaran lalu keluar (mis. dari cron)")
+    daemon.add_argument('--tunggu', action='store_true', help="Jangan jalankan putaran pertama sebelum jadwal")
+    daemon.set_defaults(func=cmd_daemon)
+
+    history = subparsers.add_parser('history', help="Baca dan rawat riwayat prakiraan yang tersimpan.")
+    history.add_argument('--path', help="File riwayat (bawaan: data/history/prakiraan.sqlite3)")
+    history_aksi = history.add_subparsers(dest='aksi', required=True)
+    query = history_aksi.add_parser('query', help="Prakiraan tersimpan untuk sebuah kode dan turunannya.")
+    query.add_argument('kode', help="Kode wilayah atau awalannya, mis. 11.01")
+    query.add_argument('--hari', type=int, default=3, help="Panjang rentang waktu dalam hari (bawaan: 3)")
+    query.add_argument('--mulai', help="Tanggal awal YYYY-MM-DD (UTC); bawaan: sekarang")
+    query.add_argument('--level', choices=list(LEVELS), help="Batasi tingkat wilayah")
+    query.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON Lines")
+    versi = history_aksi.add_parser('versi', help="Daftar rilis prakiraan tersimpan untuk satu kode.")
+    versi.add_argument('kode')
+    versi.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON")
+    compact = history_aksi.add_parser('compact', help="Terapkan retensi dan rapikan file riwayat.")
+    compact.add_argument('--retensi-hari', type=float, help="Hapus rilis yang lebih tua dari N hari")
+    compact.add_argument('--maks-rilis', type=bilangan_positif, help="Simpan paling banyak N rilis terbaru per wilayah")
+    compact.add_argument('--no-vacuum', action='store_true', help="Lewati VACUUM")
+    stats = history_aksi.add_parser('stats', help="Ringkasan isi riwayat.")
+    stats.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON")
+    history.set_defaults(func=cmd_history)
+
+    return parser
+
+def main(argv=None):
+    args = buat_parser().parse_args(argv)
+    # Lewat environment agar ikut terbawa ke klien mana pun, termasuk proses anak
+    if args.base_url:
+        os.environ['BMKG_API_BASE_URL'] = args.base_url
+    if args.record:
+        os.environ['BMKG_RECORD_DIR'] = args.record
+    if args.no_history:
+        os.environ['BMKG_HISTORY'] = '0'
+    if args.profile or args.metrics_file:
+        metrics.aktifkan()
+    try:
+        if args.command:
+            return args.func(args)
+
+        # Tampilkan pesan selamat datang dengan warna
+        # console.print("[bold cyan]Selamat datang di program cek cuaca.[/bold cyan]\n")
+        # Banner (dan jeda sesudahnya) hanya ditampilkan di terminal
+        bersihkan_layar()
+        if opening_header():
+            pause()
 
-    # Memuat data wilayah dari base.csv
-    start()
+        # Memuat data wilayah dari base.csv
+        start()
+    finally:
+        if args.profile:
+            print(metrics.ringkasan(), file=sys.stderr)
+        if args.metrics_file:
+            metrics.tulis(args.metrics_file)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# tests/conftest.py
+
+import pytest
+
+# Dua provinsi kecil; baris sengaja tidak urut nama agar urutan store teruji
+BASE_CSV = """adm_code,adm_name
+11,ACEH
+11.01,KAB. ACEH SELATAN
+11.01.01,Bakongan
+11.01.01.2001,Keude Bakongan
+11.01.01.2002,Ujong Mangki
+11.01.02,Kluet Utara
+11.01.02.2001,Fajar Harapan
+11.01.02.2002,Alur Mas
+11.02,KAB. ACEH TENGGARA
+11.02.01,Lawe Alas
+11.02.01.2001,Lawe Sumur
+51,BALI
+51.01,KAB. JEMBRANA
+51.01.01,Negara
+51.01.01.2001,Baler Bale Agung
+51.01.01.2002,"Banjar Tengah, Barat"
+"""
+
+
+@pytest.fixture
+def csv_wilayah(tmp_path):
+    """
+    Path ke base.csv kecil di direktori sementara.
+    """
+    path = tmp_path / 'base.csv'
+    path.write_text(BASE_CSV, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def mock_bmkg(csv_wilayah):
+    """
+    Server tiruan API BMKG di thread latar; menghasilkan base URL-nya.
+    """
+    from api.mock_server import mulai_server_latar
+    from utils.loader.lazy_loader import load_wilayah_lazy
+
+    server, url = mulai_server_latar(load_wilayah_lazy(csv_wilayah, use_snapshot=False), maks_lokasi=5)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def metrik():
+    """
+    Registry metrik yang aktif dan kosong selama satu tes.
+    """
+    from utils.metrics.metrics import metrics
+
+    metrics.reset()
+    metrics.aktifkan()
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
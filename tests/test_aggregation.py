@@ -0,0 +1,87 @@
+# tests/test_aggregation.py
+
+import random
+
+import pytest
+
+from utils.aggregation.aggregation import AgregatorHarian, agregasi_harian, agregasi_stream
+
+
+def prakiraan(waktu, t, hu=80, ws=5.0, wd='N', desc='Cerah'):
+    return {'local_datetime': waktu, 't': t, 'hu': hu, 'ws': ws, 'wd': wd, 'weather_desc': desc}
+
+
+def payload_acak(n_lokasi, seed):
+    rng = random.Random(seed)
+    entries = []
+    for nomor in range(n_lokasi):
+        cuaca = [[
+            prakiraan(f"2026-10-{18 + jam // 8} {jam % 8 * 3:02d}:00:00",
+                      rng.choice([rng.randint(18, 35), rng.uniform(18, 35)]),
+                      hu=rng.randint(40, 99), ws=rng.uniform(0, 25),
+                      wd=rng.choice(['N', 'NE', 'E', 'S', 'W']),
+                      desc=rng.choice(['Cerah', 'Berawan', 'Hujan Ringan']))
+            for jam in range(24)
+        ]]
+        entries.append({'lokasi': {'adm4': f"11.01.01.{2001 + nomor}"}, 'cuaca': cuaca})
+    return entries
+
+
+def test_ringkasan_harian():
+    entries = [{'cuaca': [[
+        prakiraan('2026-10-18 06:00:00', 24, hu=70, ws=4.0, wd='E', desc='Berawan'),
+        prakiraan('2026-10-18 12:00:00', 31.5, hu=90, ws=8.0, wd='N', desc='Cerah'),
+        prakiraan('2026-10-18 18:00:00', 27, hu=85, ws=6.0, wd='N', desc='Berawan'),
+        prakiraan('2026-10-19 06:00:00', 23, hu=95, ws=2.0, wd='S', desc='Hujan Ringan'),
+    ]]}]
+    assert agregasi_harian(entries) == [
+        {'tanggal': '2026-10-18', 'suhu_min': 24, 'suhu_max': 31.5, 'kelembaban_max': 90,
+         'angin_avg': 6.0, 'angin_dir': 'N', 'kondisi': 'Berawan'},
+        {'tanggal': '2026-10-19', 'suhu_min': 23, 'suhu_max': 23, 'kelembaban_max': 95,
+         'angin_avg': 2.0, 'angin_dir': 'S', 'kondisi': 'Hujan Ringan'},
+    ]
+
+
+def test_modus_seri_memilih_yang_pertama_muncul():
+    entries = [{'cuaca': [[
+        prakiraan('2026-10-18 06:00:00', 24, wd='W', desc='Hujan Ringan'),
+        prakiraan('2026-10-18 09:00:00', 25, wd='E', desc='Cerah'),
+        prakiraan('2026-10-18 12:00:00', 26, wd='E', desc='Cerah'),
+        prakiraan('2026-10-18 15:00:00', 27, wd='W', desc='Hujan Ringan'),
+    ]]}]
+    hari, = agregasi_harian(entries)
+    assert (hari['angin_dir'], hari['kondisi']) == ('W', 'Hujan Ringan')
+
+
+def test_record_tidak_lengkap_dilewati():
+    entries = [{'cuaca': [[
+        prakiraan('2026-10-18 06:00:00', 24),
+        prakiraan('bukan tanggal', 99),
+        {'local_datetime': '2026-10-18 09:00:00', 't': 50, 'hu': 10, 'ws': 1.0, 'wd': 'N'},
+        {'t': 60, 'hu': 10, 'ws': 1.0, 'wd': 'N', 'weather_desc': 'Cerah'},
+    ]]}]
+    hari, = agregasi_harian(entries)
+    assert (hari['suhu_min'], hari['suhu_max']) == (24, 24)
+    assert agregasi_harian([]) == []
+    assert agregasi_stream(iter([])) == (None, [])
+
+
+@pytest.mark.parametrize('n_lokasi', [1, 7, 60])
+def test_bertahap_sama_dengan_sekaligus(n_lokasi):
+    entries = payload_acak(n_lokasi, seed=n_lokasi)
+    sekaligus = agregasi_harian(entries)
+
+    per_entri = AgregatorHarian()
+    for entry in entries:
+        per_entri.tambah([entry])
+    per_batch = AgregatorHarian()
+    for i in range(0, len(entries), 5):
+        per_batch.tambah(entries[i:i + 5])
+    lokasi, stream = agregasi_stream(iter(entries))
+
+    assert lokasi == entries[0]['lokasi']
+    for hasil in (per_entri.hasil(), per_batch.hasil(), stream):
+        assert len(hasil) == len(sekaligus)
+        for a, b in zip(hasil, sekaligus):
+            assert a['angin_avg'] == pytest.approx(b['angin_avg'])
+            assert {k: v for k, v in a.items() if k != 'angin_avg'} == {k: v for k, v in b.items() if k != 'angin_avg'}
@@ -0,0 +1,121 @@
+# tests/test_cache.py
+
+import os
+import time
+
+import pytest
+
+from api.cache import ResponseCache
+from api.client import BASE_URL, BmkgClient
+
+
+def test_simpan_dan_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=60, stale_while_revalidate=30)
+    assert cache.get('adm4', '11.01.01.2001') is None
+    cache.put('adm4', '11.01.01.2001', b'{"data": []}', etag='"abc"')
+    entry = cache.get('adm4', '11.01.01.2001')
+    assert entry.data == {'data': []} and entry.etag == '"abc"'
+
+    sekarang = entry.stored_at
+    assert cache.is_fresh(entry, now=sekarang + 59)
+    assert not cache.is_fresh(entry, now=sekarang + 61)
+    assert cache.is_servable_stale(entry, now=sekarang + 89)
+    assert not cache.is_servable_stale(entry, now=sekarang + 91)
+
+    entry.stored_at -= 120
+    cache.touch(entry)
+    assert cache.is_fresh(cache.get('adm4', '11.01.01.2001'))
+
+
+def test_ttl_entri_dari_penulis(tmp_path):
+    daemon = ResponseCache(str(tmp_path), ttl_entri=4 * 3600)
+    pembaca = ResponseCache(str(tmp_path), ttl=3 * 3600)
+    daemon.put('adm3', '11.01.01', b'{"data": []}')
+    entry = pembaca.get('adm3', '11.01.01')
+    assert entry.ttl == 4 * 3600
+    assert pembaca.is_fresh(entry, now=entry.stored_at + 3.5 * 3600)
+    assert not pembaca.is_fresh(entry, now=entry.stored_at + 4.5 * 3600)
+
+    # touch oleh pembaca biasa mempertahankan ttl entri, touch oleh daemon memperbaruinya
+    pembaca.touch(entry)
+    assert pembaca.get('adm3', '11.01.01').ttl == 4 * 3600
+    ResponseCache(str(tmp_path), ttl_entri=5 * 3600).touch(entry)
+    assert pembaca.get('adm3', '11.01.01').ttl == 5 * 3600
+    # Entri yang ditulis tanpa ttl_entri kembali memakai ttl pembaca
+    pembaca.put('adm3', '11.01.01', b'{"data": []}')
+    assert pembaca.get('adm3', '11.01.01').ttl is None
+
+
+def test_lru_membuang_yang_paling_lama_tidak_dipakai(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_entries=2)
+    cache.put('adm4', 'a', b'{}')
+    cache.put('adm4', 'b', b'{}')
+    cache.get('adm4', 'a')
+    cache.put('adm4', 'c', b'{}')
+    assert cache.get('adm4', 'b') is None
+    assert cache.get('adm4', 'a') is not None and cache.get('adm4', 'c') is not None
+
+
+def test_lru_batas_byte_dan_urutan_dari_disk(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    for nomor, kode in enumerate(['a', 'b', 'c']):
+        cache.put('adm4', kode, b'x' * 100)
+        body_path = os.path.join(str(tmp_path), f"adm4-{kode}.json")
+        os.utime(body_path, (time.time() - 100 + nomor, time.time() - 100 + nomor))
+
+    # Instance baru menyusun urutan LRU dari mtime di disk
+    cache = ResponseCache(str(tmp_path), max_bytes=250)
+    cache.put('adm4', 'd', b'x' * 100)
+    assert [kode for kode in 'abcd' if cache.get('adm4', kode) is not None] == ['c', 'd']
+
+
+def test_meta_rusak_diabaikan(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put('adm4', 'a', b'{}')
+    with open(os.path.join(str(tmp_path), 'adm4-a.meta.json'), 'w') as f:
+        f.write('{rusak')
+    assert cache.get('adm4', 'a') is None
+
+
+def test_sumber_lain_memakai_direktori_terpisah(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    asli = BmkgClient(base_url=BASE_URL, cache=cache)
+    tiruan = BmkgClient(base_url='http://127.0.0.1:8080/publik/prakiraan-cuaca', cache=cache)
+    lain = BmkgClient(base_url='http://127.0.0.1:9090/publik/prakiraan-cuaca', cache=cache)
+    assert asli.cache is cache
+    assert tiruan.cache.directory.startswith(os.path.join(str(tmp_path), 'sumber', '127.0.0.1_8080-'))
+    assert tiruan.cache.directory != lain.cache.directory
+
+    tiruan.cache.put('adm4', 'a', b'{"sintetis": true}')
+    assert cache.get('adm4', 'a') is None and lain.cache.get('adm4', 'a') is None
+
+
+def test_revalidasi_kondisional(tmp_path, mock_bmkg, metrik):
+    client = BmkgClient(base_url=mock_bmkg, cache=ResponseCache(str(tmp_path), ttl=0))
+    pertama = client.fetch_prakiraan_cuaca('adm4', '11.01.01.2001')
+    assert pertama['lokasi']['adm4'] == '11.01.01.2001'
+    entry = client.cache.get('adm4', '11.01.01.2001')
+    assert entry.etag
+
+    # ttl 0: entri langsung basi, permintaan berikutnya dikirim dengan If-None-Match
+    kedua = client.fetch_prakiraan_cuaca('adm4', '11.01.01.2001')
+    assert kedua == pertama
+    assert metrik.snapshot()['counters'].get('cache.not_modified') == 1
+    assert client.cache.get('adm4', '11.01.01.2001').stored_at >= entry.stored_at
+    client.close()
+
+
+def test_stale_while_revalidate(tmp_path, mock_bmkg, metrik):
+    client = BmkgClient(base_url=mock_bmkg, cache=ResponseCache(str(tmp_path), ttl=0, stale_while_revalidate=3600),
+                        ttl_indeks=0)
+    client.fetch_prakiraan_cuaca('adm4', '11.01.01.2001')
+    stored_at = client.cache.get('adm4', '11.01.01.2001').stored_at
+
+    assert client.fetch_prakiraan_cuaca('adm4', '11.01.01.2001') is not None
+    assert metrik.snapshot()['counters'].get('cache.stale') == 1
+    batas = time.monotonic() + 5
+    while client.cache.get('adm4', '11.01.01.2001').stored_at == stored_at:
+        if time.monotonic() > batas:
+            pytest.fail("revalidasi latar tidak memperbarui entri")
+        time.sleep(0.02)
+    client.close()
@@ -0,0 +1,82 @@
+# tests/test_cli.py
+
+import json
+
+import pytest
+
+from api.client import set_default_client
+from main import buat_parser, main
+from utils.cli import commands
+from utils.cli.commands import resolve_wilayah
+from utils.loader.lazy_loader import load_wilayah_lazy
+
+
+def test_resolve_wilayah(csv_wilayah):
+    store = load_wilayah_lazy(csv_wilayah, use_snapshot=False)
+    assert resolve_wilayah(store, '11.01.02').name == 'Kluet Utara'
+    assert resolve_wilayah(store, 'aceh/aceh selatan/kluet utara').code == '11.01.02'
+    assert resolve_wilayah(store, 'Bali/jembrana/negara/banjar').code == '51.01.01.2002'
+    assert resolve_wilayah(store, 'Aceh/kab. aceh') is None  # ambigu
+    assert resolve_wilayah(store, '99') is None
+
+
+@pytest.mark.parametrize('argv', [
+    ['forecast', '99.99', '--json'],
+    ['bulk', '99.99', '--json'],
+])
+def test_kesalahan_json_ke_stderr(argv, capsys):
+    assert main(argv) == 1
+    keluaran = capsys.readouterr()
+    assert keluaran.out == ''
+    assert 'tidak ditemukan' in keluaran.err
+
+
+def test_forecast_json(csv_wilayah, mock_bmkg, monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(commands, 'DATA_WILAYAH', csv_wilayah)
+    monkeypatch.setenv('BMKG_API_BASE_URL', mock_bmkg)
+    set_default_client(None)
+    try:
+        assert main(['forecast', '11.01.02', '--json']) == 0
+    finally:
+        set_default_client(None)
+    hasil = json.loads(capsys.readouterr().out)
+    assert (hasil['kode'], hasil['tingkat']) == ('11.01.02', 'adm3')
+    assert hasil['harian']
+
+
+@pytest.mark.parametrize('argv', [['forecast', '11.01', '--json'], ['forecast', '11.01', '--json', '--stream']])
+def test_forecast_json_lokasi_wilayah_induk(argv, csv_wilayah, mock_bmkg, monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(commands, 'DATA_WILAYAH', csv_wilayah)
+    monkeypatch.setenv('BMKG_API_BASE_URL', mock_bmkg)
+    set_default_client(None)
+    try:
+        assert main(argv) == 0
+    finally:
+        set_default_client(None)
+    lokasi = json.loads(capsys.readouterr().out)['lokasi']
+    assert (lokasi['adm2'], lokasi['kotkab'], lokasi['type']) == ('11.01', 'KAB. ACEH SELATAN', 'adm2')
+    assert not {'adm3', 'adm4', 'kecamatan', 'desa', 'lat', 'lon'} & set(lokasi)
+
+
+@pytest.mark.parametrize('argv', [
+    ['bulk', '11', '--concurrency', '0'],
+    ['bulk', '11', '--rate', '-1'],
+    ['bulk', '11', '--rate', 'nan'],
+    ['export', '11', '-o', 'keluaran', '--workers', '0'],
+    ['export', '11', '-o', 'keluaran', '--concurrency', 'dua'],
+    ['rollup', '11', '--rate', '-0.5'],
+    ['daemon', '11', '--concurrency', '-4'],
+    ['serve', '--workers', '0'],
+    ['history', 'compact', '--maks-rilis', '0'],
+])
+def test_argumen_jumlah_dan_laju_tidak_valid(argv, capsys):
+    with pytest.raises(SystemExit):
+        buat_parser().parse_args(argv)
+    assert 'error: argument' in capsys.readouterr().err
+
+
+def test_laju_nol_berarti_tanpa_batas():
+    args = buat_parser().parse_args(['bulk', '11', '--rate', '0', '--concurrency', '1'])
+    assert (args.rate, args.concurrency) == (0.0, 1)
@@ -0,0 +1,147 @@
+# tests/test_client.py
+
+import io
+import threading
+
+import pytest
+import requests
+
+from api import client as modul_client
+from api.cache import ResponseCache
+from api.client import BmkgClient
+from api.mock_server import mulai_server_latar
+from utils.loader.lazy_loader import load_wilayah_lazy
+from utils.metrics.metrics import metrics
+
+
+@pytest.fixture
+def mock_lambat(csv_wilayah):
+    """
+    Server tiruan yang menjawab setelah 0,2 detik, agar permintaan sempat tumpang tindih.
+    """
+    server, url = mulai_server_latar(load_wilayah_lazy(csv_wilayah, use_snapshot=False), maks_lokasi=5, latency=0.2)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def jumlah_request():
+    return metrics.snapshot()['timers'].get('http.request', {}).get('count', 0)
+
+
+def test_fetch_bersamaan_digabung(mock_lambat, metrik):
+    with BmkgClient(base_url=mock_lambat) as client:
+        mulai = threading.Barrier(10)
+        hasil = [None] * 10
+
+        def ambil(nomor):
+            mulai.wait()
+            hasil[nomor] = client.fetch_prakiraan_cuaca('adm3', '11.01.01')
+
+        threads = [threading.Thread(target=ambil, args=(nomor,)) for nomor in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert jumlah_request() == 1
+    assert metrics.snapshot()['counters']['fetch.coalesced'] == 9
+    assert hasil[0]['data'] and all(item is hasil[0] for item in hasil)
+
+
+def test_desa_dilayani_dari_respons_kecamatan(mock_bmkg, metrik):
+    with BmkgClient(base_url=mock_bmkg) as client:
+        kecamatan = client.fetch_prakiraan_cuaca('adm3', '11.01.01')
+        for entry in kecamatan['data']:
+            kode = entry['lokasi']['adm4']
+            assert client.fetch_prakiraan_cuaca('adm4', kode)['data'] == [entry]
+        assert jumlah_request() == 1
+        assert metrics.snapshot()['counters']['fetch.indeks_induk'] == len(kecamatan['data']) == 2
+
+        # use_cache=False dan desa di luar respons induk tetap ke jaringan
+        client.fetch_prakiraan_cuaca('adm4', '11.01.01.2001', use_cache=False)
+        client.fetch_prakiraan_cuaca('adm4', '11.01.02.2001')
+        assert jumlah_request() == 3
+
+
+def test_indeks_basi_dan_terbatas(mock_bmkg, metrik):
+    with BmkgClient(base_url=mock_bmkg, ttl_indeks=0) as client:
+        client.fetch_prakiraan_cuaca('adm3', '11.01.01')
+        assert client.dari_indeks('11.01.01.2001') is None
+    with BmkgClient(base_url=mock_bmkg, maks_indeks=1) as client:
+        client.fetch_prakiraan_cuaca('adm3', '11.01.01')
+        assert client.dari_indeks('11.01.01.2001') is None
+        assert client.dari_indeks('11.01.01.2002') is not None
+
+
+def test_stream_tidak_mengisi_indeks(tmp_path, mock_bmkg, metrik):
+    with BmkgClient(base_url=mock_bmkg, cache=ResponseCache(str(tmp_path / 'cache'))) as client:
+        assert len(list(client.stream_prakiraan_cuaca('adm2', '11.01'))) == 4
+        assert len(list(client.stream_prakiraan_cuaca('adm2', '11.01'))) == 4
+        assert client.dari_indeks('11.01.01.2001') is None
+
+
+class SesiSkrip:
+    """
+    Pengganti requests.Session yang menjawab dengan status berurutan dari skrip.
+    """
+
+    def __init__(self, skrip):
+        self.skrip = list(skrip)
+        self.panggilan = 0
+
+    def get(self, url, **kwargs):
+        self.panggilan += 1
+        langkah = self.skrip.pop(0)
+        if isinstance(langkah, Exception):
+            raise langkah
+        status, headers = langkah
+        response = requests.models.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response.raw = io.BytesIO(b'{"data": []}')
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def jeda(monkeypatch):
+    tercatat = []
+    monkeypatch.setattr(modul_client.time, 'sleep', tercatat.append)
+    return tercatat
+
+
+def test_retry_menghormati_retry_after(jeda, metrik):
+    client = BmkgClient(base_url='http://contoh.invalid', max_retries=3, backoff_max=30)
+    client._session = SesiSkrip([
+        (429, {'Retry-After': '2'}),
+        (503, {'Retry-After': '120'}),
+        requests.exceptions.ConnectionError('putus'),
+        (200, {}),
+    ])
+    response = client.get({'adm4': '11.01.01.2001'})
+    assert response.status_code == 200 and client._session.panggilan == 4
+    # Retry-After dipakai apa adanya tetapi dibatasi backoff_max; tanpa header memakai jitter
+    assert jeda[:2] == [2.0, 30]
+    assert 0 <= jeda[2] <= client.backoff_factor * 4
+    counters = metrik.snapshot()['counters']
+    assert counters['http.retry'] == 3 and 'http.error' not in counters
+
+
+def test_retry_menyerah_setelah_max_retries(jeda, metrik):
+    client = BmkgClient(base_url='http://contoh.invalid', max_retries=2)
+    client._session = SesiSkrip([(503, {})] * 3)
+    assert client.get({'adm4': '11.01.01.2001'}).status_code == 503
+    assert client._session.panggilan == 3 and len(jeda) == 2
+
+    client._session = SesiSkrip([requests.exceptions.Timeout('lambat')] * 3)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.get({'adm4': '11.01.01.2001'})
+    counters = metrik.snapshot()['counters']
+    assert (counters['http.retry'], counters['http.error']) == (4, 2)
+
+    # Status di luar RETRY_STATUS tidak dicoba ulang
+    client._session = SesiSkrip([(404, {})])
+    assert client.get({'adm4': '99'}).status_code == 404 and client._session.panggilan == 1
@@ -0,0 +1,68 @@
+# tests/test_export.py
+
+import csv
+import json
+import os
+
+import pytest
+
+from api.bulk import kumpulkan_turunan
+from utils.export.export import CHECKPOINT, CHECKPOINT_VERSION, baca_checkpoint, ekspor
+from utils.loader.lazy_loader import load_wilayah_lazy
+
+
+def tulis_checkpoint(direktori, isi):
+    os.makedirs(direktori, exist_ok=True)
+    with open(os.path.join(direktori, CHECKPOINT), 'wb') as f:
+        f.write(isi)
+
+
+def baca_shard(direktori):
+    kode = []
+    for nama in sorted(os.listdir(direktori)):
+        if nama.startswith('part-'):
+            with open(os.path.join(direktori, nama), encoding='utf-8', newline='') as f:
+                kode.extend(dict.fromkeys(baris['kode'] for baris in csv.DictReader(f)))
+    return kode
+
+
+def test_checkpoint_kosong(tmp_path):
+    assert baca_checkpoint(str(tmp_path), 'csv') == (set(), 0)
+
+
+def test_baris_terakhir_terpotong_dibuang(tmp_path):
+    kepala = json.dumps({'versi': CHECKPOINT_VERSION, 'format': 'csv'}).encode() + b'\n'
+    utuh = b'{"shard": 0, "file": "part-00000.csv", "kode": ["11.01"], "baris": 3}\n'
+    tulis_checkpoint(str(tmp_path), kepala + b'bukan json\n' + utuh + b'{"shard": 1, "file": "part-0')
+
+    assert baca_checkpoint(str(tmp_path), 'csv') == ({'11.01'}, 1)
+    with open(tmp_path / CHECKPOINT, 'rb') as f:
+        assert f.read() == kepala + b'bukan json\n' + utuh
+
+
+def test_checkpoint_format_lain(tmp_path):
+    tulis_checkpoint(str(tmp_path), json.dumps({'versi': CHECKPOINT_VERSION, 'format': 'jsonl'}).encode() + b'\n')
+    with pytest.raises(ValueError):
+        baca_checkpoint(str(tmp_path), 'csv')
+    with pytest.raises(ValueError):
+        ekspor([], str(tmp_path), fmt='csv')
+
+
+def test_ekspor_dilanjutkan_dari_checkpoint(csv_wilayah, mock_bmkg, monkeypatch, tmp_path):
+    # Proses pekerja mewarisi environment dan direktori kerja (cache) ini
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('BMKG_API_BASE_URL', mock_bmkg)
+    store = load_wilayah_lazy(csv_wilayah, use_snapshot=False)
+    regions = kumpulkan_turunan(store, '11', 4) + kumpulkan_turunan(store, '51', 4)
+    keluaran = str(tmp_path / 'ekspor')
+
+    pertama = ekspor(regions[:3], keluaran, workers=1, rate=0, shard_size=2)
+    assert (pertama['berhasil'], pertama['shard'], pertama['dilewati']) == (3, 2, 0)
+
+    kedua = ekspor(regions, keluaran, workers=1, rate=0, shard_size=2)
+    assert (kedua['diproses'], kedua['dilewati'], kedua['shard']) == (4, 3, 2)
+    assert sorted(os.listdir(keluaran)) == [CHECKPOINT] + [f"part-{i:05d}.csv" for i in range(4)]
+    assert sorted(baca_shard(keluaran)) == sorted(region.code for region in regions)
+
+    ketiga = ekspor(regions, keluaran, workers=1, rate=0)
+    assert (ketiga['diproses'], ketiga['dilewati']) == (0, len(regions))
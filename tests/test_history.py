@@ -0,0 +1,86 @@
+# tests/test_history.py
+
+import time
+
+import pytest
+
+from api.client import BASE_URL, BmkgClient
+from api.history import HistoryStore, buka_riwayat_bawaan, epoch_utc
+
+
+def entri(kode, analysis, jam_mulai=0, n=4, t=25):
+    adm = f"adm{kode.count('.') + 1}"
+    return {
+        'lokasi': {adm: kode, 'desa': f"Desa {kode}"},
+        'cuaca': [[{
+            'analysis_date': analysis,
+            'utc_datetime': f"2026-10-18 {jam_mulai + 3 * i:02d}:00:00",
+            'local_datetime': f"2026-10-18 {jam_mulai + 3 * i + 7:02d}:00:00",
+            't': t + i, 'hu': 80, 'ws': 5.0, 'wd': 'N', 'weather_desc': 'Cerah',
+        } for i in range(n)]],
+    }
+
+
+@pytest.fixture
+def riwayat():
+    with HistoryStore(':memory:') as store:
+        yield store
+
+
+def test_simpan_mengabaikan_rilis_yang_sama(riwayat):
+    assert riwayat.simpan([entri('11.01.01.2001', '2026-10-18T00:00:00')]) == 1
+    assert riwayat.simpan([entri('11.01.01.2001', '2026-10-18T00:00:00')]) == 0
+    assert riwayat.simpan([entri('11.01.01.2001', '2026-10-18T06:00:00'), {'lokasi': {}}]) == 1
+    assert [v['baris'] for v in riwayat.versi('11.01.01.2001')] == [4, 4]
+    assert riwayat.statistik()['rilis'] == 2
+
+
+def test_rentang_rilis_terbaru_per_prefix(riwayat):
+    riwayat.simpan([
+        entri('11.01.01.2001', '2026-10-18T00:00:00', t=20),
+        entri('11.01.01.2001', '2026-10-18T06:00:00', t=30),
+        entri('11.01.01.2002', '2026-10-18T00:00:00'),
+        entri('11.01.01', '2026-10-18T00:00:00'),
+        entri('11.10.01.2001', '2026-10-18T00:00:00'),
+    ])
+    hasil = riwayat.rentang('11.01')
+    assert [e['lokasi'].get('adm4') or e['lokasi'].get('adm3') for e in hasil] == [
+        '11.01.01', '11.01.01.2001', '11.01.01.2002'
+    ]
+    assert [f['t'] for f in hasil[1]['cuaca'][0]] == [30, 31, 32, 33]
+    assert hasil[1]['cuaca'][0][0]['local_datetime'] == '2026-10-18 07:00:00'
+
+    assert len(riwayat.rentang('11.01', level=4)) == 2
+    jendela = riwayat.rentang('11.01.01.2001', epoch_utc('2026-10-18 03:00:00'), epoch_utc('2026-10-18 09:00:00'))
+    assert [f['utc_datetime'] for f in jendela[0]['cuaca'][0]] == ['2026-10-18 03:00:00', '2026-10-18 06:00:00']
+    assert riwayat.rentang('12') == []
+
+
+def test_kompaksi(riwayat):
+    sekarang = time.strftime('%Y-%m-%dT%H:00:00', time.gmtime())
+    riwayat.simpan([entri('11.01.01.2001', analysis) for analysis in
+                    ('2020-01-01T00:00:00', '2020-01-02T00:00:00', sekarang)])
+    riwayat.simpan([entri('11.01.01.2002', '2020-01-01T00:00:00')])
+
+    assert riwayat.kompaksi() == 0
+    assert riwayat.kompaksi(maks_rilis=2) == 1
+    assert len(riwayat.versi('11.01.01.2001')) == 2
+    assert riwayat.kompaksi(retensi_hari=30) == 2
+    assert [v['analysis_ts'] for v in riwayat.versi('11.01.01.2001')] == [epoch_utc(sekarang)]
+    assert riwayat.versi('11.01.01.2002') == []
+    assert riwayat.statistik()['baris'] == 4
+
+
+def test_riwayat_mati_untuk_sumber_selain_bmkg(tmp_path, monkeypatch):
+    monkeypatch.setenv('BMKG_HISTORY_PATH', str(tmp_path / 'riwayat.sqlite3'))
+    monkeypatch.setenv('BMKG_API_BASE_URL', 'http://127.0.0.1:8765/prakiraan-cuaca')
+    assert buka_riwayat_bawaan() is None
+
+    with HistoryStore(':memory:') as store:
+        assert BmkgClient(history=store).history is None
+        assert BmkgClient(history=store, base_url=BASE_URL).history is store
+
+    monkeypatch.delenv('BMKG_API_BASE_URL')
+    store = buka_riwayat_bawaan()
+    assert store is not None
+    store.close()
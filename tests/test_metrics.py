@@ -0,0 +1,104 @@
+# tests/test_metrics.py
+
+import json
+import time
+
+import pytest
+
+from api.client import BmkgClient
+from utils.metrics.metrics import Metrics
+
+
+@pytest.fixture
+def m():
+    metrik = Metrics()
+    metrik.aktifkan()
+    return metrik
+
+
+def test_mati_tidak_mencatat():
+    metrik = Metrics()
+    with metrik.span('a'):
+        pass
+    metrik.incr('b')
+    metrik.timed('c')(lambda: None)()
+    assert list(metrik.span_iter('d', [1, 2])) == [1, 2]
+    assert metrik.snapshot()['timers'] == metrik.snapshot()['counters'] == {}
+
+
+def test_span_timed_incr(m):
+    with m.span('tahap'):
+        time.sleep(0.01)
+    with pytest.raises(KeyError):
+        with m.span('tahap'):
+            raise KeyError
+    tambah = m.timed('fungsi')(lambda a, b: a + b)
+    assert tambah(1, 2) == 3
+    m.incr('hit')
+    m.incr('hit', 4)
+
+    data = m.snapshot()
+    assert data['timers']['tahap']['count'] == 2
+    assert data['timers']['tahap']['max_s'] >= 0.01
+    assert data['timers']['fungsi']['count'] == 1
+    assert data['counters'] == {'hit': 5}
+
+    m.reset()
+    assert m.snapshot()['timers'] == {}
+
+
+def test_span_iter_tanpa_waktu_konsumen(m):
+    def sumber():
+        for i in range(3):
+            time.sleep(0.01)
+            yield i
+
+    for _ in m.span_iter('stream', sumber()):
+        time.sleep(0.05)
+    stat = m.snapshot()['timers']['stream']
+    assert stat['count'] == 1
+    assert 0.03 <= stat['total_s'] < 0.1
+
+
+def test_span_iter_berhenti_awal_menutup_sumber(m):
+    ditutup = []
+
+    def sumber():
+        try:
+            yield from range(10)
+        finally:
+            ditutup.append(True)
+
+    iterator = m.span_iter('stream', sumber())
+    assert next(iterator) == 0
+    iterator.close()
+    assert ditutup == [True]
+    assert m.snapshot()['timers']['stream']['count'] == 1
+
+
+def test_prometheus_dan_tulis(m, tmp_path):
+    m.catat('http.request', 0.25)
+    m.catat('http.request', 0.75)
+    m.incr('cache.hit', 2)
+    teks = m.ke_prometheus()
+    assert 'bmkg_cli_span_seconds_count{span="http.request"} 2' in teks
+    assert 'bmkg_cli_span_seconds_sum{span="http.request"} 1.000000' in teks
+    assert 'bmkg_cli_span_seconds_max{span="http.request"} 0.750000' in teks
+    assert 'bmkg_cli_events_total{event="cache.hit"} 2' in teks
+    assert teks.endswith('\n')
+
+    m.tulis(str(tmp_path / 'metrik.json'))
+    data = json.loads((tmp_path / 'metrik.json').read_text())
+    assert data['counters'] == {'cache.hit': 2} and data['timers']['http.request']['count'] == 2
+    m.tulis(str(tmp_path / 'metrik.prom'))
+    assert (tmp_path / 'metrik.prom').read_text().startswith('# TYPE bmkg_cli_span_seconds summary')
+    m.tulis(str(tmp_path / 'tidak-ada' / 'metrik.json'))  # kegagalan hanya dicatat
+
+
+def test_stream_dicatat_sebagai_fetch(mock_bmkg, metrik):
+    with BmkgClient(base_url=mock_bmkg) as client:
+        for _ in client.stream_prakiraan_cuaca('adm1', '11'):
+            pass
+    timers = metrik.snapshot()['timers']
+    assert timers['fetch']['count'] == 1
+    assert timers['fetch']['total_s'] >= timers['http.request']['total_s']
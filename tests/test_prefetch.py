@@ -0,0 +1,62 @@
+# tests/test_prefetch.py
+
+import pytest
+
+from api.cache import ResponseCache
+from api.client import BmkgClient
+from api.history import epoch_utc
+from api.prefetch import PrefetchSpekulatif, jadwal_berikutnya, kumpulkan_target, ttl_hangat
+from main import buat_parser
+from utils.loader.lazy_loader import load_wilayah_lazy
+
+
+def test_jadwal_berikutnya():
+    now = epoch_utc('2026-10-18 04:00:00')
+    assert jadwal_berikutnya(now, tunda=900, jitter=0) == epoch_utc('2026-10-18 06:15:00')
+    now = epoch_utc('2026-10-18 22:00:00')
+    assert jadwal_berikutnya(now, jam_utc=(0, 12), tunda=0, jitter=0) == epoch_utc('2026-10-19 00:00:00')
+
+
+def test_kumpulkan_target(csv_wilayah):
+    store = load_wilayah_lazy(csv_wilayah, use_snapshot=False)
+    assert [r.code for r in kumpulkan_target(store, ['11.01', '11.01.01'], kedalaman=1)] == [
+        '11.01', '11.01.01', '11.01.02', '11.01.01.2001', '11.01.01.2002'
+    ]
+    assert [r.code for r in kumpulkan_target(store, ['51'], kedalaman=0)] == ['51']
+    with pytest.raises(KeyError):
+        kumpulkan_target(store, ['99'])
+
+
+def test_spekulasi_hanya_kecamatan_dan_desa(tmp_path, csv_wilayah, mock_bmkg):
+    store = load_wilayah_lazy(csv_wilayah, use_snapshot=False)
+    with BmkgClient(base_url=mock_bmkg, cache=ResponseCache(str(tmp_path / 'cache'))) as client:
+        prefetch = PrefetchSpekulatif(client=client, rate=0)
+        try:
+            prefetch.mulai(store.children('11'))
+            assert prefetch._futures == []
+            prefetch.mulai(store.children('11.01'))
+            for future in prefetch._futures:
+                future.result(timeout=10)
+        finally:
+            prefetch.tutup()
+        assert client.cache.get('adm3', '11.01.01') is not None
+        assert client.cache.get('adm2', '11.01') is None
+
+
+@pytest.mark.parametrize('jam', ['', ',', '3,x', '24', '-1'])
+def test_jam_daemon_tidak_valid(jam, capsys):
+    with pytest.raises(SystemExit):
+        buat_parser().parse_args(['daemon', '11', '--jam', jam])
+    assert '--jam' in capsys.readouterr().err
+
+
+def test_jam_daemon():
+    assert buat_parser().parse_args(['daemon', '11', '--jam', '18, 6,6']).jam == [6, 18]
+    assert buat_parser().parse_args(['daemon', '11']).jam == [0, 3, 6, 9, 12, 15, 18, 21]
+
+
+def test_ttl_hangat():
+    assert ttl_hangat(tunda=900, jitter=300, cadangan=900) == 3 * 3600 + 2100
+    assert ttl_hangat((0, 12), tunda=0, jitter=0, cadangan=0) == 12 * 3600
+    assert ttl_hangat((21, 0, 6), tunda=0, jitter=0, cadangan=0) == 15 * 3600
+    assert ttl_hangat((6,), tunda=0, jitter=0, cadangan=0) == 24 * 3600
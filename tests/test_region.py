@@ -0,0 +1,115 @@
+# tests/test_region.py
+
+import os
+import pickle
+import threading
+
+import pytest
+
+from api.bulk import kumpulkan_turunan
+from utils.loader.lazy_loader import load_wilayah_lazy
+from utils.loader.loader import load_wilayah_from_csv
+from utils.loader.region import RegionStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_WILAYAH = os.path.join(ROOT, 'data', 'base.csv')
+
+
+def semua_kode(store, code=None):
+    hasil = []
+    for region in store.children(code):
+        hasil.append(region.code)
+        hasil.extend(semua_kode(store, region.code))
+    return hasil
+
+
+def test_from_hierarchy_lookup():
+    store = RegionStore.from_hierarchy({
+        '11': {'name': 'ACEH', 'children': {
+            '11.01': {'name': 'KAB. ACEH SELATAN', 'children': {
+                '11.01.01': {'name': 'Bakongan', 'children': {'11.01.01.2001': 'Keude Bakongan'}},
+            }},
+        }},
+    })
+    region = store.get('11.01.01.2001')
+    assert (region.name, region.level) == ('Keude Bakongan', 4)
+    assert store.parent('11.01.01.2001').code == '11.01.01'
+    assert [r.code for r in store.ancestors('11.01.01.2001')] == ['11', '11.01', '11.01.01', '11.01.01.2001']
+    assert store.parent('11') is None
+    assert store.get('99') is None
+    assert '11.01' in store and '11.02' not in store
+    assert store.children('11.01.01.2001') == []
+    with pytest.raises(KeyError):
+        store.child_range('99')
+
+
+def test_lazy_sama_dengan_muat_penuh(csv_wilayah):
+    penuh = load_wilayah_from_csv(csv_wilayah, use_snapshot=False)
+    lazy = load_wilayah_lazy(csv_wilayah, use_snapshot=False)
+    # Sebelum dibuka hanya provinsi dan kabupaten yang ada
+    assert len(lazy) == 5
+    assert lazy.get('51.01.01.2002').name == 'Banjar Tengah, Barat'
+    assert sorted(semua_kode(lazy)) == sorted(semua_kode(penuh))
+    assert len(lazy) == len(penuh) == 16
+
+
+def test_pickle_membangun_ulang_indeks(csv_wilayah):
+    store = pickle.loads(pickle.dumps(load_wilayah_from_csv(csv_wilayah, use_snapshot=False)))
+    assert store.get('11.02.01.2001').name == 'Lawe Sumur'
+    assert {r.code for r in store.children('11.01.02')} == {'11.01.02.2001', '11.01.02.2002'}
+
+
+def test_pemuatan_lazy_bersamaan():
+    """
+    Thread yang membaca kecamatan saat kabupatennya sedang dimuat thread lain
+    harus menunggu cabang lengkap, bukan mendapat daftar anak kosong atau KeyError.
+    """
+    penuh = load_wilayah_from_csv(DATA_WILAYAH, use_snapshot=False)
+    lazy = load_wilayah_lazy(DATA_WILAYAH, use_snapshot=False)
+    kabupaten = [kab.code for prov in penuh.roots() for kab in penuh.children(prov.code)][:60]
+    salah = []
+
+    for kab in kabupaten:
+        kecamatan = [kec.code for kec in penuh.children(kab)][:6]
+        mulai = threading.Barrier(len(kecamatan) + 1)
+
+        def buka_kabupaten():
+            mulai.wait()
+            lazy.children(kab)
+
+        def baca_kecamatan(kode):
+            mulai.wait()
+            try:
+                if len(lazy.children(kode)) != len(penuh.children(kode)):
+                    salah.append(kode)
+            except KeyError:
+                salah.append(kode)
+
+        threads = [threading.Thread(target=buka_kabupaten)]
+        threads += [threading.Thread(target=baca_kecamatan, args=(kode,)) for kode in kecamatan]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert salah == []
+
+
+def test_anak_urut_kode_opsi_urut_nama(csv_wilayah):
+    for store in (load_wilayah_from_csv(csv_wilayah, use_snapshot=False),
+                  load_wilayah_lazy(csv_wilayah, use_snapshot=False)):
+        assert [r.code for r in store.children('11.01.02')] == ['11.01.02.2001', '11.01.02.2002']
+        assert store.opsi('11.01.02') == (('11.01.02.2002', 'Alur Mas'), ('11.01.02.2001', 'Fajar Harapan'))
+        assert [code for code, _ in store.opsi()] == ['11', '51']
+        assert store.opsi('11.01.02.2001') == ()
+        assert [r.code for r in kumpulkan_turunan(store, '11', 4)] == [
+            '11.01.01.2001', '11.01.01.2002', '11.01.02.2001', '11.01.02.2002', '11.02.01.2001'
+        ]
+
+
+def test_opsi_kosong_tidak_disimpan():
+    store = RegionStore()
+    store.tambah_anak(-1, [('11', 'ACEH')], 1)
+    assert store.opsi('11') == ()
+    store.tambah_subtree(store.index_of('11'), {'11.02': 'KAB. B', '11.01': 'KAB. A'}, 2)
+    assert store.opsi('11') == (('11.01', 'KAB. A'), ('11.02', 'KAB. B'))
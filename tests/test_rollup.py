@@ -0,0 +1,67 @@
+# tests/test_rollup.py
+
+import pytest
+
+from utils.aggregation.rollup import RollupEngine
+from utils.loader.loader import load_wilayah_from_csv
+
+
+def desa(kode, suhu, desc='Cerah', tanggal='2026-10-18'):
+    return {'lokasi': {'adm4': kode}, 'cuaca': [[
+        {'local_datetime': f"{tanggal} {jam:02d}:00:00", 't': t, 'hu': 80, 'weather_desc': desc}
+        for jam, t in zip((6, 12), suhu)
+    ]]}
+
+
+@pytest.fixture
+def engine(csv_wilayah):
+    return RollupEngine(load_wilayah_from_csv(csv_wilayah, use_snapshot=False))
+
+
+def test_gabung_ke_leluhur(engine):
+    assert engine.perbarui([
+        desa('11.01.01.2001', (24, 30)),
+        desa('11.01.01.2002', (22, 33), desc='Hujan Ringan'),
+        desa('11.01.02.2001', (25, 28)),
+        desa('99.01.01.2001', (20, 20)),
+    ]) == 3
+    kec, = engine.ringkasan('11.01.01')
+    assert (kec['suhu_min'], kec['suhu_max'], kec['n_desa'], kec['terpanas']) == (22, 33, 2, '11.01.01.2002')
+    assert kec['cakupan_hujan'] == 0.5
+    prov, = engine.ringkasan('11')
+    assert (prov['n_desa'], prov['suhu_rata2'], prov['terpanas']) == (3, 27.0, '11.01')
+    assert engine.anak('11.01') == ['11.01.01', '11.01.02']
+
+
+def test_saudara_bertahan_setelah_hapus(engine):
+    engine.perbarui([desa('11.01.01.2001', (24, 30)), desa('11.01.01.2002', (22, 33))])
+    engine.hapus('11.01.01.2002')
+    for code in ('11.01.01', '11.01', '11'):
+        hari, = engine.ringkasan(code)
+        assert (hari['n_desa'], hari['suhu_max']) == (1, 30)
+
+    # Entri tanpa prakiraan yang bisa dipakai sama dengan menghapus desa itu
+    engine.perbarui([{'lokasi': {'adm4': '11.01.01.2001'}, 'cuaca': [[{'t': None}]]}])
+    assert engine.ringkasan('11.01.01') == engine.ringkasan('11') == []
+    assert engine.anak('11') == []
+
+
+def test_perbarui_satu_desa(engine):
+    engine.perbarui([desa('11.01.01.2001', (24, 30)), desa('11.02.01.2001', (26, 29))])
+    engine.perbarui([desa('11.01.01.2001', (20, 25))])
+    hari, = engine.ringkasan('11')
+    assert (hari['suhu_min'], hari['suhu_max'], hari['n_desa'], hari['terpanas']) == (20, 29, 2, '11.02')
+    assert engine.ringkasan('11.01.01')[0]['suhu_max'] == 25
+
+
+def test_seri_diputus_urutan_kode(engine):
+    # Suhu maksimum dan jumlah kondisi seri: hasil tidak boleh bergantung urutan set
+    entries = [desa('11.01.02.2002', (25, 30), desc='Berawan'), desa('11.01.02.2001', (25, 30), desc='Cerah'),
+               desa('11.01.01.2002', (25, 30), desc='Berawan'), desa('11.01.01.2001', (25, 30), desc='Cerah')]
+    for urutan in (entries, entries[::-1]):
+        engine = RollupEngine(engine.store)
+        engine.perbarui(urutan)
+        kec, = engine.ringkasan('11.01.02')
+        kab, = engine.ringkasan('11.01')
+        assert (kec['terpanas'], kec['kondisi']) == ('11.01.02.2001', 'Cerah')
+        assert (kab['terpanas'], kab['kondisi']) == ('11.01.01', 'Cerah')
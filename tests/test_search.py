@@ -0,0 +1,50 @@
+# tests/test_search.py
+
+import pytest
+
+from utils.loader.loader import load_wilayah_from_csv
+from utils.search.search import SearchIndex, cari_wilayah, normalisasi
+
+
+@pytest.fixture
+def wilayah(csv_wilayah):
+    store = load_wilayah_from_csv(csv_wilayah, use_snapshot=False)
+    return store, SearchIndex.from_store(store)
+
+
+def kode(wilayah, query, **kwargs):
+    store, index = wilayah
+    return [item['kode'] for item in cari_wilayah(store, index, query, **kwargs)]
+
+
+def test_normalisasi():
+    assert normalisasi('  Banjar Tengah,  Barat ') == 'banjar tengah barat'
+    assert normalisasi('KAB. ACEH-SELATAN') == 'kab aceh selatan'
+
+
+def test_persis_di_atas_awalan_dan_potongan(wilayah):
+    store, index = wilayah
+    hasil = cari_wilayah(store, index, 'bakongan')
+    # Nama persis mendapat +1, potongan kata dalam nama lain hanya +0,25
+    assert [item['kode'] for item in hasil] == ['11.01.01', '11.01.01.2001']
+    assert hasil[0]['skor'] == 2.0 and hasil[0]['jalur'] == ['ACEH', 'KAB. ACEH SELATAN', 'Bakongan']
+    assert kode(wilayah, 'Banjar Tengah Barat', limit=1) == ['51.01.01.2002']
+    assert kode(wilayah, 'aceh') == ['11', '11.01', '11.02']
+
+
+def test_awalan_dan_salah_ketik(wilayah):
+    assert kode(wilayah, 'bakong')[:2] == ['11.01.01', '11.01.01.2001']
+    assert kode(wilayah, 'bakngan')[0] == '11.01.01'
+    assert kode(wilayah, 'jembrna') == ['51.01']
+
+
+def test_filter_tingkat_dan_batas(wilayah):
+    assert kode(wilayah, 'lawe') == ['11.02.01', '11.02.01.2001']
+    assert kode(wilayah, 'lawe', levels={4}) == ['11.02.01.2001']
+    assert kode(wilayah, 'lawe', levels={3}) == ['11.02.01']
+    assert kode(wilayah, 'aceh', levels={2}, limit=1) == ['11.01']
+
+
+@pytest.mark.parametrize('query', ['', '  ,. ', 'xyz'])
+def test_tanpa_hasil(wilayah, query):
+    assert kode(wilayah, query) == []
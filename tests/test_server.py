@@ -0,0 +1,90 @@
+# tests/test_server.py
+
+import asyncio
+
+import pytest
+
+from api.client import BmkgClient
+from api.server import ApiServer
+from utils.loader.loader import load_wilayah_from_csv
+from utils.search.search import SearchIndex
+
+
+@pytest.fixture
+def server(csv_wilayah, mock_bmkg):
+    store = load_wilayah_from_csv(csv_wilayah, use_snapshot=False)
+    server = ApiServer(store, SearchIndex.from_store(store), client=BmkgClient(base_url=mock_bmkg), workers=2)
+    yield server
+    server.tutup()
+
+
+def minta(server, target, method='GET'):
+    return asyncio.run(server.proses(method, target))
+
+
+def test_regions(server):
+    status, payload, _ = minta(server, '/regions')
+    assert (status, [item['kode'] for item in payload['anak']]) == (200, ['11', '51'])
+
+    status, payload, _ = minta(server, '/regions/11.01.01.2001')
+    assert (status, payload['nama'], payload['tingkat']) == (200, 'Keude Bakongan', 'adm4')
+    assert [item['kode'] for item in payload['jalur']] == ['11', '11.01', '11.01.01']
+
+    status, payload, _ = minta(server, '/regions/11.01.02/children')
+    assert [item['nama'] for item in payload['anak']] == ['Alur Mas', 'Fajar Harapan']
+    assert {item['tingkat'] for item in payload['anak']} == {'adm4'}
+
+
+@pytest.mark.parametrize('method, target, status', [
+    ('GET', '/regions/99', 404),
+    ('GET', '/regions/11/anak', 404),
+    ('GET', '/regions/11/children/lagi', 404),
+    ('GET', '/forecast/99', 404),
+    ('GET', '/forecast', 404),
+    ('GET', '/', 404),
+    ('GET', '/tidak-ada', 404),
+    ('GET', '/search', 400),
+    ('GET', '/search?q=aceh&limit=x', 400),
+    ('GET', '/search?q=aceh&level=adm9', 400),
+    ('POST', '/regions', 405),
+])
+def test_kesalahan(server, method, target, status):
+    assert minta(server, target, method)[0] == status
+
+
+def test_search(server):
+    status, payload, _ = minta(server, '/search?q=aceh%20selatan&limit=1')
+    assert (status, [item['kode'] for item in payload['hasil']]) == (200, ['11.01'])
+    _, payload, _ = minta(server, '/search?q=lawe&level=adm4')
+    assert [item['kode'] for item in payload['hasil']] == ['11.02.01.2001']
+
+
+def test_forecast_harian_dan_x_cache(server):
+    async def skenario():
+        # Dua permintaan bersamaan: yang kedua menunggu hasil yang pertama
+        pertama, kedua = await asyncio.gather(server.proses('GET', '/forecast/11'), server.proses('GET', '/forecast/11'))
+        ketiga = await server.proses('GET', '/forecast/11')
+        return pertama, kedua, ketiga
+
+    pertama, kedua, ketiga = asyncio.run(skenario())
+    assert [hasil[2]['X-Cache'] for hasil in (pertama, kedua, ketiga)] == ['miss', 'coalesced', 'hit']
+    status, payload, _ = pertama
+    assert status == 200 and payload is kedua[1] is ketiga[1]
+    assert (payload['kode'], payload['tingkat']) == ('11', 'adm1') and payload['harian']
+    # Lokasi milik provinsi, bukan desa pertama dalam respons
+    assert payload['lokasi']['provinsi'] == 'ACEH'
+    assert not {'adm2', 'adm3', 'adm4', 'kotkab', 'kecamatan', 'desa'} & set(payload['lokasi'])
+
+
+def test_forecast_mentah(server):
+    status, payload, extra = minta(server, '/forecast/11.01.01?daily=0')
+    assert (status, extra) == (200, None)
+    assert [entry['lokasi']['adm4'] for entry in payload['data']] == ['11.01.01.2001', '11.01.01.2002']
+
+
+def test_health_dan_metrics(server):
+    status, payload, _ = minta(server, '/health')
+    assert (status, payload['status'], payload['wilayah']) == (200, 'ok', 16)
+    status, payload, extra = minta(server, '/metrics')
+    assert status == 200 and extra['Content-Type'].startswith('text/plain')
+    assert '# TYPE bmkg_cli_span_seconds summary' in payload
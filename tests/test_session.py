@@ -0,0 +1,95 @@
+# tests/test_session.py
+
+import pytest
+
+from utils.loader.lazy_loader import load_wilayah_lazy
+from utils.session import session as modul_sesi
+from utils.session.session import Sesi
+
+
+@pytest.fixture
+def wilayah(csv_wilayah):
+    return load_wilayah_lazy(csv_wilayah, use_snapshot=False)
+
+
+@pytest.fixture
+def jam(monkeypatch):
+    """
+    Jam monotonic tiruan yang bisa dimajukan lewat jam[0].
+    """
+    sekarang = [1000.0]
+    monkeypatch.setattr(modul_sesi.time, 'monotonic', lambda: sekarang[0])
+    return sekarang
+
+
+@pytest.fixture
+def diambil(monkeypatch):
+    """
+    Mengganti ringkasan_prakiraan; mencatat kode setiap wilayah yang diambil.
+    Wilayah 51.* tidak punya data.
+    """
+    kode = []
+
+    def ringkasan(region, use_cache=True, client=None):
+        kode.append(region.code)
+        if region.code.startswith('51'):
+            return None, []
+        return {'adm': region.code}, [{'tanggal': '2026-10-18'}]
+
+    monkeypatch.setattr(modul_sesi, 'ringkasan_prakiraan', ringkasan)
+    return kode
+
+
+def test_pilih_dan_kembali_ke(wilayah):
+    sesi = Sesi(wilayah)
+    for kode in ('11', '11.01', '11.01.01', '11.01.01.2001'):
+        sesi.pilih(kode)
+    with pytest.raises(KeyError):
+        sesi.pilih('11.01.02')  # bukan tingkat berikutnya
+
+    sesi.kembali_ke(3)
+    assert [r.code for r in sesi.jalur] == ['11', '11.01'] and sesi.tingkat == 3
+    assert [kode for kode, _ in sesi.opsi()] == ['11.01.01', '11.01.02']
+    sesi.pilih('11.01.02')
+    assert sesi.terpilih.code == '11.01.02'
+
+    sesi.kembali_ke(1)
+    assert sesi.jalur == [] and sesi.terpilih is None and sesi.tingkat == 1
+    sesi.kembali_ke(0)
+    assert sesi.jalur == []
+
+
+def test_prakiraan_lru(wilayah, jam, diambil):
+    sesi = Sesi(wilayah, max_prakiraan=2)
+    a, b, c = (wilayah.get(kode) for kode in ('11.01', '11.01.01', '11.01.02'))
+    hasil = sesi.prakiraan(a)
+    assert sesi.prakiraan(a) is hasil
+    sesi.prakiraan(b)
+    sesi.prakiraan(a)  # a jadi yang terakhir dipakai, b yang dibuang
+    sesi.prakiraan(c)
+    assert diambil == ['11.01', '11.01.01', '11.01.02']
+    sesi.prakiraan(a)
+    sesi.prakiraan(b)
+    assert diambil[3:] == ['11.01.01']
+
+
+def test_prakiraan_ttl_dan_tanpa_cache(wilayah, jam, diambil):
+    sesi = Sesi(wilayah, ttl=60)
+    region = wilayah.get('11.01')
+    sesi.prakiraan(region)
+    jam[0] += 59
+    sesi.prakiraan(region)
+    assert diambil == ['11.01']
+    jam[0] += 2
+    sesi.prakiraan(region)
+    assert diambil == ['11.01', '11.01']
+    sesi.prakiraan(region, use_cache=False)
+    assert len(diambil) == 3
+
+
+def test_prakiraan_kosong_tidak_disimpan(wilayah, jam, diambil):
+    sesi = Sesi(wilayah)
+    region = wilayah.get('51')
+    assert sesi.prakiraan(region) == (None, [])
+    assert sesi.prakiraan(region) == (None, [])
+    assert diambil == ['51', '51']
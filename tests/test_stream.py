@@ -0,0 +1,111 @@
+# tests/test_stream.py
+
+import json
+
+import pytest
+
+from api.cache import ResponseCache
+from api.client import BmkgClient
+from api.stream import StreamError, iter_json_array
+from utils.metrics.metrics import metrics
+
+PAYLOAD = {
+    'lokasi': {'adm2': '11.01', 'kotkab': 'Aceh Selatan'},
+    'data': [{'lokasi': {'adm4': f"11.01.01.{2001 + i}"}, 'cuaca': [[{'t': 20 + i, 'ws': 1.5e-1}]]} for i in range(5)],
+    'akhir': [1, 2, 3],
+}
+
+
+def potong(body, ukuran):
+    return [body[i:i + ukuran] for i in range(0, len(body), ukuran)]
+
+
+@pytest.mark.parametrize('ukuran', [1, 2, 7, 64, 10 ** 6])
+def test_potongan_apa_pun_sama_dengan_json_loads(ukuran):
+    body = json.dumps(PAYLOAD, ensure_ascii=False, indent=1).encode('utf-8')
+    meta = {}
+    assert list(iter_json_array(potong(body, ukuran), meta=meta)) == PAYLOAD['data']
+    assert meta == {'lokasi': PAYLOAD['lokasi'], 'akhir': PAYLOAD['akhir']}
+
+
+def test_utf8_terbelah_dan_angka_di_batas_potongan():
+    body = '{"data": [{"nama": "Désa Ñ"}, 12345, 6.5e3]}'.encode('utf-8')
+    assert list(iter_json_array(potong(body, 1))) == [{'nama': 'Désa Ñ'}, 12345, 6.5e3]
+
+
+@pytest.mark.parametrize('body', [b'{"data": []}', b'{}', b'  {"lain": null}  '])
+def test_tanpa_elemen(body):
+    assert list(iter_json_array([body])) == []
+
+
+@pytest.mark.parametrize('body', [
+    b'',
+    b'[{"a": 1}]',
+    b'{"data": [{"a": 1}, {"a": 2',
+    b'{"data": [{"a": 1}',
+    b'{"data": [{"a": 1}]',
+    b'{"data": [{"a": 1} {"a": 2}]}',
+    b'{"data": [{"a": 1}], "x" 1}',
+    b'{"data": [{"a": 1}]; "x": 1}',
+    b'{"data": [nul]}',
+])
+def test_body_rusak_atau_terpotong(body):
+    with pytest.raises(StreamError):
+        list(iter_json_array(potong(body, 3)))
+
+
+def test_elemen_lengkap_dihasilkan_sebelum_kesalahan():
+    hasil = []
+    with pytest.raises(StreamError):
+        for item in iter_json_array([b'{"data": [1, 2, ', b'3, {"a"']):
+            hasil.append(item)
+    assert hasil == [1, 2, 3]
+
+
+@pytest.mark.parametrize('isi', [
+    b'[{"lokasi": {}}]',
+    b'{"data": [{"lokasi": {"adm4": "11.01.01.2001"}}, {"lokasi": ',
+])
+def test_cache_rusak_diambil_ulang_dari_jaringan(tmp_path, mock_bmkg, metrik, isi):
+    cache = ResponseCache(str(tmp_path / 'cache'))
+    with BmkgClient(base_url=mock_bmkg, cache=cache) as client:
+        lengkap = list(client.stream_prakiraan_cuaca('adm2', '11.01'))
+        entry = client.cache.get('adm2', '11.01')
+        with open(entry.body_path, 'wb') as f:
+            f.write(isi)
+
+        meta = {}
+        hasil = list(client.stream_prakiraan_cuaca('adm2', '11.01', meta=meta))
+        assert [e['lokasi']['adm4'] for e in hasil] == [e['lokasi']['adm4'] for e in lengkap]
+        assert meta['lokasi']['adm2'] == '11.01'
+        assert metrics.snapshot()['counters']['cache.corrupt'] == 1
+        # Respons baru menggantikan entri rusak
+        assert [e['lokasi']['adm4'] for e in client.stream_prakiraan_cuaca('adm2', '11.01')] == \
+            [e['lokasi']['adm4'] for e in lengkap]
+        assert metrics.snapshot()['counters']['cache.corrupt'] == 1
+
+
+def test_cache_rusak_setelah_304(tmp_path, mock_bmkg, metrik):
+    cache = ResponseCache(str(tmp_path / 'cache'), ttl=0)
+    with BmkgClient(base_url=mock_bmkg, cache=cache) as client:
+        lengkap = list(client.stream_prakiraan_cuaca('adm2', '11.01'))
+        with open(client.cache.get('adm2', '11.01').body_path, 'wb') as f:
+            f.write(b'{"data": [')
+
+        hasil = list(client.stream_prakiraan_cuaca('adm2', '11.01'))
+        assert hasil == lengkap
+        counters = metrics.snapshot()['counters']
+        assert (counters['cache.not_modified'], counters['cache.corrupt']) == (1, 1)
+
+
+def test_fetch_cache_rusak_setelah_304(tmp_path, mock_bmkg, metrik):
+    cache = ResponseCache(str(tmp_path / 'cache'), ttl=0)
+    with BmkgClient(base_url=mock_bmkg, cache=cache) as client:
+        lengkap = client.fetch_prakiraan_cuaca('adm3', '11.01.01')
+        for fetch in (client.fetch_prakiraan_cuaca, client.refresh_prakiraan_cuaca):
+            with open(client.cache.get('adm3', '11.01.01').body_path, 'wb') as f:
+                f.write(b'{"data": [')
+            assert fetch('adm3', '11.01.01') == lengkap
+        counters = metrics.snapshot()['counters']
+        assert (counters['cache.not_modified'], counters['cache.corrupt']) == (2, 2)
+        assert client.cache.get('adm3', '11.01.01').data == lengkap
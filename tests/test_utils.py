@@ -0,0 +1,39 @@
+# tests/test_utils.py
+
+import sys
+import threading
+
+from utils.utils import impor_malas
+
+
+def test_impor_malas_modul_tidak_ada():
+    assert impor_malas('modul_yang_tidak_pernah_ada') is None
+
+
+def test_impor_malas_aman_dari_banyak_thread(tmp_path, monkeypatch):
+    # Modul yang eksekusinya lambat memperlebar jendela balapan akses pertama
+    (tmp_path / 'modul_lambat.py').write_text(
+        "import time\nhitung = 0\ntime.sleep(0.2)\ndef zeros():\n    return 0\n", encoding='utf-8'
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'modul_lambat', raising=False)
+
+    modul = impor_malas('modul_lambat')
+    assert 'modul_lambat' not in sys.modules
+    mulai = threading.Barrier(8)
+    galat = []
+
+    def pakai():
+        mulai.wait()
+        try:
+            modul.zeros()
+        except AttributeError as e:
+            galat.append(e)
+
+    threads = [threading.Thread(target=pakai) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert galat == []
+    assert modul.hitung == 0 and 'modul_lambat' in sys.modules
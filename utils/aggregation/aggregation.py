@@ -0,0 +1,134 @@
+# utils/aggregation/aggregation.py
+
+import logging
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from utils.metrics.metrics import span, timed
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def tanggal_lokal(local_datetime_str):
+    """
+    Tanggal ISO dari string 'YYYY-MM-DD HH:MM:SS', atau None jika formatnya salah.
+    Di-cache karena satu respons hanya memiliki sedikit nilai waktu berbeda
+    yang berulang di setiap lokasi.
+    """
+    try:
+        return datetime.strptime(local_datetime_str, '%Y-%m-%d %H:%M:%S').date().isoformat()
+    except ValueError:
+        logger.error(f"Format tanggal tidak valid: {local_datetime_str}")
+        return None
+
+
+class AgregatorHarian:
+    """
+    Akumulator ringkasan harian yang bisa diisi bertahap.
+
+    Setiap panggilan `tambah(entries)` menggabungkan prakiraan per jam dari satu
+    batch entri langsung ke state harian. Hasilnya sama dengan memproses semua
+    entri sekaligus, termasuk pemilihan modus: bila seri, nilai yang pertama
+    muncul pada tanggal itu yang dipilih.
+    """
+
+    def __init__(self):
+        self._harian = {}
+
+    def _state(self, tanggal):
+        state = self._harian.get(tanggal)
+        if state is None:
+            state = self._harian[tanggal] = {
+                'suhu_min': float('inf'),
+                'suhu_max': float('-inf'),
+                'kelembaban_max': 0,
+                'angin_total': 0.0,
+                'angin_count': 0,
+                'wd_freq': Counter(),
+                'kondisi_freq': Counter()
+            }
+        return state
+
+    def tambah(self, entries):
+        """
+        Prakiraan tanpa waktu lokal, dengan tanggal tidak valid, atau yang
+        kehilangan salah satu nilai (t, hu, ws, wd, weather_desc) dilewati.
+        """
+        for entry in entries:
+            for cuaca_group in entry.get('cuaca', []):
+                for forecast in cuaca_group:
+                    local_datetime_str = forecast.get('local_datetime')
+                    if not local_datetime_str:
+                        continue
+                    hari = tanggal_lokal(local_datetime_str)
+                    if hari is None:
+                        continue
+                    t = forecast.get('t')
+                    hu = forecast.get('hu')
+                    ws = forecast.get('ws')
+                    wd = forecast.get('wd')
+                    desc = forecast.get('weather_desc')
+                    if t is None or hu is None or ws is None or wd is None or desc is None:
+                        continue
+
+                    state = self._state(hari)
+                    if t < state['suhu_min']:
+                        state['suhu_min'] = t
+                    if t > state['suhu_max']:
+                        state['suhu_max'] = t
+                    if hu > state['kelembaban_max']:
+                        state['kelembaban_max'] = hu
+                    state['angin_total'] += ws
+                    state['angin_count'] += 1
+                    state['wd_freq'][wd] += 1
+                    state['kondisi_freq'][desc] += 1
+
+    def hasil(self):
+        """
+        List ringkasan harian terurut per tanggal dengan kunci: tanggal, suhu_min,
+        suhu_max, kelembaban_max, angin_avg ('N/A' jika tidak ada), angin_dir, kondisi.
+        """
+        hasil = []
+        for tanggal, info in sorted(self._harian.items()):
+            if info['suhu_min'] == float('inf') or info['suhu_max'] == float('-inf'):
+                continue  # Lewati jika tidak ada data suhu
+
+            hasil.append({
+                'tanggal': tanggal,
+                'suhu_min': info['suhu_min'],
+                'suhu_max': info['suhu_max'],
+                'kelembaban_max': info['kelembaban_max'],
+                'angin_avg': info['angin_total'] / info['angin_count'] if info['angin_count'] > 0 else 'N/A',
+                'angin_dir': info['wd_freq'].most_common(1)[0][0] if info['wd_freq'] else 'N/A',
+                'kondisi': info['kondisi_freq'].most_common(1)[0][0] if info['kondisi_freq'] else 'N/A'
+            })
+        return hasil
+
+
+@timed('aggregation')
+def agregasi_harian(entries):
+    """
+    Mengagregasi prakiraan per jam dari seluruh entri menjadi ringkasan harian.
+    """
+    agregator = AgregatorHarian()
+    agregator.tambah(entries)
+    return agregator.hasil()
+
+
+def agregasi_stream(entries):
+    """
+    Mengagregasi iterator entri lokasi satu per satu begitu tiba.
+    Mengembalikan (lokasi entri pertama, ringkasan harian), atau (None, [])
+    jika iterator kosong.
+    """
+    lokasi_info = None
+    agregator = AgregatorHarian()
+    for entry in entries:
+        if lokasi_info is None:
+            lokasi_info = entry.get('lokasi', {})
+        # Hanya kerja agregasi yang diukur; waktu menunggu stream masuk ke span fetch
+        with span('aggregation'):
+            agregator.tambah([entry])
+    with span('aggregation'):
+        return lokasi_info, agregator.hasil()
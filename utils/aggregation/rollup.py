@@ -0,0 +1,192 @@
+# utils/aggregation/rollup.py
+
+import logging
+from collections import Counter
+from utils.aggregation.aggregation import tanggal_lokal
+from utils.metrics.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+def hujan(forecast):
+    """
+    True jika satu prakiraan per jam menunjukkan hujan (kode cuaca 60-99
+    menurut BMKG, atau deskripsinya menyebut hujan).
+    """
+    code = forecast.get('weather')
+    if isinstance(code, int) and 60 <= code <= 99:
+        return True
+    return 'hujan' in (forecast.get('weather_desc') or '').lower()
+
+
+class RingkasanWilayah:
+    """
+    Statistik satu wilayah untuk satu tanggal. Bisa berasal dari satu desa
+    (daun) atau hasil penggabungan ringkasan anak-anaknya.
+    """
+    __slots__ = ('suhu_min', 'suhu_max', 'suhu_total', 'suhu_count', 'kelembaban_max',
+                 'kondisi', 'n_desa', 'n_hujan', 'terpanas')
+
+    def __init__(self):
+        self.suhu_min = float('inf')
+        self.suhu_max = float('-inf')
+        self.suhu_total = 0.0
+        self.suhu_count = 0
+        self.kelembaban_max = 0
+        self.kondisi = Counter()
+        self.n_desa = 0
+        self.n_hujan = 0
+        self.terpanas = None  # kode anak dengan suhu maksimum tertinggi
+
+    def gabung(self, other):
+        self.suhu_min = min(self.suhu_min, other.suhu_min)
+        self.suhu_max = max(self.suhu_max, other.suhu_max)
+        self.suhu_total += other.suhu_total
+        self.suhu_count += other.suhu_count
+        self.kelembaban_max = max(self.kelembaban_max, other.kelembaban_max)
+        self.kondisi.update(other.kondisi)
+        self.n_desa += other.n_desa
+        self.n_hujan += other.n_hujan
+
+    def sebagai_dict(self, tanggal):
+        return {
+            'tanggal': tanggal,
+            'suhu_min': self.suhu_min,
+            'suhu_max': self.suhu_max,
+            'suhu_rata2': self.suhu_total / self.suhu_count if self.suhu_count else 'N/A',
+            'kelembaban_max': self.kelembaban_max,
+            'kondisi': self.kondisi.most_common(1)[0][0] if self.kondisi else 'N/A',
+            'cakupan_hujan': self.n_hujan / self.n_desa if self.n_desa else 0.0,
+            'n_desa': self.n_desa,
+            'terpanas': self.terpanas,
+        }
+
+
+def ringkas_desa(entry):
+    """
+    Ringkasan per tanggal {tanggal: RingkasanWilayah} dari satu entri data[*]
+    respons API (satu desa). Prakiraan tanpa suhu atau waktu lokal dilewati.
+    """
+    harian = {}
+    for cuaca_group in entry.get('cuaca', []):
+        for forecast in cuaca_group:
+            hari = tanggal_lokal(forecast.get('local_datetime') or '')
+            t = forecast.get('t')
+            if hari is None or t is None:
+                continue
+            ringkasan = harian.get(hari)
+            if ringkasan is None:
+                ringkasan = harian[hari] = RingkasanWilayah()
+                ringkasan.n_desa = 1
+            ringkasan.suhu_min = min(ringkasan.suhu_min, t)
+            ringkasan.suhu_max = max(ringkasan.suhu_max, t)
+            ringkasan.suhu_total += t
+            ringkasan.suhu_count += 1
+            if forecast.get('hu') is not None:
+                ringkasan.kelembaban_max = max(ringkasan.kelembaban_max, forecast['hu'])
+            if forecast.get('weather_desc'):
+                ringkasan.kondisi[forecast['weather_desc']] += 1
+            if hujan(forecast):
+                ringkasan.n_hujan = 1
+    return harian
+
+
+class RollupEngine:
+    """
+    Menggabungkan prakiraan desa ke kecamatan, kabupaten/kota dan provinsi
+    mengikuti hierarki RegionStore.
+
+    Setiap wilayah menyimpan ringkasan per tanggal hasil penggabungan anak
+    langsungnya. Memperbarui satu desa hanya menghitung ulang leluhurnya,
+    masing-masing dari ringkasan anak-anaknya (biayanya sebanding jumlah anak
+    di sepanjang jalur, bukan jumlah desa dalam provinsi).
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._ringkasan = {}   # kode -> {tanggal: RingkasanWilayah}
+        self._anak = {}        # kode induk -> set kode anak yang punya data
+
+    def _leluhur(self, code):
+        return [region.code for region in self.store.ancestors(code)[:-1]]
+
+    def _hitung_ulang(self, code):
+        gabungan = {}
+        # Urut kode agar seri terpanas dan modus kondisi tidak bergantung urutan hash
+        for anak in sorted(self._anak.get(code, ())):
+            for tanggal, ringkasan in self._ringkasan.get(anak, {}).items():
+                target = gabungan.get(tanggal)
+                if target is None:
+                    target = gabungan[tanggal] = RingkasanWilayah()
+                target.gabung(ringkasan)
+                if target.terpanas is None or ringkasan.suhu_max > self._ringkasan[target.terpanas][tanggal].suhu_max:
+                    target.terpanas = anak
+        if gabungan:
+            self._ringkasan[code] = gabungan
+        else:
+            self._ringkasan.pop(code, None)
+
+    def _perbarui_leluhur(self, codes):
+        # Dari tingkat terdalam ke atas agar setiap induk memakai anak yang sudah baru
+        for code in sorted(codes, key=lambda c: -c.count('.')):
+            self._hitung_ulang(code)
+
+    def _pasang_desa(self, code, harian):
+        leluhur = self._leluhur(code)
+        if harian:
+            self._ringkasan[code] = harian
+        else:
+            self._ringkasan.pop(code, None)
+        anak = code
+        for induk in reversed(leluhur):
+            if harian:
+                self._anak.setdefault(induk, set()).add(anak)
+            else:
+                saudara = self._anak.get(induk)
+                if saudara is not None:
+                    saudara.discard(anak)
+                    if saudara:
+                        # Induk masih punya anak berdata: leluhur di atasnya tetap terhubung
+                        break
+                    del self._anak[induk]
+            anak = induk
+        return leluhur
+
+    @timed('rollup')
+    def perbarui(self, entries):
+        """
+        Memasukkan atau mengganti prakiraan sejumlah desa (entri data[*]).
+        Leluhur yang terdampak dihitung ulang sekali per batch.
+        Mengembalikan jumlah desa yang diproses.
+        """
+        terdampak = set()
+        jumlah = 0
+        for entry in entries:
+            code = entry.get('lokasi', {}).get('adm4')
+            if not code or code not in self.store:
+                logger.warning(f"Entri roll-up tanpa kode desa yang dikenal dilewati: {code}")
+                continue
+            terdampak.update(self._pasang_desa(code, ringkas_desa(entry)))
+            jumlah += 1
+        self._perbarui_leluhur(terdampak)
+        return jumlah
+
+    def hapus(self, code):
+        """
+        Mengeluarkan satu desa dari roll-up.
+        """
+        self._perbarui_leluhur(self._pasang_desa(code, {}))
+
+    def ringkasan(self, code):
+        """
+        List ringkasan per tanggal untuk sebuah kode: suhu_min, suhu_max,
+        suhu_rata2, kelembaban_max, kondisi (modus), cakupan_hujan (fraksi desa
+        yang diprakirakan hujan), n_desa dan terpanas (kode anak terpanas).
+        """
+        return [ringkasan.sebagai_dict(tanggal) for tanggal, ringkasan in sorted(self._ringkasan.get(code, {}).items())]
+
+    def anak(self, code):
+        """
+        Kode anak langsung yang sudah punya data, urut kode.
+        """
+        return sorted(self._anak.get(code, ()))
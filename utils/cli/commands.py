@@ -0,0 +1,491 @@
+# utils/cli/commands.py
+
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from api.bulk import fetch_bulk, kumpulkan_turunan
+from api.cache import ResponseCache
+from api.client import BmkgClient, base_url_aktif, cache_untuk
+from api.history import DEFAULT_HISTORY_PATH, HistoryStore, buka_riwayat_bawaan
+from api.prefetch import PrefetchDaemon, kumpulkan_target, ttl_hangat
+from api.fetch_api import fetch_prakiraan_cuaca, stream_prakiraan_cuaca
+from utils.aggregation.aggregation import agregasi_harian, agregasi_stream
+from utils.aggregation.rollup import RollupEngine
+from utils.export.export import ekspor
+from utils.display.display import ambil_entries, tampilkan_prakiraan, tampilkan_ringkasan, tampilkan_hasil_pencarian, tampilkan_rollup
+from utils.loader.lazy_loader import load_wilayah_lazy
+from utils.loader.region import ADM_CODES, ADM_LEVELS, LEVELS
+from utils.metrics.metrics import metrics
+from utils.search.search import muat_search_index, cari_wilayah
+from utils.session.session import lokasi_wilayah
+from utils.utils import console, console_err
+
+logger = logging.getLogger(__name__)
+
+DATA_WILAYAH = 'data/base.csv'
+
+
+def ringkasan_harian(data):
+    """
+    Agregasi harian dari respons API, atau None jika respons kosong/gagal.
+    """
+    entries = ambil_entries(data) if data else None
+    if not entries:
+        return None
+    return agregasi_harian(entries)
+
+
+def resolve_wilayah(wilayah, query):
+    """
+    Mengubah argumen wilayah menjadi Region.
+    Argumen berupa kode (mis. 11.01.02.2005) dicari langsung; selain itu
+    dianggap jalur nama yang dipisah '/' (mis. "Aceh/Aceh Selatan/Kluet Utara").
+    Setiap segmen dicocokkan tanpa membedakan huruf besar-kecil: nama persis
+    diutamakan, lalu awalan atau potongan nama yang unik.
+    Hanya cabang yang dilalui jalur tersebut yang dimuat.
+    """
+    query = query.strip()
+    if query.replace('.', '').isdigit():
+        return wilayah.get(query)
+
+    region = None
+    for segmen in filter(None, (part.strip().lower() for part in query.split('/'))):
+        anak = wilayah.children(region.code if region else None)
+        cocok = [r for r in anak if r.name.lower() == segmen]
+        if not cocok:
+            cocok = [r for r in anak if r.name.lower().startswith(segmen)]
+        if not cocok:
+            cocok = [r for r in anak if segmen in r.name.lower()]
+        if len(cocok) != 1:
+            return None
+        region = cocok[0]
+    return region
+
+
+def cmd_forecast(args):
+    """
+    Menampilkan prakiraan harian untuk satu wilayah tanpa menu interaktif.
+    """
+    if args.cari:
+        wilayah, index = muat_search_index(DATA_WILAYAH)
+        hasil = cari_wilayah(wilayah, index, args.wilayah, limit=1)
+        region = wilayah.get(hasil[0]['kode']) if hasil else None
+    else:
+        wilayah = load_wilayah_lazy(DATA_WILAYAH)
+        region = resolve_wilayah(wilayah, args.wilayah)
+    if region is None:
+        console_err.print(f"[bold red]Wilayah {args.wilayah} tidak ditemukan atau ambigu.[/bold red]")
+        return 1
+
+    adm_level_code = ADM_LEVELS[region.level]['code']
+    if args.stream:
+        meta = {}
+        entries = stream_prakiraan_cuaca(adm_level_code, region.code, use_cache=not args.no_cache, meta=meta)
+        lokasi_info, harian = agregasi_stream(entries)
+        lokasi = meta.get('lokasi')
+    else:
+        data = fetch_prakiraan_cuaca(adm_level_code, region.code, use_cache=not args.no_cache)
+        entries = ambil_entries(data) if data else None
+        lokasi_info = entries[0].get('lokasi', {}) if entries else None
+        harian = agregasi_harian(entries) if entries else []
+        lokasi = data.get('lokasi') if isinstance(data, dict) else None
+    if lokasi_info is not None:
+        # Blok lokasi tingkat atas, bukan desa pertama, untuk wilayah adm1-adm3
+        lokasi_info = lokasi_wilayah(lokasi or lokasi_info, region.level)
+
+    if args.json:
+        print(json.dumps({
+            'kode': region.code,
+            'nama': region.name,
+            'tingkat': adm_level_code,
+            'lokasi': lokasi_info,
+            'harian': harian if lokasi_info is not None else None,
+        }, ensure_ascii=False))
+    elif lokasi_info is None:
+        console_err.print("[bold red]Tidak ada data prakiraan cuaca yang tersedia.[/bold red]")
+    else:
+        tampilkan_ringkasan(lokasi_info, harian, region.level)
+    return 0 if lokasi_info is not None else 1
+
+
+def cari_interaktif(wilayah, index, levels=None, limit=10):
+    """
+    Prompt pencarian interaktif: ketik nama, pilih nomor hasil untuk melihat
+    prakiraan cuacanya. Kosongkan input untuk keluar.
+    """
+    from rich.prompt import Prompt
+    while True:
+        query = Prompt.ask("[bold cyan]🔍 Cari wilayah (kosongkan untuk keluar)[/bold cyan]", default="", show_default=False)
+        if not query.strip():
+            return
+        hasil = cari_wilayah(wilayah, index, query, limit=limit, levels=levels)
+        tampilkan_hasil_pencarian(hasil)
+        if not hasil:
+            continue
+
+        pilihan = Prompt.ask(
+            f"[bold cyan]Pilih nomor untuk melihat prakiraan (1-{len(hasil)}), kosongkan untuk cari lagi[/bold cyan]",
+            default="", show_default=False
+        )
+        if pilihan.isdigit() and 1 <= int(pilihan) <= len(hasil):
+            item = hasil[int(pilihan) - 1]
+            data = fetch_prakiraan_cuaca(ADM_LEVELS[item['tingkat']]['code'], item['kode'])
+            tampilkan_prakiraan(data, item['tingkat'], ADM_LEVELS)
+
+
+def cmd_search(args):
+    """
+    Mencari wilayah berdasarkan nama (toleran terhadap salah ketik).
+    Tanpa kueri, membuka prompt pencarian interaktif.
+    """
+    wilayah, index = muat_search_index(DATA_WILAYAH)
+    levels = {LEVELS[level] for level in args.level} if args.level else None
+
+    if not args.query:
+        cari_interaktif(wilayah, index, levels=levels, limit=args.limit)
+        return 0
+
+    hasil = cari_wilayah(wilayah, index, ' '.join(args.query), limit=args.limit, levels=levels)
+    if args.json:
+        print(json.dumps(hasil, ensure_ascii=False))
+    else:
+        tampilkan_hasil_pencarian(hasil)
+    return 0 if hasil else 1
+
+
+def cmd_bulk(args):
+    """
+    Mengambil prakiraan seluruh kecamatan/desa di bawah satu kode wilayah
+    secara paralel dan mencetak hasilnya satu per satu begitu selesai.
+    """
+    wilayah = load_wilayah_lazy(DATA_WILAYAH)
+    try:
+        regions = kumpulkan_turunan(wilayah, args.kode, LEVELS[args.level])
+    except KeyError:
+        console_err.print(f"[bold red]Kode wilayah {args.kode} tidak ditemukan.[/bold red]")
+        return 1
+
+    if not args.json:
+        console.print(f"[bold cyan]Mengambil prakiraan untuk {len(regions)} wilayah...[/bold cyan]")
+
+    cache = None if args.no_cache else ResponseCache()
+    gagal = 0
+    with BmkgClient(cache=cache, pool_maxsize=args.concurrency, history=buka_riwayat_bawaan()) as client:
+        hasil = fetch_bulk(regions, client=client, concurrency=args.concurrency, rate=args.rate)
+        for nomor, (region, data) in enumerate(hasil, start=1):
+            harian = ringkasan_harian(data)
+            if harian is None:
+                gagal += 1
+
+            if args.json:
+                print(json.dumps({
+                    'kode': region.code,
+                    'nama': region.name,
+                    'tingkat': ADM_CODES[region.level],
+                    'harian': harian,
+                }, ensure_ascii=False), flush=True)
+            elif harian:
+                hari = harian[0]
+                console.print(
+                    f"[yellow][{nomor}/{len(regions)}][/yellow] {region.code} [bold]{region.name}[/bold]: "
+                    f"{hari['tanggal']} {hari['suhu_min']}°C - {hari['suhu_max']}°C, {hari['kondisi']}"
+                )
+            else:
+                console.print(
+                    f"[yellow][{nomor}/{len(regions)}][/yellow] {region.code} [bold]{region.name}[/bold]: "
+                    f"[bold red]tidak ada data[/bold red]"
+                )
+
+    if not args.json:
+        console.print(f"[bold green]Selesai: {len(regions) - gagal} berhasil, {gagal} gagal.[/bold green]")
+    return 1 if gagal else 0
+
+
+def cmd_mock_server(args):
+    """
+    Menjalankan server tiruan API BMKG untuk uji coba dan benchmark tanpa jaringan.
+    """
+    from api.mock_server import buat_server, base_url
+    wilayah = load_wilayah_lazy(DATA_WILAYAH)
+    server = buat_server(
+        wilayah, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, maks_lokasi=args.maks_lokasi, hari=args.hari,
+        fixtures_dir=args.fixtures
+    )
+    console.print(f"[bold green]Server tiruan BMKG berjalan di {base_url(server)}[/bold green]")
+    console.print(f"[bold cyan]Arahkan klien dengan --base-url {base_url(server)} atau BMKG_API_BASE_URL.[/bold cyan]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def cmd_serve(args):
+    """
+    Menjalankan layanan HTTP (asyncio) untuk pencarian, daftar wilayah dan
+    prakiraan harian. Data wilayah dimuat sekali saat server mulai.
+    """
+    import asyncio
+    from api.server import ApiServer
+
+    wilayah, index = muat_search_index(DATA_WILAYAH)
+    cache = None if args.no_cache else ResponseCache()
+    client = BmkgClient(cache=cache, pool_maxsize=args.workers, history=buka_riwayat_bawaan())
+    server = ApiServer(wilayah, index, client=client, workers=args.workers, cache_size=args.cache_size, ttl=args.ttl)
+    metrics.aktifkan()
+
+    def siap(host, port):
+        # flush: benchmarks/loadtest.py membaca baris ini untuk mengetahui port
+        print(f"Server API berjalan di http://{host}:{port}", flush=True)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, siap=siap))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _waktu(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d %H:%M UTC') if ts is not None else '-'
+
+
+def cmd_history(args):
+    """
+    Membaca dan merawat riwayat prakiraan lokal tanpa mengakses API.
+    """
+    path = args.path or os.environ.get('BMKG_HISTORY_PATH') or DEFAULT_HISTORY_PATH
+    with HistoryStore(path) as history:
+        if args.aksi == 'query':
+            if args.mulai:
+                mulai = int(datetime.strptime(args.mulai, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+            else:
+                mulai = int(time.time()) // 3600 * 3600
+            level = LEVELS[args.level] if args.level else None
+            entries = history.rentang(args.kode, mulai, mulai + args.hari * 86400, level=level)
+            for entry in entries:
+                lokasi = entry['lokasi']
+                kode = next((lokasi[adm] for adm in ('adm4', 'adm3', 'adm2', 'adm1') if lokasi.get(adm)), None)
+                nama = lokasi.get('desa') or lokasi.get('kecamatan') or lokasi.get('kotkab') or lokasi.get('provinsi') or ''
+                analysis = entry['cuaca'][0][0]['analysis_date']
+                harian = agregasi_harian([entry])
+                if args.json:
+                    print(json.dumps({'kode': kode, 'nama': nama, 'analysis_date': analysis, 'harian': harian}, ensure_ascii=False))
+                else:
+                    ringkas = ", ".join(f"{hari['tanggal']} {hari['suhu_min']}-{hari['suhu_max']}°C {hari['kondisi']}" for hari in harian)
+                    console.print(f"{kode} [bold]{nama}[/bold] [dim](analisis {analysis})[/dim]: {ringkas}")
+            if not entries and not args.json:
+                console_err.print(f"[bold red]Tidak ada riwayat untuk {args.kode} pada rentang tersebut.[/bold red]")
+            return 0 if entries else 1
+
+        if args.aksi == 'versi':
+            versi = history.versi(args.kode)
+            if args.json:
+                print(json.dumps(versi))
+            elif not versi:
+                console_err.print(f"[bold red]Tidak ada riwayat untuk {args.kode}.[/bold red]")
+            for item in ([] if args.json else versi):
+                console.print(f"analisis {_waktu(item['analysis_ts'])}, diambil {_waktu(item['fetched_ts'])}, {item['baris']} baris")
+            return 0 if versi else 1
+
+        if args.aksi == 'compact':
+            dihapus = history.kompaksi(retensi_hari=args.retensi_hari, maks_rilis=args.maks_rilis, vacuum=not args.no_vacuum)
+            console.print(f"[bold green]{dihapus} rilis dihapus.[/bold green]")
+            return 0
+
+        stat = history.statistik()
+        if args.json:
+            print(json.dumps(stat))
+        else:
+            console.print(
+                f"{stat['wilayah']} wilayah, {stat['rilis']} rilis, {stat['baris']} baris prakiraan, "
+                f"{stat['bytes'] / 1024 / 1024:.1f} MB; analisis {_waktu(stat['analysis_pertama'])} s.d. {_waktu(stat['analysis_terakhir'])}"
+            )
+        return 0
+
+
+def cmd_daemon(args):
+    """
+    Menghangatkan cache secara terjadwal untuk wilayah yang sering dibuka.
+    """
+    wilayah = load_wilayah_lazy(DATA_WILAYAH)
+    try:
+        regions = kumpulkan_target(wilayah, args.kode, kedalaman=args.kedalaman)
+    except KeyError as e:
+        console_err.print(f"[bold red]Kode wilayah {e.args[0]} tidak ditemukan.[/bold red]")
+        return 1
+    jam_utc = args.jam
+    tunda, jitter = args.tunda_menit * 60, args.jitter_menit * 60
+    # Entri yang ditulis daemon harus tetap segar sampai putaran berikutnya,
+    # termasuk bagi proses lain yang membaca cache dengan ttl bawaan
+    cache = ResponseCache(ttl_entri=ttl_hangat(jam_utc, tunda, jitter))
+
+    console.print(f"[bold cyan]Prefetch {len(regions)} wilayah pada jam {', '.join(f'{jam:02d}' for jam in jam_utc)} UTC "
+                  f"(+{args.tunda_menit:g} menit, jitter {args.jitter_menit:g} menit).[/bold cyan]")
+    with BmkgClient(cache=cache, pool_maxsize=args.concurrency, history=buka_riwayat_bawaan()) as client:
+        daemon = PrefetchDaemon(
+            regions, client=client, concurrency=args.concurrency, rate=args.rate,
+            jam_utc=jam_utc, tunda=tunda, jitter=jitter
+        )
+        if args.sekali:
+            _, gagal = daemon.jalankan_sekali()
+            return 1 if gagal else 0
+        try:
+            daemon.jalankan(segera=not args.tunggu)
+        except KeyboardInterrupt:
+            daemon.stop()
+    return 0
+
+
+def prakiraan_desa_tersimpan(desa, prefix, client=None, fetch=False, concurrency=8, rate=5.0):
+    """
+    Entri data[*] untuk daftar desa, diambil dari riwayat lokal lalu cache
+    respons tanpa akses jaringan. Dengan `fetch`, desa yang belum punya data
+    diambil dari API lewat `client`. Mengembalikan dict kode -> entri.
+    """
+    entries = {}
+    history = buka_riwayat_bawaan()
+    if history is not None:
+        with history:
+            for entry in history.rentang(prefix, level=4):
+                entries[entry['lokasi'].get('adm4')] = entry
+
+    cache = client.cache if client is not None else cache_untuk(ResponseCache(), base_url_aktif())
+    kurang = []
+    for region in desa:
+        if region.code in entries:
+            continue
+        item = cache.get('adm4', region.code) if cache is not None else None
+        data = None
+        if item is not None:
+            try:
+                data = item.data
+            except (OSError, ValueError) as e:
+                logger.warning(f"Entri cache {region.code} tidak dapat dibaca: {e}")
+        data_entries = ambil_entries(data) if data else None
+        if data_entries:
+            entries[region.code] = data_entries[0]
+        else:
+            kurang.append(region)
+
+    if fetch and kurang:
+        for region, data in fetch_bulk(kurang, client=client, concurrency=concurrency, rate=rate):
+            data_entries = ambil_entries(data) if data else None
+            if data_entries:
+                entries[region.code] = data_entries[0]
+    return entries
+
+
+def cmd_rollup(args):
+    """
+    Ringkasan spasial kecamatan/kabupaten/provinsi dari prakiraan desa yang
+    sudah tersimpan (riwayat dan cache), mis. cakupan hujan dan anak terpanas.
+    """
+    wilayah = load_wilayah_lazy(DATA_WILAYAH)
+    region = resolve_wilayah(wilayah, args.wilayah)
+    if region is None:
+        console_err.print(f"[bold red]Wilayah {args.wilayah} tidak ditemukan atau ambigu.[/bold red]")
+        return 1
+
+    desa = kumpulkan_turunan(wilayah, region.code, 4)
+    with BmkgClient(cache=ResponseCache(), pool_maxsize=args.concurrency, history=buka_riwayat_bawaan()) as client:
+        entries = prakiraan_desa_tersimpan(desa, region.code, client=client, fetch=args.fetch,
+                                           concurrency=args.concurrency, rate=args.rate)
+    engine = RollupEngine(wilayah)
+    engine.perbarui(entries.values())
+
+    nama = {item.code: item.name for item in [region] + wilayah.children(region.code)}
+    harian = engine.ringkasan(region.code)
+    for info in harian:
+        info['terpanas_nama'] = nama.get(info['terpanas'])
+    anak = [(nama.get(code, code), engine.ringkasan(code)) for code in engine.anak(region.code)]
+
+    if args.json:
+        print(json.dumps({
+            'kode': region.code,
+            'nama': region.name,
+            'desa_total': len(desa),
+            'desa_berdata': len(entries),
+            'harian': harian,
+            'anak': [{'nama': n, 'harian': h} for n, h in anak],
+        }, ensure_ascii=False))
+    elif not harian:
+        console_err.print(f"[bold red]Belum ada prakiraan desa tersimpan untuk {region.name}; coba --fetch.[/bold red]")
+    else:
+        console.print(f"[dim]{len(entries)} dari {len(desa)} desa punya data tersimpan.[/dim]")
+        nama_anak = ADM_LEVELS[region.level + 1]['name'] if region.level < 4 else 'Desa'
+        tampilkan_rollup(region.name, harian, [(n, h[0]) for n, h in anak if h], nama_anak)
+    return 0 if harian else 1
+
+
+def cmd_export(args):
+    """
+    Ekspor ringkasan harian banyak wilayah ke file CSV/JSON Lines/Parquet
+    bershard memakai beberapa proses. Menjalankan ulang perintah yang sama
+    melanjutkan ekspor yang terputus dari checkpoint di direktori keluaran.
+    """
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            console_err.print("[bold red]Format parquet membutuhkan paket pyarrow (pip install pyarrow).[/bold red]")
+            return 1
+
+    kode = list(args.kode)
+    if args.kode_file:
+        with open(args.kode_file, encoding='utf-8') as f:
+            kode.extend(baris.strip() for baris in f if baris.strip() and not baris.startswith('#'))
+    if not kode:
+        console_err.print("[bold red]Berikan minimal satu kode wilayah atau --kode-file.[/bold red]")
+        return 1
+
+    wilayah = load_wilayah_lazy(DATA_WILAYAH)
+    regions = []
+    terlihat = set()
+    for item in kode:
+        try:
+            turunan = kumpulkan_turunan(wilayah, item, LEVELS[args.level])
+        except KeyError:
+            console_err.print(f"[bold red]Kode wilayah {item} tidak ditemukan.[/bold red]")
+            return 1
+        for region in turunan:
+            if region.code not in terlihat:
+                terlihat.add(region.code)
+                regions.append(region)
+
+    nomor = 0
+
+    def progress(kode, berhasil):
+        nonlocal nomor
+        nomor += 1
+        if nomor % args.laporan_setiap == 0:
+            console.print(f"[yellow][{nomor}/{len(regions)}][/yellow] diproses")
+
+    console.print(f"[bold cyan]Mengekspor {len(regions)} wilayah ke {args.output} ({args.format})...[/bold cyan]")
+    try:
+        hasil = ekspor(
+            regions, args.output, fmt=args.format, workers=args.workers, concurrency=args.concurrency,
+            rate=args.rate, batch=args.batch, shard_size=args.shard_size, use_cache=not args.no_cache,
+            progress=progress
+        )
+    except ValueError as e:
+        console_err.print(f"[bold red]{e}[/bold red]")
+        return 1
+    except KeyboardInterrupt:
+        console.print("[bold yellow]Ekspor dihentikan; jalankan ulang perintah yang sama untuk melanjutkan.[/bold yellow]")
+        return 130
+
+    if hasil['dilewati']:
+        console.print(f"[dim]{hasil['dilewati']} wilayah sudah diekspor sebelumnya dan dilewati.[/dim]")
+    console.print(
+        f"[bold green]Selesai: {hasil['berhasil']} berhasil, {len(hasil['gagal'])} gagal, "
+        f"{hasil['baris']} baris dalam {hasil['shard']} shard baru.[/bold green]"
+    )
+    if hasil['gagal']:
+        console_err.print(f"[bold red]Gagal: {', '.join(hasil['gagal'][:20])}{' ...' if len(hasil['gagal']) > 20 else ''}[/bold red]")
+        console.print("[dim]Jalankan ulang perintah yang sama untuk mencoba lagi wilayah yang gagal.[/dim]")
+    return 1 if hasil['gagal'] else 0
@@ -1,36 +1,79 @@
-from collections import defaultdict, Counter
-from datetime import datetime
-from tabulate import tabulate
-from rich.console import Console
-from rich.prompt import Prompt, Confirm
+# rich.table, rich.prompt dan tabulate diimpor di dalam fungsi yang memakainya
+# agar perintah non-interaktif (mis. --json) tidak membayar biaya impornya.
+from utils.aggregation.aggregation import agregasi_harian
+from utils.metrics.metrics import span, timed
 from utils.display.header import pilih_provinsi_header, pilih_kabupaten_header, pilih_kecamatan_header, pilih_kelurahan_header
+from utils.utils import console
 import logging
 
 logger = logging.getLogger(__name__)
-console = Console()
+
+HEADER_MENU = {
+    'Provinsi': pilih_provinsi_header,
+    'Kabupaten/Kota': pilih_kabupaten_header,
+    'Kecamatan': pilih_kecamatan_header,
+    'Kelurahan/Desa': pilih_kelurahan_header,
+}
+
+# Jumlah baris per halaman menu; kolom menyesuaikan lebar terminal
+BARIS_PER_HALAMAN = 20
+
+def tabel_menu(options, start, end, kolom):
+    """
+    Satu tabel grid berisi opsi [start, end) bernomor, diisi per kolom dari atas ke bawah.
+    """
+    from rich.table import Table
+    table = Table.grid(padding=(0, 3))
+    for _ in range(kolom):
+        table.add_column(no_wrap=True)
+    baris = -(-(end - start) // kolom)
+    for r in range(baris):
+        sel = []
+        for c in range(kolom):
+            idx = start + c * baris + r
+            if idx < end:
+                sel.append(f"[yellow]{idx + 1:>{len(str(len(options)))}}.[/yellow] {options[idx][1]}")
+        table.add_row(*sel)
+    return table
 
 def display_menu(options, adm_level_name):
     """
     Menampilkan menu pilihan dan mengembalikan kode yang dipilih.
+    Opsi dicetak sebagai satu tabel per halaman (bukan satu print per baris);
+    daftar panjang bisa digeser dengan 'n' (berikutnya) dan 'p' (sebelumnya).
     """
-    if adm_level_name == "Provinsi":
-        pilih_provinsi_header()
-    elif adm_level_name == "Kabupaten/Kota":
-        pilih_kabupaten_header()
-    elif adm_level_name == "Kecamatan":
-        pilih_kecamatan_header()
-    elif adm_level_name == "Kelurahan":
-        pilih_kelurahan_header()
-    for idx, (code, name) in enumerate(options, start=1):
-        console.print(f"[yellow]{idx}.[/yellow] {name}")
+    from rich.prompt import Prompt
+    header = HEADER_MENU.get(adm_level_name)
+    if header is not None:
+        header()
+
+    lebar_opsi = max(len(name) for _, name in options) + len(str(len(options))) + 5
+    kolom = max(1, min(4, console.width // lebar_opsi))
+    per_halaman = kolom * BARIS_PER_HALAMAN
+    jumlah_halaman = -(-len(options) // per_halaman)
+    halaman = 0
+    tampilkan = True
 
     while True:
+        if tampilkan:
+            start = halaman * per_halaman
+            end = min(start + per_halaman, len(options))
+            with span('render.menu'):
+                console.print(tabel_menu(options, start, end, kolom))
+            if jumlah_halaman > 1:
+                console.print(f"[dim]Halaman {halaman + 1}/{jumlah_halaman} — ketik 'n' untuk halaman berikutnya, 'p' untuk sebelumnya.[/dim]")
+            tampilkan = False
         try:
             pilihan = Prompt.ask(
     f"[bold cyan]🔍 Masukkan pilihan {adm_level_name} (1-{len(options)}) 🔍:[/bold cyan]",
     default="1",
     show_default=True
 )
+            if jumlah_halaman > 1 and pilihan.strip().lower() in ('n', 'p'):
+                langkah = 1 if pilihan.strip().lower() == 'n' else -1
+                halaman = (halaman + langkah) % jumlah_halaman
+                tampilkan = True
+                continue
             pilihan = int(pilihan)
             if 1 <= pilihan <= len(options):
                 selected_code = options[pilihan - 1][0]
@@ -41,6 +84,36 @@ def display_menu(options, adm_level_name):
         except ValueError:
             console.print("[bold red]Input tidak valid. Harap masukkan angka yang sesuai.[/bold red]")
 
+@timed('render')
+def tampilkan_hasil_pencarian(hasil):
+    """
+    Menampilkan hasil pencarian wilayah sebagai satu tabel bernomor.
+    """
+    from rich.table import Table
+    if not hasil:
+        console.print("[bold red]Wilayah tidak ditemukan.[/bold red]")
+        return
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("No", style="yellow", justify="right")
+    table.add_column("Kode", style="cyan")
+    table.add_column("Wilayah")
+    for idx, item in enumerate(hasil, start=1):
+        jalur = " › ".join(item['jalur'][:-1])
+        nama = f"[bold]{item['nama']}[/bold]" + (f" [dim]({jalur})[/dim]" if jalur else "")
+        table.add_row(str(idx), item['kode'], nama)
+    console.print(table)
+
+def ambil_entries(data):
+    """
+    Mengambil list entri lokasi dari respons API (dict dengan key 'data' atau list).
+    Mengembalikan None jika strukturnya tidak dikenali.
+    """
+    if isinstance(data, dict):
+        return data.get('data', [])
+    if isinstance(data, list):
+        return data
+    return None
+
 def tampilkan_prakiraan(data, tingkat, adm_levels):
     """
     Memproses dan menampilkan data prakiraan cuaca dengan format yang lebih rapi.
@@ -51,11 +124,8 @@ def tampilkan_prakiraan(data, tingkat, adm_levels):
         return
 
     # Asumsikan data mengandung list prakiraan di key 'data'
-    if isinstance(data, dict):
-        entries = data.get('data', [])
-    elif isinstance(data, list):
-        entries = data
-    else:
+    entries = ambil_entries(data)
+    if entries is None:
         logger.error("Struktur data tidak dikenali.")
         console.print("[bold red]Struktur data tidak dikenali.[/bold red]")
         return
@@ -64,8 +134,14 @@ def tampilkan_prakiraan(data, tingkat, adm_levels):
         console.print("[bold red]Tidak ada data prakiraan cuaca yang tersedia.[/bold red]")
         return
 
+    tampilkan_ringkasan(entries[0].get('lokasi', {}), agregasi_harian(entries), tingkat)
+
+@timed('render')
+def tampilkan_ringkasan(lokasi_info, harian, tingkat):
+    """
+    Menampilkan informasi lokasi dan tabel ringkasan harian hasil agregasi.
+    """
     # Ambil informasi lokasi
-    lokasi_info = entries[0].get('lokasi', {})
     provinsi = lokasi_info.get('provinsi', 'N/A')
     kotkab = lokasi_info.get('kotkab', 'N/A')
     kecamatan = lokasi_info.get('kecamatan', 'N/A')
@@ -96,87 +172,21 @@ def tampilkan_prakiraan(data, tingkat, adm_levels):
     console.print(f"[bold green]Kelurahan/Desa     :[/bold green] {desa}")
     console.print("[bold blue]==========================[/bold blue]\n")
 
-    # Menyiapkan struktur data untuk agregasi harian
-    prakiraan_harian = defaultdict(lambda: {
-        'suhu_min': float('inf'),
-        'suhu_max': float('-inf'),
-        'kelembaban_max': 0,
-        'angin_total': 0.0,
-        'angin_count': 0,
-        'wd_freq': Counter(),
-        'kondisi_freq': Counter()
-    })
-
-    for entry in entries:
-        cuaca_list = entry.get('cuaca', [])
-        for cuaca_group in cuaca_list:
-            for forecast in cuaca_group:
-                local_datetime_str = forecast.get('local_datetime')
-                if not local_datetime_str:
-                    continue  # Lewati jika tidak ada waktu lokal
-
-                try:
-                    local_datetime = datetime.strptime(local_datetime_str, '%Y-%m-%d %H:%M:%S')
-                    tanggal = local_datetime.date().isoformat()
-                except ValueError:
-                    logger.error(f"Format tanggal tidak valid: {local_datetime_str}")
-                    console.print(f"[bold red]Format tanggal tidak valid: {local_datetime_str}[/bold red]")
-                    continue
-
-                suhu = forecast.get('t')
-                kelembaban = forecast.get('hu')
-                angin_speed = forecast.get('ws')
-                angin_dir = forecast.get('wd')
-                kondisi = forecast.get('weather_desc')
-
-                if suhu is None or kelembaban is None or angin_speed is None or angin_dir is None or kondisi is None:
-                    continue  # Lewati jika data penting tidak ada
-
-                prakiraan = prakiraan_harian[tanggal]
-
-                # Update suhu_min dan suhu_max
-                if suhu < prakiraan['suhu_min']:
-                    prakiraan['suhu_min'] = suhu
-                if suhu > prakiraan['suhu_max']:
-                    prakiraan['suhu_max'] = suhu
-
-                # Update kelembaban_max
-                if kelembaban > prakiraan['kelembaban_max']:
-                    prakiraan['kelembaban_max'] = kelembaban
-
-                # Update angin_total dan angin_count
-                prakiraan['angin_total'] += angin_speed
-                prakiraan['angin_count'] += 1
-
-                # Update arah angin
-                prakiraan['wd_freq'][angin_dir] += 1
-
-                # Update kondisi cuaca
-                prakiraan['kondisi_freq'][kondisi] += 1
-
     # Menyiapkan data untuk tabel
     tabel_prakiraan = []
-    for tanggal, info in sorted(prakiraan_harian.items()):
-        if info['suhu_min'] == float('inf') or info['suhu_max'] == float('-inf'):
-            continue  # Lewati jika tidak ada data suhu
-
-        suhu_min = info['suhu_min']
-        suhu_max = info['suhu_max']
-        kelembaban_max = info['kelembaban_max']
-        angin_avg = info['angin_total'] / info['angin_count'] if info['angin_count'] > 0 else 'N/A'
-        angin_dir = info['wd_freq'].most_common(1)[0][0] if info['wd_freq'] else 'N/A'
-        kondisi = info['kondisi_freq'].most_common(1)[0][0] if info['kondisi_freq'] else 'N/A'
-
+    for info in harian:
+        angin_avg = info['angin_avg']
         tabel_prakiraan.append([
-            tanggal,
-            f"{suhu_min}°C - {suhu_max}°C",
-            f"{kelembaban_max}%",
-            f"{angin_avg:.1f} km/jam dari {angin_dir}" if angin_avg != 'N/A' else "N/A",
-            kondisi
+            info['tanggal'],
+            f"{info['suhu_min']}°C - {info['suhu_max']}°C",
+            f"{info['kelembaban_max']}%",
+            f"{angin_avg:.1f} km/jam dari {info['angin_dir']}" if angin_avg != 'N/A' else "N/A",
+            info['kondisi']
         ])
 
     # Buat tabel menggunakan tabulate dengan style 'rounded_grid'
     if tabel_prakiraan:
+        from tabulate import tabulate
         headers = ["Tanggal", "Suhu", "Kelembaban Maksimal", "Angin", "Kondisi Cuaca"]
         table = tabulate(tabel_prakiraan, headers=headers, tablefmt="rounded_grid")
         console.print("[bold magenta]Prakiraan Cuaca Harian:[/bold magenta]")
@@ -185,3 +195,44 @@ def tampilkan_prakiraan(data, tingkat, adm_levels):
         console.print("[bold red]Tidak ada data prakiraan cuaca yang tersedia.[/bold red]")
 
     console.print("\n")
+
+@timed('render')
+def tampilkan_rollup(judul, harian, anak, nama_anak):
+    """
+    Menampilkan hasil roll-up: ringkasan harian wilayah dan rincian per anak
+    (`anak` berisi (nama, ringkasan hari pertama)) untuk tanggal pertama.
+    """
+    from rich.table import Table
+    console.print(f"\n[bold blue]===== Roll-up {judul} =====[/bold blue]")
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Tanggal")
+    table.add_column("Suhu", justify="right")
+    table.add_column("Rata-rata", justify="right")
+    table.add_column("Hujan", justify="right")
+    table.add_column("Kondisi Dominan")
+    table.add_column(f"{nama_anak} Terpanas")
+    table.add_column("Desa", justify="right")
+    for info in harian:
+        rata2 = info['suhu_rata2']
+        table.add_row(
+            info['tanggal'],
+            f"{info['suhu_min']}°C - {info['suhu_max']}°C",
+            f"{rata2:.1f}°C" if rata2 != 'N/A' else "N/A",
+            f"{info['cakupan_hujan']:.0%}",
+            info['kondisi'],
+            info['terpanas_nama'] or '-',
+            str(info['n_desa']),
+        )
+    console.print(table)
+
+    if not anak:
+        return
+    console.print(f"\n[bold blue]Rincian per {nama_anak} ({harian[0]['tanggal']})[/bold blue]")
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column(nama_anak)
+    table.add_column("Suhu", justify="right")
+    table.add_column("Hujan", justify="right")
+    table.add_column("Kondisi Dominan")
+    for nama, info in anak:
+        table.add_row(nama, f"{info['suhu_min']}°C - {info['suhu_max']}°C", f"{info['cakupan_hujan']:.0%}", info['kondisi'])
+    console.print(table)
@@ -1,9 +1,25 @@
 
-from rich.console import Console
-console = Console()
+from functools import lru_cache
+from utils.utils import console, terminal_interaktif
+
+@lru_cache(maxsize=None)
+def _render_banner(markup):
+    from rich.text import Text
+    return Text.from_markup(markup)
+
+def tampilkan_banner(markup):
+    """
+    Mencetak banner ASCII hanya jika keluaran menuju terminal. Markup tiap
+    banner di-parse sekali lalu dipakai ulang setiap kali menu ditampilkan.
+    Mengembalikan True jika banner dicetak.
+    """
+    if not terminal_interaktif():
+        return False
+    console.print(_render_banner(markup))
+    return True
 
 def opening_header():
-    console.print("""[bold red]
+    return tampilkan_banner("""[bold red]
 ⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢀⣀⣤⣄⣀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
 ⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⣠⣾⣿⣿⣿⣿⣿⣿⣦⡀⠀⠀⠀⠀⠀⠀⠀
 ⠀⠀⠀⠀⠀⣠⣾⣿⣿⣶⣄⠀⣸⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⡆⠀⠀⠀⠀⠀⠀
@@ -71,7 +87,7 @@ def opening_header():
     
 
 def pilih_provinsi_header():
-    console.print("""
+    tampilkan_banner("""
 [bold red]
 ██████╗░██╗██╗░░░░░██╗██╗░░██╗  ██████╗░██████╗░░█████╗░██╗░░░██╗██╗███╗░░██╗░██████╗██╗
 ██╔══██╗██║██║░░░░░██║██║░░██║  ██╔══██╗██╔══██╗██╔══██╗██║░░░██║██║████╗░██║██╔════╝██║
@@ -84,7 +100,7 @@ def pilih_provinsi_header():
 """)
     
 def pilih_kabupaten_header():
-    console.print("""
+    tampilkan_banner("""
 [bold red]
 ██████╗░██╗██╗░░░░░██╗██╗░░██╗  ██╗░░██╗░█████╗░██████╗░██╗░░░██╗██████╗░░█████╗░████████╗███████╗███╗░░██╗
 ██╔══██╗██║██║░░░░░██║██║░░██║  ██║░██╔╝██╔══██╗██╔══██╗██║░░░██║██╔══██╗██╔══██╗╚══██╔══╝██╔════╝████╗░██║
@@ -97,7 +113,7 @@ def pilih_kabupaten_header():
 """)   
     
 def pilih_kecamatan_header():
-    console.print("""
+    tampilkan_banner("""
 [bold red]
 ██████╗░██╗██╗░░░░░██╗██╗░░██╗  ██╗░░██╗███████╗░█████╗░░█████╗░███╗░░░███╗░█████╗░████████╗░█████╗░███╗░░██╗
 ██╔══██╗██║██║░░░░░██║██║░░██║  ██║░██╔╝██╔════╝██╔══██╗██╔══██╗████╗░████║██╔══██╗╚══██╔══╝██╔══██╗████╗░██║
@@ -110,7 +126,7 @@ def pilih_kecamatan_header():
 """)   
 
 def pilih_kelurahan_header():
-    console.print("""
+    tampilkan_banner("""
 [bold red]
 ██████╗░██╗██╗░░░░░██╗██╗░░██╗  ██╗░░██╗███████╗██╗░░░░░██╗░░░██╗██████╗░░█████╗░██╗░░██╗░█████╗░███╗░░██╗
 ██╔══██╗██║██║░░░░░██║██║░░██║  ██║░██╔╝██╔════╝██║░░░░░██║░░░██║██╔══██╗██╔══██╗██║░░██║██╔══██╗████╗░██║
@@ -0,0 +1,275 @@
+# utils/export/export.py
+
+import csv
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from api.bulk import fetch_bulk
+from api.cache import ResponseCache
+from api.client import BmkgClient, set_default_client
+from api.history import buka_riwayat_bawaan
+from utils.aggregation.aggregation import agregasi_harian
+from utils.display.display import ambil_entries
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EKSPOR = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet'}
+CHECKPOINT = '_checkpoint.jsonl'
+CHECKPOINT_VERSION = 1
+
+# Kolom satu baris ekspor: satu wilayah untuk satu tanggal
+KOLOM = ['kode', 'tingkat', 'nama', 'provinsi', 'kotkab', 'kecamatan', 'desa', 'lat', 'lon',
+         'tanggal', 'suhu_min', 'suhu_max', 'kelembaban_max', 'angin_avg', 'angin_dir', 'kondisi']
+
+# Klien milik proses pekerja, dibuat oleh _mulai_pekerja
+_klien = None
+
+
+def baris_ekspor(region, entries):
+    """
+    Baris ekspor (list dict berkolom KOLOM) dari entri respons satu wilayah:
+    ringkasan harian agregasi_harian ditambah identitas wilayahnya.
+    Nama di bawah tingkat wilayah (mis. desa untuk kecamatan) dikosongkan.
+    """
+    lokasi = entries[0].get('lokasi', {}) if entries else {}
+    identitas = {
+        'kode': region.code,
+        'tingkat': region.level,
+        'nama': region.name,
+        'provinsi': lokasi.get('provinsi'),
+        'kotkab': lokasi.get('kotkab') if region.level >= 2 else None,
+        'kecamatan': lokasi.get('kecamatan') if region.level >= 3 else None,
+        'desa': lokasi.get('desa') if region.level >= 4 else None,
+        'lat': lokasi.get('lat') if region.level >= 4 else None,
+        'lon': lokasi.get('lon') if region.level >= 4 else None,
+    }
+    hasil = []
+    for info in agregasi_harian(entries):
+        baris = dict(identitas)
+        baris.update(info)
+        if baris['angin_avg'] == 'N/A':
+            baris['angin_avg'] = None
+        else:
+            baris['angin_avg'] = round(baris['angin_avg'], 2)
+        hasil.append(baris)
+    return hasil
+
+
+def _mulai_pekerja(use_cache, concurrency, level_log):
+    """
+    Initializer ProcessPoolExecutor: setiap pekerja memakai klien dan pool
+    koneksinya sendiri (klien induk tidak boleh dipakai bersama lewat fork).
+    """
+    global _klien
+    logging.getLogger().setLevel(level_log)
+    set_default_client(None)
+    _klien = BmkgClient(cache=ResponseCache() if use_cache else None, pool_maxsize=concurrency,
+                        history=buka_riwayat_bawaan())
+
+
+def proses_batch(regions, concurrency=4, rate=None):
+    """
+    Dijalankan di proses pekerja: fetch → parse → agregasi untuk satu batch
+    wilayah. Mengembalikan list (kode, baris) dengan baris None jika gagal.
+    Hanya ringkasan kecil yang dikirim balik ke proses induk, bukan respons mentah.
+    """
+    hasil = []
+    for region, data in fetch_bulk(regions, client=_klien, concurrency=concurrency, rate=rate):
+        entries = ambil_entries(data) if data else None
+        if not entries:
+            hasil.append((region.code, None))
+            continue
+        try:
+            hasil.append((region.code, baris_ekspor(region, entries)))
+        except Exception as e:
+            logger.error(f"Gagal mengagregasi {region.code}: {e}")
+            hasil.append((region.code, None))
+    return hasil
+
+
+class PenulisShard:
+    """
+    Menulis satu shard. Baris ditulis ke file .tmp selagi hasil berdatangan;
+    tutup() mengganti nama file ke nama akhirnya secara atomik, sehingga file
+    part-*.* yang terlihat selalu lengkap.
+    """
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.fmt = fmt
+        self.kode = []
+        self.n_baris = 0
+        self._f = None
+        self._writer = None
+        self._kolom = {kolom: [] for kolom in KOLOM} if fmt == 'parquet' else None
+        if fmt == 'csv':
+            self._f = open(self.tmp_path, 'w', encoding='utf-8', newline='')
+            self._writer = csv.DictWriter(self._f, fieldnames=KOLOM)
+            self._writer.writeheader()
+        elif fmt == 'jsonl':
+            self._f = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def tulis(self, kode, baris):
+        self.kode.append(kode)
+        self.n_baris += len(baris)
+        if self.fmt == 'csv':
+            self._writer.writerows(baris)
+        elif self.fmt == 'jsonl':
+            for item in baris:
+                self._f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        else:
+            # Parquet ditulis sekaligus saat shard ditutup (format kolom)
+            for item in baris:
+                for kolom in KOLOM:
+                    self._kolom[kolom].append(item.get(kolom))
+
+    def tutup(self):
+        if self.fmt == 'parquet':
+            import pyarrow
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(pyarrow.table(self._kolom), self.tmp_path)
+        else:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self._f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def buang(self):
+        if self._f is not None:
+            self._f.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+def baca_checkpoint(direktori, fmt):
+    """
+    Membaca checkpoint ekspor di `direktori`. Mengembalikan (kode selesai,
+    nomor shard berikutnya). Checkpoint dengan format lain memunculkan ValueError.
+    Baris terakhir yang terpotong (mis. proses mati saat menulis) dibuang dari
+    file agar catatan berikutnya tidak ikut rusak; shard-nya akan ditulis ulang.
+    """
+    path = os.path.join(direktori, CHECKPOINT)
+    selesai = set()
+    shard_berikutnya = 0
+    if not os.path.exists(path):
+        return selesai, shard_berikutnya
+    with open(path, 'rb+') as f:
+        isi = f.read()
+        utuh = isi.rfind(b'\n') + 1
+        if utuh < len(isi):
+            logger.warning(f"Catatan checkpoint terakhir terpotong dan dibuang: {isi[utuh:utuh + 80]!r}")
+            f.truncate(utuh)
+    for baris in isi[:utuh].decode('utf-8').splitlines():
+        try:
+            item = json.loads(baris)
+        except ValueError:
+            logger.warning(f"Baris checkpoint rusak diabaikan: {baris[:80]!r}")
+            continue
+        if 'versi' in item:
+            if item['versi'] != CHECKPOINT_VERSION or item['format'] != fmt:
+                raise ValueError(f"Checkpoint di {direktori} dibuat untuk format {item['format']} "
+                                 f"(versi {item['versi']}); gunakan direktori lain.")
+            continue
+        selesai.update(item['kode'])
+        shard_berikutnya = max(shard_berikutnya, item['shard'] + 1)
+    return selesai, shard_berikutnya
+
+
+def _catat_checkpoint(direktori, item):
+    with open(os.path.join(direktori, CHECKPOINT), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(item) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def ekspor(regions, direktori, fmt='csv', workers=None, concurrency=4, rate=5.0,
+           batch=32, shard_size=1000, use_cache=True, progress=None):
+    """
+    Mengekspor ringkasan harian `regions` ke `direktori` sebagai shard
+    part-NNNNN.<fmt>, masing-masing berisi paling banyak `shard_size` wilayah.
+
+    Fetch, decoding JSON dan agregasi berjalan di `workers` proses (bawaan:
+    jumlah CPU), masing-masing dengan `concurrency` permintaan paralel; batas
+    `rate` dibagi rata antarproses. Setiap shard yang selesai dicatat di
+    _checkpoint.jsonl, sehingga ekspor yang terputus bisa dilanjutkan dengan
+    memanggil ulang fungsi ini: wilayah yang sudah tercatat dilewati.
+    Saat dihentikan (KeyboardInterrupt), shard yang sedang diisi tetap ditutup.
+
+    `progress(kode, berhasil)` dipanggil untuk setiap wilayah yang selesai.
+    Mengembalikan dict: diproses, berhasil, gagal (list kode), dilewati, shard, baris.
+    """
+    # Diimpor di sini: concurrent.futures.process ikut memuat multiprocessing,
+    # yang tidak dibutuhkan perintah lain (lihat benchmarks/importtime.py)
+    from concurrent.futures import ProcessPoolExecutor
+
+    if fmt not in FORMAT_EKSPOR:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+    os.makedirs(direktori, exist_ok=True)
+    selesai, nomor_shard = baca_checkpoint(direktori, fmt)
+    if not os.path.exists(os.path.join(direktori, CHECKPOINT)):
+        _catat_checkpoint(direktori, {'versi': CHECKPOINT_VERSION, 'format': fmt})
+
+    sisa = [region for region in regions if region.code not in selesai]
+    ringkasan = {'diproses': 0, 'berhasil': 0, 'gagal': [], 'dilewati': len(regions) - len(sisa),
+                 'shard': 0, 'baris': 0}
+    if not sisa:
+        return ringkasan
+
+    workers = workers or os.cpu_count() or 1
+    rate_pekerja = rate / workers if rate else None
+    batches = (sisa[i:i + batch] for i in range(0, len(sisa), batch))
+    shard = None
+
+    def tutup_shard():
+        nonlocal shard, nomor_shard
+        if shard is None:
+            return
+        if shard.kode:
+            shard.tutup()
+            _catat_checkpoint(direktori, {'shard': nomor_shard, 'file': os.path.basename(shard.path),
+                                          'kode': shard.kode, 'baris': shard.n_baris})
+            ringkasan['shard'] += 1
+            nomor_shard += 1
+        else:
+            shard.buang()
+        shard = None
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_mulai_pekerja,
+                                   initargs=(use_cache, concurrency, logging.getLogger().level))
+    try:
+        berjalan = set()
+        # Antrean dibatasi agar daftar 80 ribu desa tidak jadi ribuan future sekaligus
+        for kumpulan in batches:
+            berjalan.add(executor.submit(proses_batch, kumpulan, concurrency, rate_pekerja))
+            if len(berjalan) >= workers * 2:
+                break
+
+        while berjalan:
+            rampung, berjalan = wait(berjalan, return_when=FIRST_COMPLETED)
+            for future in rampung:
+                for kode, baris in future.result():
+                    ringkasan['diproses'] += 1
+                    if baris is None:
+                        ringkasan['gagal'].append(kode)
+                    else:
+                        if shard is None:
+                            nama = f"part-{nomor_shard:05d}{FORMAT_EKSPOR[fmt]}"
+                            shard = PenulisShard(os.path.join(direktori, nama), fmt)
+                        shard.tulis(kode, baris)
+                        ringkasan['berhasil'] += 1
+                        ringkasan['baris'] += len(baris)
+                        if len(shard.kode) >= shard_size:
+                            tutup_shard()
+                    if progress is not None:
+                        progress(kode, baris is not None)
+                kumpulan = next(batches, None)
+                if kumpulan is not None:
+                    berjalan.add(executor.submit(proses_batch, kumpulan, concurrency, rate_pekerja))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        tutup_shard()
+    return ringkasan
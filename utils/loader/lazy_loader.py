@@ -0,0 +1,157 @@
+# utils/loader/lazy_loader.py
+
+import csv
+import io
+import logging
+from functools import partial
+from utils.loader.region import RegionStore
+from utils.loader.snapshot import muat_snapshot, simpan_snapshot
+from utils.metrics.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+def _level_baris(line):
+    """
+    Menentukan tingkat adm dari satu baris mentah (bytes) tanpa parsing CSV penuh.
+    """
+    code = line.split(b',', 1)[0].strip().strip(b'"')
+    if not code:
+        return 0
+    return code.count(b'.') + 1
+
+
+def _parse_baris(line):
+    row = next(csv.reader([line.decode('utf-8')]), None)
+    if not row or len(row) < 2:
+        return None, None
+    return row[0].strip(), row[1].strip()
+
+
+@timed('wilayah.scan_index')
+def scan_indeks_wilayah(filename):
+    """
+    Memindai CSV sekali dan mencatat offset byte setiap blok adm2.
+    File diasumsikan sudah terurut berdasarkan kode hierarki, sehingga seluruh
+    baris adm3/adm4 sebuah kabupaten berada tepat setelah baris adm2-nya.
+    Format hasil:
+    {adm1_code: (adm1_name, {adm2_code: (adm2_name, start, end)})}
+    """
+    indeks = {}
+    current_adm1 = None
+    current_adm2 = None
+
+    def tutup_blok(end):
+        if current_adm2 is not None:
+            name, start, _ = indeks[current_adm1][1][current_adm2]
+            indeks[current_adm1][1][current_adm2] = (name, start, end)
+
+    with open(filename, mode='rb') as f:
+        offset = 0
+        first = True
+        for line in f:
+            line_start = offset
+            offset += len(line)
+            if first:
+                first = False
+                if line.lstrip(b'\xef\xbb\xbf').lower().startswith(b'adm'):
+                    continue  # Lewati header
+
+            level = _level_baris(line)
+            if level not in (1, 2):
+                continue
+
+            adm_code, adm_name = _parse_baris(line)
+            if adm_code is None:
+                continue
+
+            if level == 1:
+                tutup_blok(line_start)
+                current_adm2 = None
+                if adm_code not in indeks:
+                    indeks[adm_code] = (adm_name, {})
+                current_adm1 = adm_code
+            else:
+                if current_adm1 is None:
+                    logger.warning(f"adm2 {adm_code} tanpa adm1.")
+                    continue
+                tutup_blok(line_start)
+                current_adm2 = None
+                if adm_code not in indeks[current_adm1][1]:
+                    indeks[current_adm1][1][adm_code] = (adm_name, offset, offset)
+                    current_adm2 = adm_code
+
+        tutup_blok(offset)
+
+    return indeks
+
+
+@timed('wilayah.parse_block')
+def parse_blok_kabupaten(filename, start, end):
+    """
+    Mem-parse baris adm3/adm4 dalam rentang byte [start, end) milik satu kabupaten.
+    Mengembalikan dict adm3 bersarang: {adm3: {'name':..., 'children': {adm4: nama}}}.
+    """
+    with open(filename, mode='rb') as f:
+        f.seek(start)
+        raw = f.read(end - start)
+
+    kecamatan = {}
+    current_adm3 = None
+    for row in csv.reader(io.StringIO(raw.decode('utf-8'))):
+        if not row or len(row) < 2:
+            continue  # Lewati baris kosong atau tidak lengkap
+
+        adm_code = row[0].strip()
+        adm_name = row[1].strip()
+        level = len(adm_code.split('.'))
+
+        if level == 3:
+            if adm_code not in kecamatan:
+                kecamatan[adm_code] = {
+                    'name': adm_name,
+                    'children': {}
+                }
+            current_adm3 = adm_code
+        elif level == 4:
+            if current_adm3 is None:
+                logger.warning(f"adm4 {adm_code} tanpa adm3.")
+                continue
+            kecamatan[current_adm3]['children'][adm_code] = adm_name
+        else:
+            logger.warning(f"Kode adm yang tidak dikenali: {adm_code}")
+    return kecamatan
+
+
+@timed('wilayah.load_lazy')
+def load_wilayah_lazy(filename, use_snapshot=True):
+    """
+    Memuat RegionStore secara malas (lazy).
+    Hanya provinsi dan kabupaten/kota yang langsung dimasukkan ke store;
+    kecamatan dan desa sebuah kabupaten di-parse saat cabang tersebut dibuka
+    atau saat salah satu kodenya dicari.
+    """
+    indeks = muat_snapshot(filename, 'index') if use_snapshot else None
+    if indeks is None:
+        try:
+            indeks = scan_indeks_wilayah(filename)
+        except FileNotFoundError:
+            logger.error(f"File {filename} tidak ditemukan.")
+            raise
+        except Exception as e:
+            logger.error(f"Terjadi kesalahan saat membaca {filename}: {e}")
+            raise
+        if use_snapshot:
+            simpan_snapshot(filename, 'index', indeks)
+
+    store = RegionStore()
+    store.tambah_anak(-1, [(code, name) for code, (name, _) in indeks.items()], 1)
+    for adm1_code, (_, kabupaten) in indeks.items():
+        store.tambah_anak(
+            store.index_of(adm1_code),
+            [(code, name) for code, (name, _, _) in kabupaten.items()],
+            2
+        )
+        for code, (_, block_start, block_end) in kabupaten.items():
+            store.daftarkan_pemuat(store.index_of(code), partial(parse_blok_kabupaten, filename, block_start, block_end))
+    return store
@@ -2,10 +2,33 @@
 
 import csv
 import logging
+from utils.loader.region import RegionStore
+from utils.loader.snapshot import muat_snapshot, simpan_snapshot
+from utils.metrics.metrics import timed
 
 logger = logging.getLogger(__name__)
 
-def load_wilayah_from_csv(filename):
+@timed('wilayah.load')
+def load_wilayah_from_csv(filename, use_snapshot=True):
+    """
+    Memuat seluruh wilayah ke dalam RegionStore.
+    Jika `use_snapshot` aktif, store dibaca dari snapshot biner di `.cache`
+    selama snapshot tersebut masih cocok dengan file CSV. Jika tidak, CSV
+    di-parse ulang lalu snapshot baru disimpan.
+    """
+    if use_snapshot:
+        store = muat_snapshot(filename, 'regions')
+        if store is not None:
+            logger.debug(f"Data wilayah dimuat dari snapshot {filename}.")
+            return store
+
+    store = RegionStore.from_hierarchy(parse_wilayah_csv(filename))
+    if use_snapshot:
+        simpan_snapshot(filename, 'regions', store)
+    return store
+
+@timed('wilayah.parse_csv')
+def parse_wilayah_csv(filename):
     """
     Membaca file CSV dan membangun struktur hierarki wilayah.
     Format CSV:
@@ -0,0 +1,271 @@
+# utils/loader/region.py
+
+import logging
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# Nilai child_start/child_end untuk wilayah yang anaknya belum diketahui
+BELUM_DIMUAT = -1
+
+# Tingkat wilayah: kode parameter API BMKG dan nama tampilannya
+ADM_LEVELS = {
+    1: {'code': 'adm1', 'name': 'Provinsi'},
+    2: {'code': 'adm2', 'name': 'Kabupaten/Kota'},
+    3: {'code': 'adm3', 'name': 'Kecamatan'},
+    4: {'code': 'adm4', 'name': 'Kelurahan/Desa'}
+}
+ADM_CODES = {level: info['code'] for level, info in ADM_LEVELS.items()}
+LEVELS = {code: level for level, code in ADM_CODES.items()}
+
+
+class Region:
+    """
+    Satu baris tabel wilayah: kode, nama, tingkat adm (1-4) dan posisinya di store.
+    """
+    __slots__ = ('code', 'name', 'level', 'index')
+
+    def __init__(self, code, name, level, index):
+        self.code = code
+        self.name = name
+        self.level = level
+        self.index = index
+
+    def __repr__(self):
+        return f"Region({self.code!r}, {self.name!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Region) and other.code == self.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+
+class RegionStore:
+    """
+    Tabel datar seluruh wilayah dalam bentuk array paralel.
+
+    Anak-anak sebuah wilayah selalu disimpan bersebelahan sehingga cukup dicatat
+    sebagai rentang [child_start, child_end). Pencarian berdasarkan kode lengkap,
+    induk, maupun daftar anak semuanya O(1) lewat tabel hash kode -> indeks.
+
+    Anak-anak disimpan urut kode; daftar pilihan menu (`opsi`) diurutkan
+    berdasarkan nama saat pertama diminta lalu disimpan per induk.
+
+    Anak sebuah wilayah boleh dimuat belakangan: daftarkan fungsi pemuat lewat
+    `daftarkan_pemuat`, yang akan dipanggil saat anak-anak itu pertama kali diminta.
+    Store aman dibaca dari banyak thread selama pemuatan berlangsung: kode dari
+    cabang yang sedang dimuat baru terlihat setelah seluruh cabangnya lengkap.
+    """
+
+    def __init__(self):
+        self.codes = []
+        self.names = []
+        self.levels = array('b')
+        self.parents = array('i')
+        self.child_start = array('i')
+        self.child_end = array('i')
+        self.root_start = 0
+        self.root_end = 0
+        self._index = {}
+        self._pemuat = {}
+        self._opsi = {}
+        self._lock = threading.RLock()
+
+    def _tambah(self, code, name, level, parent, index):
+        idx = len(self.codes)
+        self.codes.append(code)
+        self.names.append(name)
+        self.levels.append(level)
+        self.parents.append(parent)
+        self.child_start.append(BELUM_DIMUAT)
+        self.child_end.append(BELUM_DIMUAT)
+        index[code] = idx
+        return idx
+
+    def tambah_anak(self, parent, items, level, index=None):
+        """
+        Menambahkan sekumpulan anak secara bersebelahan, diurutkan berdasarkan kode.
+        `parent` adalah indeks induk (-1 untuk provinsi), `items` berisi (kode, nama).
+        Kode baru dicatat di `index` (bawaan: indeks store itu sendiri).
+        Mengembalikan rentang indeks anak yang baru ditambahkan.
+        """
+        index = self._index if index is None else index
+        start = len(self.codes)
+        for code, name in sorted(items):
+            if code in self._index or code in index:
+                logger.warning(f"Kode wilayah ganda diabaikan: {code}")
+                continue
+            self._tambah(code, name, level, parent, index)
+        end = len(self.codes)
+        if parent < 0:
+            self.root_start, self.root_end = start, end
+        else:
+            self.child_start[parent] = start
+            self.child_end[parent] = end
+        return start, end
+
+    def tambah_subtree(self, parent, hierarchy, level):
+        """
+        Menambahkan subtree berbentuk dict bersarang
+        ({kode: {'name':..., 'children': {...}}}, dengan daun berupa {kode: nama})
+        di bawah `parent`.
+
+        Kode-kode baru dimasukkan ke indeks sekaligus setelah seluruh subtree
+        ditambahkan. Thread lain yang mencari salah satunya sebelum itu tidak
+        menemukannya dan ikut menunggu pemuat cabang, alih-alih mendapat
+        wilayah yang anaknya belum ada.
+        """
+        baru = {}
+        self._tambah_subtree(parent, hierarchy, level, baru)
+        self._index.update(baru)
+
+    def _tambah_subtree(self, parent, hierarchy, level, baru):
+        items = [
+            (code, info['name'] if isinstance(info, dict) else info)
+            for code, info in hierarchy.items()
+        ]
+        start, end = self.tambah_anak(parent, items, level, baru)
+        for code, info in hierarchy.items():
+            idx = baru.get(code)
+            if isinstance(info, dict) and idx is not None and start <= idx < end:
+                self._tambah_subtree(idx, info['children'], level + 1, baru)
+
+    def daftarkan_pemuat(self, idx, pemuat):
+        """
+        Mendaftarkan fungsi tanpa argumen yang mengembalikan subtree anak `idx`
+        (format sama dengan tambah_subtree). Dipanggil saat anak pertama kali diminta.
+        """
+        self._pemuat[idx] = pemuat
+
+    def _pastikan_anak(self, idx):
+        if idx in self._pemuat:
+            with self._lock:
+                pemuat = self._pemuat.get(idx)
+                if pemuat is not None:
+                    self.tambah_subtree(idx, pemuat(), self.levels[idx] + 1)
+                    # Baru dilepas setelah cabang lengkap: thread lain yang masih
+                    # melihat pemuat terdaftar menunggu lock di atas
+                    del self._pemuat[idx]
+
+    @classmethod
+    def from_hierarchy(cls, wilayah_hierarchy):
+        """
+        Membangun store dari dict bersarang hasil parse_wilayah_csv.
+        """
+        store = cls()
+        store.tambah_subtree(-1, wilayah_hierarchy, 1)
+        return store
+
+    def _region(self, idx):
+        return Region(self.codes[idx], self.names[idx], self.levels[idx], idx)
+
+    def index_of(self, code):
+        """
+        Mengembalikan indeks sebuah kode, memuat cabangnya bila perlu.
+        """
+        idx = self._index.get(code)
+        if idx is not None or not self._pemuat:
+            return idx
+        # Kode belum dimuat: buka leluhurnya satu per satu dari atas
+        parts = code.split('.')
+        for depth in range(1, len(parts)):
+            ancestor = self._index.get('.'.join(parts[:depth]))
+            if ancestor is None:
+                return None
+            self._pastikan_anak(ancestor)
+        return self._index.get(code)
+
+    def get(self, code):
+        """
+        Mengembalikan Region untuk kode lengkap, atau None jika tidak ada.
+        """
+        idx = self.index_of(code)
+        return None if idx is None else self._region(idx)
+
+    def __contains__(self, code):
+        return self.index_of(code) is not None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def child_range(self, code=None):
+        """
+        Rentang indeks anak sebuah kode; tanpa kode berarti daftar provinsi.
+        """
+        if code is None:
+            return self.root_start, self.root_end
+        idx = self.index_of(code)
+        if idx is None:
+            raise KeyError(code)
+        self._pastikan_anak(idx)
+        start = self.child_start[idx]
+        if start == BELUM_DIMUAT:
+            return start, start
+        return start, self.child_end[idx]
+
+    def children(self, code=None):
+        """
+        Daftar Region anak dari sebuah kode (atau daftar provinsi).
+        """
+        start, end = self.child_range(code)
+        return [self._region(idx) for idx in range(start, end)] if start >= 0 else []
+
+    def opsi(self, code=None):
+        """
+        Pilihan menu untuk anak sebuah kode: tuple (kode, nama) urut nama.
+        Dibangun sekali per induk lalu dipakai ulang. Induk yang anaknya belum
+        ada (desa, atau cabang yang belum selesai ditambahkan) tidak disimpan,
+        agar menu itu tidak kosong selamanya.
+        """
+        key = -1 if code is None else self.index_of(code)
+        if key is None:
+            raise KeyError(code)
+        opsi = self._opsi.get(key)
+        if opsi is None:
+            start, end = self.child_range(code)
+            if start < 0:
+                return ()
+            opsi = tuple(sorted(zip(self.codes[start:end], self.names[start:end]),
+                                key=lambda item: (item[1].casefold(), item[0])))
+            self._opsi[key] = opsi
+        return opsi
+
+    def roots(self):
+        return self.children(None)
+
+    def parent(self, code):
+        idx = self.index_of(code)
+        if idx is None:
+            raise KeyError(code)
+        parent = self.parents[idx]
+        return None if parent < 0 else self._region(parent)
+
+    def ancestors(self, code):
+        """
+        Daftar Region dari provinsi hingga kode itu sendiri.
+        """
+        idx = self.index_of(code)
+        if idx is None:
+            raise KeyError(code)
+        path = []
+        while idx >= 0:
+            path.append(self._region(idx))
+            idx = self.parents[idx]
+        path.reverse()
+        return path
+
+    # Indeks hash, cache opsi dan lock tidak ikut di-pickle; dibangun ulang saat dimuat
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_index']
+        del state['_opsi']
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._index = {code: idx for idx, code in enumerate(self.codes)}
+        self._opsi = {}
+        self._lock = threading.RLock()
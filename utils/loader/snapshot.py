@@ -0,0 +1,101 @@
+# utils/loader/snapshot.py
+
+import hashlib
+import logging
+import os
+import pickle
+from utils.metrics.metrics import incr
+
+logger = logging.getLogger(__name__)
+
+# Naikkan versi ini setiap kali bentuk payload snapshot berubah.
+SNAPSHOT_VERSION = 3
+
+
+def snapshot_path(filename, kind):
+    """
+    Mengembalikan lokasi file snapshot untuk sebuah CSV.
+    Snapshot disimpan di folder `.cache` di samping file CSV-nya.
+    """
+    folder = os.path.join(os.path.dirname(os.path.abspath(filename)), '.cache')
+    return os.path.join(folder, f"{os.path.basename(filename)}.{kind}.pickle")
+
+
+def hash_file(filename):
+    """
+    Menghitung SHA-256 dari isi file.
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tulis_snapshot(path, snapshot):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+    os.replace(tmp_path, path)
+
+
+def muat_snapshot(filename, kind):
+    """
+    Memuat payload snapshot jika masih sesuai dengan file CSV.
+    Validasi: ukuran harus sama; jika mtime juga sama snapshot langsung dipakai,
+    jika mtime berbeda isi file dibandingkan lewat hash.
+    Mengembalikan None jika snapshot tidak ada atau sudah kedaluwarsa.
+    """
+    payload = _baca_snapshot(filename, kind)
+    incr(f"snapshot.{kind}.{'hit' if payload is not None else 'miss'}")
+    return payload
+
+
+def _baca_snapshot(filename, kind):
+    path = snapshot_path(filename, kind)
+    try:
+        stat = os.stat(filename)
+        with open(path, 'rb') as f:
+            snapshot = pickle.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Snapshot {path} tidak dapat dibaca: {e}")
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get('size') != stat.st_size:
+        return None
+    if snapshot.get('mtime_ns') != stat.st_mtime_ns:
+        if snapshot.get('sha256') != hash_file(filename):
+            return None
+        # Isi sama tetapi mtime berubah (mis. setelah git checkout),
+        # perbarui mtime agar pengecekan berikutnya tidak perlu hashing.
+        snapshot['mtime_ns'] = stat.st_mtime_ns
+        try:
+            _tulis_snapshot(path, snapshot)
+        except OSError as e:
+            logger.warning(f"Gagal memperbarui snapshot {path}: {e}")
+    return snapshot['payload']
+
+
+def simpan_snapshot(filename, kind, payload):
+    """
+    Menyimpan payload sebagai snapshot biner untuk file CSV.
+    Kegagalan menulis hanya dicatat, tidak menghentikan program.
+    """
+    path = snapshot_path(filename, kind)
+    try:
+        stat = os.stat(filename)
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': hash_file(filename),
+            'payload': payload,
+        }
+        _tulis_snapshot(path, snapshot)
+    except OSError as e:
+        logger.warning(f"Gagal menyimpan snapshot {path}: {e}")
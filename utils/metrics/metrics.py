@@ -0,0 +1,187 @@
+# utils/metrics/metrics.py
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    """
+    Pencatat waktu per tahap (span) dan penghitung sederhana.
+
+    Selama belum diaktifkan, span() dan incr() hampir tanpa biaya sehingga
+    instrumentasi boleh dibiarkan di jalur panas. Aman dipakai dari banyak thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+        self._timers = {}
+        self._counters = {}
+
+    def aktifkan(self):
+        self.enabled = True
+        self.started_at = time.perf_counter()
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+        self.started_at = time.perf_counter()
+
+    def catat(self, name, seconds):
+        with self._lock:
+            stat = self._timers.get(name)
+            if stat is None:
+                self._timers[name] = [1, seconds, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                stat[2] = min(stat[2], seconds)
+                stat[3] = max(stat[3], seconds)
+
+    @contextmanager
+    def span(self, name):
+        """
+        Mengukur durasi blok `with` dan mencatatnya di bawah `name`.
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.catat(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """
+        Dekorator: setiap panggilan fungsi dicatat sebagai span `name`.
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.catat(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def span_iter(self, name, iterable):
+        """
+        Meneruskan elemen `iterable` dan mencatat waktu yang dihabiskan untuk
+        menghasilkannya sebagai satu span `name`. Waktu konsumen memproses
+        setiap elemen (selama yield) tidak ikut terhitung.
+        """
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        total = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    total += time.perf_counter() - start
+                yield item
+        finally:
+            # Berhenti lebih awal: generator di dalamnya ikut ditutup (mis. melepas koneksi)
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+            self.catat(name, total)
+
+    def incr(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """
+        Salinan data saat ini: {'wall_s', 'timers': {name: {...}}, 'counters': {...}}.
+        """
+        with self._lock:
+            timers = {
+                name: {'count': count, 'total_s': total, 'min_s': low, 'max_s': high, 'avg_s': total / count}
+                for name, (count, total, low, high) in sorted(self._timers.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {'wall_s': time.perf_counter() - self.started_at, 'timers': timers, 'counters': counters}
+
+    def ke_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def ke_prometheus(self, prefix='bmkg_cli'):
+        """
+        Format teks Prometheus: setiap span menjadi summary (_count/_sum)
+        plus gauge _max; setiap penghitung menjadi counter.
+        """
+        data = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        for name, stat in data['timers'].items():
+            lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {stat["count"]}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {stat["total_s"]:.6f}')
+        lines.append(f"# TYPE {prefix}_span_seconds_max gauge")
+        for name, stat in data['timers'].items():
+            lines.append(f'{prefix}_span_seconds_max{{span="{name}"}} {stat["max_s"]:.6f}')
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in data['counters'].items():
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        lines.append(f"# TYPE {prefix}_wall_seconds gauge")
+        lines.append(f"{prefix}_wall_seconds {data['wall_s']:.6f}")
+        return '\n'.join(lines) + '\n'
+
+    def ringkasan(self):
+        """
+        Tabel teks rincian waktu per tahap, diurutkan dari total terbesar.
+        Span bisa bersarang (mis. http.get di dalam fetch), jadi persentasenya
+        tidak selalu berjumlah 100%.
+        """
+        data = self.snapshot()
+        wall = data['wall_s'] or 1e-9
+        lines = [f"{'Tahap':<28} {'Jumlah':>7} {'Total (ms)':>11} {'Rata2 (ms)':>11} {'Maks (ms)':>10} {'%':>6}"]
+        for name, stat in sorted(data['timers'].items(), key=lambda item: -item[1]['total_s']):
+            lines.append(
+                f"{name:<28} {stat['count']:>7} {stat['total_s'] * 1000:>11.1f} {stat['avg_s'] * 1000:>11.2f} "
+                f"{stat['max_s'] * 1000:>10.1f} {stat['total_s'] / wall * 100:>5.1f}%"
+            )
+        for name, value in data['counters'].items():
+            lines.append(f"{name:<28} {value:>7}")
+        lines.append(f"{'total waktu proses':<28} {'':>7} {wall * 1000:>11.1f}")
+        return '\n'.join(lines)
+
+    def tulis(self, path):
+        """
+        Menulis metrik ke file: JSON jika berakhiran .json, selain itu teks Prometheus.
+        """
+        teks = self.ke_json() if path.endswith('.json') else self.ke_prometheus()
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(teks)
+        except OSError as e:
+            logger.error(f"Gagal menulis metrik ke {path}: {e}")
+
+
+# Registry bersama untuk seluruh proses
+metrics = Metrics()
+span = metrics.span
+timed = metrics.timed
+span_iter = metrics.span_iter
+incr = metrics.incr
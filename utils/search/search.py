@@ -0,0 +1,133 @@
+# utils/search/search.py
+
+import logging
+import re
+from array import array
+from collections import Counter, defaultdict
+from itertools import chain
+from utils.loader.loader import load_wilayah_from_csv
+from utils.loader.snapshot import muat_snapshot, simpan_snapshot
+from utils.metrics.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Trigram yang muncul di lebih banyak nama dari ini hampir tidak membedakan
+# apa pun; dilewati selama kueri masih punya trigram lain yang lebih jarang.
+MAX_POSTING = 5000
+
+
+def normalisasi(teks):
+    """
+    Huruf kecil, tanda baca jadi spasi, spasi ganda dirapatkan.
+    """
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', teks.lower()).split())
+
+
+def trigram(teks):
+    """
+    Himpunan trigram dari teks yang sudah dinormalisasi, diberi padding spasi
+    agar awal dan akhir kata ikut terwakili.
+    """
+    padded = f"  {teks} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Indeks pencarian nama wilayah berbasis trigram (inverted index).
+    Kueri dicocokkan lewat kemiripan Dice atas trigram sehingga salah ketik
+    ringan dan potongan nama tetap ketemu; kecocokan persis dan awalan
+    mendapat nilai tambahan.
+    """
+
+    def __init__(self, names):
+        self.names = [normalisasi(name) for name in names]
+        postings = defaultdict(lambda: array('i'))
+        self.sizes = array('H')
+        for idx, name in enumerate(self.names):
+            grams = trigram(name)
+            self.sizes.append(min(len(grams), 65535))
+            for gram in grams:
+                postings[gram].append(idx)
+        self.postings = dict(postings)
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.names)
+
+    def search(self, query, limit=10, levels=None, store=None):
+        """
+        Mengembalikan list (skor, indeks) terbaik untuk kueri, skor menurun.
+        `levels` (butuh `store`) membatasi hasil pada tingkat adm tertentu.
+        """
+        query = normalisasi(query)
+        if not query:
+            return []
+        grams = trigram(query)
+        daftar = [self.postings[g] for g in grams if g in self.postings]
+        jarang = [p for p in daftar if len(p) <= MAX_POSTING]
+        if jarang:
+            daftar = jarang
+
+        # Counter.update atas rantai posting dijalankan di C, jauh lebih cepat
+        # daripada menjumlah satu per satu di loop Python
+        hitung = Counter(chain.from_iterable(daftar))
+
+        hasil = []
+        n_query = len(grams)
+        # Kandidat yang berbagi terlalu sedikit trigram tidak mungkin lolos ambang skor
+        min_sama = max(1, int(n_query * 0.3))
+        for idx, sama in hitung.items():
+            if sama < min_sama:
+                continue
+            if levels is not None and store.levels[idx] not in levels:
+                continue
+            skor = 2.0 * sama / (n_query + self.sizes[idx])
+            name = self.names[idx]
+            if name == query:
+                skor += 1.0
+            elif name.startswith(query):
+                skor += 0.5
+            elif f" {query}" in f" {name}":
+                skor += 0.25
+            hasil.append((skor, idx))
+
+        # Skor tertinggi dulu; bila seri, tingkat yang lebih tinggi lalu urutan kode
+        # (tanpa store: urutan indeks)
+        if store is not None:
+            hasil.sort(key=lambda item: (-item[0], store.levels[item[1]], store.codes[item[1]]))
+        else:
+            hasil.sort(key=lambda item: (-item[0], item[1]))
+        return [(skor, idx) for skor, idx in hasil[:limit] if skor >= 0.3]
+
+
+def muat_search_index(filename):
+    """
+    Memuat RegionStore lengkap beserta indeks pencariannya.
+    Indeks disimpan sebagai snapshot sehingga hanya dibangun ulang jika CSV berubah.
+    """
+    store = load_wilayah_from_csv(filename)
+    index = muat_snapshot(filename, 'search')
+    if index is None or len(index.names) != len(store):
+        index = SearchIndex.from_store(store)
+        simpan_snapshot(filename, 'search', index)
+    return store, index
+
+
+@timed('search')
+def cari_wilayah(store, index, query, limit=10, levels=None):
+    """
+    Mencari wilayah berdasarkan nama. Mengembalikan list dict berisi kode,
+    nama, tingkat, skor dan jalur lengkap dari provinsi hingga wilayah tersebut.
+    """
+    hasil = []
+    for skor, idx in index.search(query, limit=limit, levels=levels, store=store):
+        jalur = store.ancestors(store.codes[idx])
+        hasil.append({
+            'kode': store.codes[idx],
+            'nama': store.names[idx],
+            'tingkat': store.levels[idx],
+            'skor': round(skor, 3),
+            'jalur': [region.name for region in jalur],
+        })
+    return hasil
@@ -0,0 +1,138 @@
+# utils/session/session.py
+
+import logging
+import time
+from collections import OrderedDict
+from api.fetch_api import fetch_prakiraan_cuaca, stream_prakiraan_cuaca
+from utils.aggregation.aggregation import agregasi_harian, agregasi_stream
+from utils.display.display import ambil_entries
+from utils.loader.region import ADM_CODES
+
+logger = logging.getLogger(__name__)
+
+# Kolom blok 'lokasi' yang hanya bermakna sampai tingkat tertentu
+KOLOM_TINGKAT = {2: ('adm2', 'kotkab'), 3: ('adm3', 'kecamatan'), 4: ('adm4', 'desa', 'lat', 'lon')}
+
+
+def lokasi_wilayah(lokasi, level):
+    """
+    Blok 'lokasi' untuk wilayah setingkat `level`. Respons adm1-adm3 (atau desa
+    pertamanya) bisa memuat kolom tingkat di bawahnya; kolom itu dibuang agar
+    nama/kode desa tidak tampak menggambarkan kecamatan atau provinsi.
+    """
+    hasil = dict(lokasi)
+    for tingkat, kolom in KOLOM_TINGKAT.items():
+        if tingkat > level:
+            for nama in kolom:
+                hasil.pop(nama, None)
+    if 'type' in hasil:
+        hasil['type'] = ADM_CODES[level]
+    return hasil
+
+
+def ringkasan_prakiraan(region, use_cache=True, client=None):
+    """
+    Ringkasan prakiraan (lokasi_info, harian) untuk sebuah wilayah, atau
+    (None, []) jika data tidak tersedia. Provinsi/kabupaten di-stream agar
+    respons besar tidak dimuat utuh. Tanpa `client` dipakai klien bersama.
+    lokasi_info diambil dari blok 'lokasi' tingkat atas respons (lihat lokasi_wilayah).
+    """
+    adm_level_code = ADM_CODES[region.level]
+    if region.level <= 2:
+        stream = client.stream_prakiraan_cuaca if client is not None else stream_prakiraan_cuaca
+        meta = {}
+        lokasi_info, harian = agregasi_stream(stream(adm_level_code, region.code, use_cache=use_cache, meta=meta))
+        if lokasi_info is None:
+            return None, []
+        return lokasi_wilayah(meta.get('lokasi') or lokasi_info, region.level), harian
+    fetch = client.fetch_prakiraan_cuaca if client is not None else fetch_prakiraan_cuaca
+    data = fetch(adm_level_code, region.code, use_cache=use_cache)
+    entries = ambil_entries(data) if data else None
+    if not entries:
+        return None, []
+    lokasi = data.get('lokasi') if isinstance(data, dict) else None
+    return lokasi_wilayah(lokasi or entries[0].get('lokasi', {}), region.level), agregasi_harian(entries)
+
+
+class Sesi:
+    """
+    Status satu sesi interaktif: RegionStore yang dimuat sekali, jalur wilayah
+    yang sedang dipilih (provinsi → desa) dan prakiraan yang sudah diambil.
+
+    Jalur disimpan sebagai list Region sehingga kembali ke tingkat mana pun
+    cukup memotong list tersebut, tanpa menelusuri ulang dari provinsi.
+    Ringkasan prakiraan disimpan di memori (LRU, dengan TTL) sehingga membuka
+    ulang wilayah yang sama tidak mengulang fetch maupun agregasi.
+    Jika `prefetch` (api.prefetch.PrefetchSpekulatif) diberikan, anak-anak
+    wilayah terpilih diambil di latar belakang lewat prefetch_anak().
+    """
+
+    def __init__(self, wilayah, max_prakiraan=256, ttl=3 * 3600, prefetch=None):
+        self.wilayah = wilayah
+        self.prefetch = prefetch
+        self.jalur = []
+        self.max_prakiraan = max_prakiraan
+        self.ttl = ttl
+        self._prakiraan = OrderedDict()
+
+    @property
+    def tingkat(self):
+        """
+        Tingkat menu berikutnya yang akan ditampilkan (1 = provinsi).
+        """
+        return len(self.jalur) + 1
+
+    @property
+    def terpilih(self):
+        return self.jalur[-1] if self.jalur else None
+
+    def opsi(self):
+        """
+        Pilihan (kode, nama) untuk tingkat berikutnya.
+        """
+        parent = self.terpilih
+        return self.wilayah.opsi(parent.code if parent else None)
+
+    def pilih(self, code):
+        """
+        Menambahkan wilayah ke jalur. Kode harus anak dari wilayah terpilih.
+        """
+        region = self.wilayah.get(code)
+        if region is None or region.level != self.tingkat:
+            raise KeyError(code)
+        self.jalur.append(region)
+        return region
+
+    def kembali_ke(self, tingkat):
+        """
+        Kembali ke menu tingkat `tingkat`: pilihan pada tingkat itu dan di
+        bawahnya dilepas, pilihan leluhurnya tetap.
+        """
+        del self.jalur[max(0, tingkat - 1):]
+
+    def prakiraan(self, region, use_cache=True):
+        """
+        Ringkasan prakiraan (lokasi_info, harian) untuk sebuah wilayah (lihat
+        ringkasan_prakiraan). Hasil kosong (None, []) tidak disimpan.
+        """
+        key = region.code
+        item = self._prakiraan.get(key)
+        if item is not None and use_cache and time.monotonic() - item[0] < self.ttl:
+            self._prakiraan.move_to_end(key)
+            return item[1]
+
+        hasil = ringkasan_prakiraan(region, use_cache=use_cache)
+        if hasil[0] is not None:
+            self._prakiraan[key] = (time.monotonic(), hasil)
+            self._prakiraan.move_to_end(key)
+            while len(self._prakiraan) > self.max_prakiraan:
+                self._prakiraan.popitem(last=False)
+        return hasil
+
+    def prefetch_anak(self):
+        """
+        Mulai mengambil prakiraan anak-anak wilayah terpilih di latar belakang.
+        Untuk provinsi antrean hanya dikosongkan (lihat PrefetchSpekulatif.tingkat_min).
+        """
+        if self.prefetch is not None and self.terpilih is not None:
+            self.prefetch.mulai(self.wilayah.children(self.terpilih.code))
@@ -1,12 +1,90 @@
-from rich.console import Console
-console = Console()
+import importlib
+import importlib.util
 import os
+import sys
+import threading
+
+_consoles = {}
+_console_lock = threading.Lock()
+
+def get_console(stderr=False):
+    """
+    Console rich bersama untuk seluruh program (satu untuk stdout, satu untuk
+    stderr), dibuat saat pertama dipakai. rich baru diimpor di sini, sehingga
+    perintah yang tidak mencetak lewat rich (mis. keluaran --json) tidak
+    membayar biaya impornya.
+    """
+    konsol = _consoles.get(stderr)
+    if konsol is None:
+        with _console_lock:
+            if stderr not in _consoles:
+                from rich.console import Console
+                _consoles[stderr] = Console(stderr=stderr)
+            konsol = _consoles[stderr]
+    return konsol
+
+class _KonsolMalas:
+    """
+    Pengganti `console = Console()` di tingkat modul: setiap atribut diteruskan
+    ke get_console(), sehingga Console baru dibuat saat benar-benar dipakai.
+    """
+    def __init__(self, stderr=False):
+        self._stderr = stderr
+
+    def __getattr__(self, name):
+        return getattr(get_console(self._stderr), name)
+
+console = _KonsolMalas()
+# Pesan kesalahan, agar tidak tercampur dengan keluaran --json di stdout
+console_err = _KonsolMalas(stderr=True)
+
+class _ModulMalas:
+    """
+    Pengganti modul yang baru diimpor saat atributnya pertama kali diakses.
+    Impor sebenarnya dijalankan di bawah lock, sehingga aman bila akses
+    pertama terjadi dari beberapa thread sekaligus (importlib.util.LazyLoader
+    di Python 3.11 bisa memperlihatkan modul yang belum selesai dieksekusi).
+    """
+    def __init__(self, nama):
+        self._nama = nama
+        self._modul = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        modul = self._modul
+        if modul is None:
+            with self._lock:
+                if self._modul is None:
+                    self._modul = importlib.import_module(self._nama)
+                modul = self._modul
+        return getattr(modul, name)
+
+def impor_malas(nama):
+    """
+    Modul `nama` yang baru diimpor saat atributnya pertama kali diakses,
+    atau None jika modul tidak terpasang.
+    """
+    if nama in sys.modules:
+        return sys.modules[nama]
+    if importlib.util.find_spec(nama) is None:
+        return None
+    return _ModulMalas(nama)
+
+def terminal_interaktif():
+    """
+    True jika keluaran menuju terminal. Banner dan pembersihan layar hanya
+    berguna di terminal; saat keluaran dialihkan ke file/pipe keduanya dilewati.
+    """
+    return sys.stdout.isatty()
 
 def bersihkan_layar():
     """
     Membersihkan layar konsol.
     Menggunakan 'cls' untuk Windows dan 'clear' untuk sistem operasi lainnya.
+    Tidak melakukan apa pun jika keluaran bukan terminal.
     """
+    if not terminal_interaktif():
+        return
     os.system("cls" if os.name == "nt" else "clear")
 
 def pause():
@@ -14,4 +92,4 @@ def pause():
         console.print("[bold blue]Tekan [Enter] untuk melanjutkan...[/bold blue]")
         input()
     except KeyboardInterrupt:
-        pass
\ No newline at end of file
+        pass